@@ -0,0 +1,36 @@
+"""Indices por talhao/sensor nas hypertables de leituras
+
+Revision ID: 006_reading_scope_indexes
+Revises: 005_soil_precision
+Create Date: 2026-10-19
+
+"""
+
+from alembic import op
+
+revision = "006_reading_scope_indexes"
+down_revision = "005_soil_precision"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Ultima leitura por talhao/sensor (marcadores de ETag, leituras atuais)
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS idx_soil_readings_plot_time "
+        "ON soil_readings (plot_id, time DESC)"
+    )
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS idx_soil_readings_sensor_time "
+        "ON soil_readings (sensor_id, time DESC)"
+    )
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS idx_vision_data_plot_time "
+        "ON vision_data (plot_id, time DESC)"
+    )
+
+
+def downgrade():
+    op.execute("DROP INDEX IF EXISTS idx_vision_data_plot_time")
+    op.execute("DROP INDEX IF EXISTS idx_soil_readings_sensor_time")
+    op.execute("DROP INDEX IF EXISTS idx_soil_readings_plot_time")
@@ -0,0 +1,54 @@
+"""Continuous aggregate horario de soil_readings
+
+Revision ID: 007_soil_hourly_rollup
+Revises: 006_reading_scope_indexes
+Create Date: 2026-10-19
+
+"""
+
+from alembic import op
+
+revision = "007_soil_hourly_rollup"
+down_revision = "006_reading_scope_indexes"
+branch_labels = None
+depends_on = None
+
+SOIL_METRICS = ("moisture", "temperature", "ec", "ph", "nitrogen", "phosphorus", "potassium")
+
+
+def upgrade():
+    # Soma e contagem (e nao a media) para permitir reagregar em intervalos maiores
+    columns = ",\n            ".join(
+        f"sum({m}) AS {m}_sum, count({m}) AS {m}_count, min({m}) AS {m}_min, "
+        f"max({m}) AS {m}_max, last({m}, time) AS {m}_last"
+        for m in SOIL_METRICS
+    )
+    op.execute(f"""
+        CREATE MATERIALIZED VIEW soil_readings_hourly
+        WITH (timescaledb.continuous, timescaledb.materialized_only = false) AS
+        SELECT
+            time_bucket(INTERVAL '1 hour', time) AS bucket,
+            sensor_id,
+            plot_id,
+            {columns}
+        FROM soil_readings
+        GROUP BY bucket, sensor_id, plot_id
+        WITH NO DATA
+    """)
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS idx_soil_readings_hourly_plot_bucket "
+        "ON soil_readings_hourly (plot_id, bucket DESC)"
+    )
+    # Materializa o historico existente (nao pode rodar dentro de transacao)
+    with op.get_context().autocommit_block():
+        op.execute("CALL refresh_continuous_aggregate('soil_readings_hourly', NULL, NULL)")
+    op.execute("""
+        SELECT add_continuous_aggregate_policy('soil_readings_hourly',
+            start_offset => INTERVAL '3 days',
+            end_offset => INTERVAL '1 hour',
+            schedule_interval => INTERVAL '30 minutes')
+    """)
+
+
+def downgrade():
+    op.execute("DROP MATERIALIZED VIEW IF EXISTS soil_readings_hourly")
@@ -0,0 +1,110 @@
+"""Continuous aggregates horario e diario de weather_data
+
+Revision ID: 008_weather_rollups
+Revises: 007_soil_hourly_rollup
+Create Date: 2026-10-19
+
+"""
+
+from alembic import op
+
+revision = "008_weather_rollups"
+down_revision = "007_soil_hourly_rollup"
+branch_labels = None
+depends_on = None
+
+WEATHER_METRICS = (
+    "temperature",
+    "humidity",
+    "pressure",
+    "wind_speed",
+    "wind_direction",
+    "rainfall",
+    "solar_radiation",
+)
+
+# Fuso dos dias do rollup diario (padrao de farms.timezone)
+DAILY_TIMEZONE = "America/Recife"
+
+# Temperatura base dos graus-dia (GDD) pre-calculados no rollup diario
+GDD_BASE_TEMPERATURE = 10
+
+
+def upgrade():
+    # Mesmo formato do rollup de solo: soma, contagem, min, max e ultima leitura
+    columns = ",\n            ".join(
+        f"sum({m}) AS {m}_sum, count({m}) AS {m}_count, min({m}) AS {m}_min, "
+        f"max({m}) AS {m}_max, last({m}, time) AS {m}_last"
+        for m in WEATHER_METRICS
+    )
+    op.execute(f"""
+        CREATE MATERIALIZED VIEW weather_hourly
+        WITH (timescaledb.continuous, timescaledb.materialized_only = false) AS
+        SELECT
+            time_bucket(INTERVAL '1 hour', time) AS bucket,
+            sensor_id,
+            farm_id,
+            {columns},
+            count(*) AS readings
+        FROM weather_data
+        GROUP BY bucket, sensor_id, farm_id
+        WITH NO DATA
+    """)
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS idx_weather_hourly_farm_bucket "
+        "ON weather_hourly (farm_id, bucket DESC)"
+    )
+
+    # Valores diarios derivados (extremos, chuva acumulada e graus-dia)
+    op.execute(f"""
+        CREATE MATERIALIZED VIEW weather_daily
+        WITH (timescaledb.continuous, timescaledb.materialized_only = false) AS
+        SELECT
+            time_bucket(INTERVAL '1 day', time, '{DAILY_TIMEZONE}') AS bucket,
+            sensor_id,
+            farm_id,
+            avg(temperature) AS temperature_avg,
+            min(temperature) AS temperature_min,
+            max(temperature) AS temperature_max,
+            avg(humidity) AS humidity_avg,
+            min(humidity) AS humidity_min,
+            max(humidity) AS humidity_max,
+            avg(pressure) AS pressure_avg,
+            avg(wind_speed) AS wind_speed_avg,
+            max(wind_speed) AS wind_speed_max,
+            sum(rainfall) AS rainfall_total,
+            avg(solar_radiation) AS solar_radiation_avg,
+            GREATEST(
+                (max(temperature) + min(temperature)) / 2 - {GDD_BASE_TEMPERATURE}, 0
+            ) AS gdd,
+            count(*) AS readings
+        FROM weather_data
+        GROUP BY bucket, sensor_id, farm_id
+        WITH NO DATA
+    """)
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS idx_weather_daily_farm_bucket "
+        "ON weather_daily (farm_id, bucket DESC)"
+    )
+
+    # Materializa o historico existente (nao pode rodar dentro de transacao)
+    with op.get_context().autocommit_block():
+        op.execute("CALL refresh_continuous_aggregate('weather_hourly', NULL, NULL)")
+        op.execute("CALL refresh_continuous_aggregate('weather_daily', NULL, NULL)")
+    op.execute("""
+        SELECT add_continuous_aggregate_policy('weather_hourly',
+            start_offset => INTERVAL '3 days',
+            end_offset => INTERVAL '1 hour',
+            schedule_interval => INTERVAL '30 minutes')
+    """)
+    op.execute("""
+        SELECT add_continuous_aggregate_policy('weather_daily',
+            start_offset => INTERVAL '7 days',
+            end_offset => INTERVAL '1 day',
+            schedule_interval => INTERVAL '1 hour')
+    """)
+
+
+def downgrade():
+    op.execute("DROP MATERIALIZED VIEW IF EXISTS weather_daily")
+    op.execute("DROP MATERIALIZED VIEW IF EXISTS weather_hourly")
@@ -0,0 +1,35 @@
+"""Indices das ordenacoes paginadas por cursor
+
+Revision ID: 009_keyset_pagination_indexes
+Revises: 008_weather_rollups
+Create Date: 2026-10-19
+
+"""
+
+from alembic import op
+
+revision = "009_keyset_pagination_indexes"
+down_revision = "008_weather_rollups"
+branch_labels = None
+depends_on = None
+
+# (indice, tabela, colunas): filtro do tenant seguido da chave do keyset
+INDEXES = (
+    ("idx_farms_org_created_id", "farms", "organization_id, created_at, id"),
+    ("idx_plots_farm_created_id", "plots", "farm_id, created_at, id"),
+    ("idx_sensors_org_created_id", "sensors", "organization_id, created_at, id"),
+    ("idx_users_org_created_id", "users", "organization_id, created_at, id"),
+    ("idx_alerts_org_timestamp_id", "alerts", "organization_id, timestamp DESC, id DESC"),
+    ("idx_events_org_timestamp_id", "events", "organization_id, timestamp DESC, id DESC"),
+    ("idx_events_org_created_id", "events", "organization_id, created_at DESC, id DESC"),
+)
+
+
+def upgrade():
+    for name, table, columns in INDEXES:
+        op.execute(f"CREATE INDEX IF NOT EXISTS {name} ON {table} ({columns})")
+
+
+def downgrade():
+    for name, _, _ in reversed(INDEXES):
+        op.execute(f"DROP INDEX IF EXISTS {name}")
@@ -0,0 +1,55 @@
+"""Tabela de jobs em background
+
+Revision ID: 010_background_jobs
+Revises: 009_keyset_pagination_indexes
+Create Date: 2026-10-19
+
+"""
+
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+from alembic import op
+
+revision = "010_background_jobs"
+down_revision = "009_keyset_pagination_indexes"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "background_jobs",
+        sa.Column("id", postgresql.UUID(as_uuid=True), primary_key=True),
+        sa.Column("type", sa.String(50), nullable=False),
+        sa.Column(
+            "organization_id",
+            postgresql.UUID(as_uuid=True),
+            sa.ForeignKey("organizations.id", ondelete="CASCADE"),
+        ),
+        sa.Column("params", postgresql.JSONB, nullable=False, server_default="{}"),
+        sa.Column("status", sa.String(20), nullable=False, server_default="queued"),
+        sa.Column("result", postgresql.JSONB),
+        sa.Column("error", sa.Text),
+        sa.Column(
+            "created_by",
+            postgresql.UUID(as_uuid=True),
+            sa.ForeignKey("users.id", ondelete="SET NULL"),
+        ),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.Column("started_at", sa.DateTime(timezone=True)),
+        sa.Column("finished_at", sa.DateTime(timezone=True)),
+    )
+    # Fila: apenas jobs pendentes ou em execucao
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS idx_background_jobs_pending "
+        "ON background_jobs (created_at) WHERE status IN ('queued', 'running')"
+    )
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS idx_background_jobs_type_created "
+        "ON background_jobs (type, created_at DESC)"
+    )
+
+
+def downgrade():
+    op.drop_table("background_jobs")
@@ -0,0 +1,43 @@
+"""Modelos de previsao de producao por talhao
+
+Revision ID: 011_plot_yield_forecasts
+Revises: 010_background_jobs
+Create Date: 2026-10-19
+
+"""
+
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+from alembic import op
+
+revision = "011_plot_yield_forecasts"
+down_revision = "010_background_jobs"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "plot_yield_forecasts",
+        sa.Column("id", postgresql.UUID(as_uuid=True), primary_key=True),
+        sa.Column(
+            "plot_id",
+            postgresql.UUID(as_uuid=True),
+            sa.ForeignKey("plots.id", ondelete="CASCADE"),
+            nullable=False,
+        ),
+        sa.Column("model", sa.String(20), nullable=False, server_default="linear"),
+        sa.Column("fitted_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.Column("base_date", sa.Date, nullable=False),
+        sa.Column("observations", sa.Integer, nullable=False),
+        sa.Column("slope_kg_per_day", sa.Numeric(12, 4), nullable=False),
+        sa.Column("intercept_kg", sa.Numeric(12, 2), nullable=False),
+        sa.Column("residual_std_kg", sa.Numeric(12, 4)),
+        sa.Column("curve", postgresql.JSONB, nullable=False, server_default="[]"),
+        sa.UniqueConstraint("plot_id", name="plot_yield_forecasts_plot_id_key"),
+    )
+
+
+def downgrade():
+    op.drop_table("plot_yield_forecasts")
@@ -0,0 +1,27 @@
+"""Indice dos alertas abertos pelas regras de alerta
+
+Revision ID: 012_alert_rule_evaluation
+Revises: 011_plot_yield_forecasts
+Create Date: 2026-10-19
+
+"""
+
+from alembic import op
+
+revision = "012_alert_rule_evaluation"
+down_revision = "011_plot_yield_forecasts"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Um alerta aberto por (regra, talhao); tambem atende a busca dos abertos
+    op.execute("""
+        CREATE UNIQUE INDEX IF NOT EXISTS idx_alerts_open_rule_plot
+        ON alerts (source_id, plot_id)
+        WHERE source = 'alert_rule' AND resolved_at IS NULL
+    """)
+
+
+def downgrade():
+    op.execute("DROP INDEX IF EXISTS idx_alerts_open_rule_plot")
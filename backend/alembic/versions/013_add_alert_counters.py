@@ -0,0 +1,182 @@
+"""Contadores de alertas abertos mantidos por trigger
+
+Revision ID: 013_alert_counters
+Revises: 012_alert_rule_evaluation
+Create Date: 2026-10-19
+
+"""
+
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+from alembic import op
+
+revision = "013_alert_counters"
+down_revision = "012_alert_rule_evaluation"
+branch_labels = None
+depends_on = None
+
+# Chave dos contadores: farm_id/plot_id nulos viram o UUID zero
+NIL = "'00000000-0000-0000-0000-000000000000'::uuid"
+
+CREATE_SCOPE_INDEX = f"""
+    CREATE UNIQUE INDEX uq_alert_counters_scope ON alert_counters (
+        organization_id, (COALESCE(farm_id, {NIL})), (COALESCE(plot_id, {NIL})),
+        category, severity
+    )
+"""
+
+CREATE_APPLY_FUNCTION = f"""
+    CREATE OR REPLACE FUNCTION alert_counters_apply(
+        p_org uuid, p_farm uuid, p_plot uuid, p_category text, p_severity text,
+        p_open integer, p_unack integer
+    ) RETURNS void AS $$
+    BEGIN
+        IF p_open = 0 AND p_unack = 0 THEN
+            RETURN;
+        END IF;
+        UPDATE alert_counters
+        SET open_count = open_count + p_open,
+            unacknowledged_count = unacknowledged_count + p_unack,
+            updated_at = now()
+        WHERE organization_id = p_org
+          AND COALESCE(farm_id, {NIL}) = COALESCE(p_farm, {NIL})
+          AND COALESCE(plot_id, {NIL}) = COALESCE(p_plot, {NIL})
+          AND category = p_category
+          AND severity = p_severity;
+        -- Decrementos nunca criam linhas (a fazenda pode estar sendo removida)
+        IF NOT FOUND AND p_open >= 0 AND p_unack >= 0 THEN
+            INSERT INTO alert_counters (
+                organization_id, farm_id, plot_id, category, severity,
+                open_count, unacknowledged_count
+            )
+            VALUES (p_org, p_farm, p_plot, p_category, p_severity, p_open, p_unack)
+            ON CONFLICT (
+                organization_id, (COALESCE(farm_id, {NIL})), (COALESCE(plot_id, {NIL})),
+                category, severity
+            )
+            DO UPDATE SET
+                open_count = alert_counters.open_count + EXCLUDED.open_count,
+                unacknowledged_count =
+                    alert_counters.unacknowledged_count + EXCLUDED.unacknowledged_count,
+                updated_at = now();
+        END IF;
+    END;
+    $$ LANGUAGE plpgsql
+"""
+
+CREATE_TRIGGER_FUNCTION = """
+    CREATE OR REPLACE FUNCTION alerts_maintain_counters() RETURNS trigger AS $$
+    DECLARE
+        old_open integer := 0;
+        old_unack integer := 0;
+        new_open integer := 0;
+        new_unack integer := 0;
+    BEGIN
+        IF TG_OP IN ('UPDATE', 'DELETE') AND OLD.resolved_at IS NULL THEN
+            old_open := 1;
+            old_unack := (OLD.acknowledged_at IS NULL)::integer;
+        END IF;
+        IF TG_OP IN ('INSERT', 'UPDATE') AND NEW.resolved_at IS NULL THEN
+            new_open := 1;
+            new_unack := (NEW.acknowledged_at IS NULL)::integer;
+        END IF;
+
+        IF TG_OP = 'UPDATE'
+            AND NEW.organization_id = OLD.organization_id
+            AND NEW.farm_id IS NOT DISTINCT FROM OLD.farm_id
+            AND NEW.plot_id IS NOT DISTINCT FROM OLD.plot_id
+            AND NEW.category = OLD.category
+            AND NEW.severity = OLD.severity
+        THEN
+            PERFORM alert_counters_apply(
+                NEW.organization_id, NEW.farm_id, NEW.plot_id, NEW.category, NEW.severity,
+                new_open - old_open, new_unack - old_unack
+            );
+            RETURN NULL;
+        END IF;
+
+        IF old_open > 0 THEN
+            PERFORM alert_counters_apply(
+                OLD.organization_id, OLD.farm_id, OLD.plot_id, OLD.category, OLD.severity,
+                -old_open, -old_unack
+            );
+        END IF;
+        IF new_open > 0 THEN
+            PERFORM alert_counters_apply(
+                NEW.organization_id, NEW.farm_id, NEW.plot_id, NEW.category, NEW.severity,
+                new_open, new_unack
+            );
+        END IF;
+        RETURN NULL;
+    END;
+    $$ LANGUAGE plpgsql
+"""
+
+CREATE_TRIGGER = """
+    CREATE TRIGGER trg_alerts_counters
+    AFTER INSERT OR DELETE OR UPDATE OF
+        organization_id, farm_id, plot_id, category, severity, acknowledged_at, resolved_at
+    ON alerts
+    FOR EACH ROW EXECUTE FUNCTION alerts_maintain_counters()
+"""
+
+BACKFILL = """
+    INSERT INTO alert_counters (
+        organization_id, farm_id, plot_id, category, severity,
+        open_count, unacknowledged_count
+    )
+    SELECT
+        organization_id, farm_id, plot_id, category, severity,
+        count(*), count(*) FILTER (WHERE acknowledged_at IS NULL)
+    FROM alerts
+    WHERE resolved_at IS NULL
+    GROUP BY organization_id, farm_id, plot_id, category, severity
+"""
+
+
+def upgrade():
+    op.create_table(
+        "alert_counters",
+        sa.Column(
+            "id",
+            postgresql.UUID(as_uuid=True),
+            primary_key=True,
+            server_default=sa.text("uuid_generate_v4()"),
+        ),
+        sa.Column(
+            "organization_id",
+            postgresql.UUID(as_uuid=True),
+            sa.ForeignKey("organizations.id", ondelete="CASCADE"),
+            nullable=False,
+        ),
+        # Sem FK: os contadores somem com os alertas da fazenda/talhao removidos
+        sa.Column("farm_id", postgresql.UUID(as_uuid=True)),
+        sa.Column("plot_id", postgresql.UUID(as_uuid=True)),
+        sa.Column("category", sa.String(50), nullable=False),
+        sa.Column("severity", sa.String(20), nullable=False),
+        sa.Column("open_count", sa.Integer, nullable=False, server_default="0"),
+        sa.Column("unacknowledged_count", sa.Integer, nullable=False, server_default="0"),
+        sa.Column("updated_at", sa.DateTime(timezone=True), server_default=sa.text("NOW()")),
+    )
+    op.execute(CREATE_SCOPE_INDEX)
+    op.execute(
+        "CREATE INDEX idx_alert_counters_org_farm ON alert_counters (organization_id, farm_id)"
+    )
+    op.execute(CREATE_APPLY_FUNCTION)
+    op.execute(CREATE_TRIGGER_FUNCTION)
+
+    # Bloqueia escritas em alerts entre a carga inicial e a criacao do trigger
+    op.execute("LOCK TABLE alerts IN SHARE ROW EXCLUSIVE MODE")
+    op.execute(BACKFILL)
+    op.execute(CREATE_TRIGGER)
+
+
+def downgrade():
+    op.execute("DROP TRIGGER IF EXISTS trg_alerts_counters ON alerts")
+    op.execute("DROP FUNCTION IF EXISTS alerts_maintain_counters()")
+    op.execute(
+        "DROP FUNCTION IF EXISTS "
+        "alert_counters_apply(uuid, uuid, uuid, text, text, integer, integer)"
+    )
+    op.drop_table("alert_counters")
@@ -0,0 +1,56 @@
+"""Busca textual em eventos, alertas e anotacoes
+
+Revision ID: 014_search_vectors
+Revises: 013_alert_counters
+Create Date: 2026-10-19
+
+"""
+
+from alembic import op
+
+revision = "014_search_vectors"
+down_revision = "013_alert_counters"
+branch_labels = None
+depends_on = None
+
+# Documentos de cada tabela (mesmas expressoes dos modelos)
+SEARCH_VECTORS = {
+    "events": """
+        setweight(to_tsvector('portuguese', coalesce(title, '')), 'A')
+        || setweight(to_tsvector('portuguese', coalesce(notes, '')), 'B')
+        || setweight(jsonb_to_tsvector('portuguese', coalesce(product_data, '{}')
+        || coalesce(fertilization_data, '{}'), '["string"]'), 'C')
+        || setweight(jsonb_to_tsvector('portuguese', coalesce(tags, '[]'),
+        '["string"]'), 'C')
+        || setweight(to_tsvector('portuguese', type || ' ' || coalesce(scope_name, '')
+        || ' ' || coalesce(operator, '') || ' ' || coalesce(team, '')), 'D')
+    """,
+    "alerts": """
+        setweight(to_tsvector('portuguese', title), 'A')
+        || setweight(to_tsvector('portuguese', message), 'B')
+        || setweight(to_tsvector('portuguese', coalesce(impact, '') || ' '
+        || coalesce(suggested_action, '')), 'C')
+        || setweight(to_tsvector('portuguese', category || ' ' || type || ' '
+        || coalesce(resolution_notes, '')), 'D')
+    """,
+    "notes": """
+        setweight(to_tsvector('portuguese', text), 'A')
+        || setweight(to_tsvector('portuguese', coalesce(category, '')), 'B')
+    """,
+}
+
+
+def upgrade():
+    # Coluna gerada: o Postgres recalcula o documento em todo INSERT/UPDATE
+    for table, expression in SEARCH_VECTORS.items():
+        op.execute(f"""
+            ALTER TABLE {table}
+            ADD COLUMN search_vector tsvector GENERATED ALWAYS AS ({expression}) STORED
+        """)
+        op.execute(f"CREATE INDEX idx_{table}_search ON {table} USING gin (search_vector)")
+
+
+def downgrade():
+    for table in SEARCH_VECTORS:
+        op.execute(f"DROP INDEX IF EXISTS idx_{table}_search")
+        op.drop_column(table, "search_vector")
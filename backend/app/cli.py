@@ -1,6 +1,9 @@
 """CLI commands para gerenciamento da aplicação."""
 
+import argparse
 import sys
+from datetime import datetime
+from uuid import UUID
 
 from app.core.security import get_password_hash
 from app.database import SessionLocal
@@ -43,10 +46,133 @@ def create_superuser(email: str, password: str, first_name: str | None = None):
         db.close()
 
 
+def export_readings(
+    dataset: str,
+    farm_id: UUID,
+    output: str,
+    export_format: str = "parquet",
+    start_time: datetime | None = None,
+    end_time: datetime | None = None,
+):
+    """Exporta leituras de uma fazenda para um arquivo Parquet ou Arrow IPC."""
+    from app.services.export_service import ExportService
+
+    db = SessionLocal()
+    try:
+        stmt = ExportService.build_query(
+            dataset,
+            farm_id=farm_id,
+            start_time=start_time,
+            end_time=end_time,
+        )
+        with open(output, "wb") as sink:
+            rows = ExportService(db).write_columnar(stmt, export_format, sink)
+        print(f"✅ {rows} leituras de '{dataset}' exportadas para {output}")
+        return True
+    except ImportError:
+        print("❌ Exportacao colunar requer o pacote pyarrow (uv sync --extra arrow)")
+        return False
+    except Exception as e:
+        print(f"❌ Erro ao exportar leituras: {e}")
+        return False
+    finally:
+        db.close()
+
+
+def run_export(argv: list[str]) -> bool:
+    """Interpreta os argumentos do comando export."""
+    parser = argparse.ArgumentParser(prog="python -m app.cli export")
+    parser.add_argument("dataset", choices=["soil", "vision", "weather"])
+    parser.add_argument("farm_id", type=UUID)
+    parser.add_argument("output")
+    parser.add_argument("--format", choices=["parquet", "arrow"], default="parquet")
+    parser.add_argument("--start", type=datetime.fromisoformat)
+    parser.add_argument("--end", type=datetime.fromisoformat)
+    args = parser.parse_args(argv)
+
+    return export_readings(
+        args.dataset,
+        args.farm_id,
+        args.output,
+        export_format=args.format,
+        start_time=args.start,
+        end_time=args.end,
+    )
+
+
+def provision_sensors(
+    organization_id: UUID,
+    path: str,
+    file_format: str | None = None,
+    partial: bool = False,
+    dry_run: bool = False,
+):
+    """Provisiona sensores em massa a partir de um arquivo CSV ou JSON."""
+    from app.services.sensor_provisioning_service import (
+        SensorProvisioningService,
+        parse_rows,
+    )
+
+    if file_format is None:
+        file_format = "json" if path.lower().endswith(".json") else "csv"
+
+    db = SessionLocal()
+    try:
+        with open(path, "rb") as source:
+            rows = parse_rows(source.read(), file_format)
+        result = SensorProvisioningService(db).provision(
+            organization_id,
+            rows,
+            partial=partial,
+            dry_run=dry_run,
+        )
+        for error in result.errors:
+            field = f" [{error.field}]" if error.field else ""
+            print(f"  linha {error.row}{field}: {error.message}")
+        if dry_run:
+            print(f"🔎 {result.valid_rows} de {result.total_rows} sensores validos (dry run)")
+        else:
+            print(f"✅ {result.created} de {result.total_rows} sensores criados")
+        return not result.errors
+    except Exception as e:
+        print(f"❌ Erro ao provisionar sensores: {e}")
+        db.rollback()
+        return False
+    finally:
+        db.close()
+
+
+def run_provision(argv: list[str]) -> bool:
+    """Interpreta os argumentos do comando provision-sensors."""
+    parser = argparse.ArgumentParser(prog="python -m app.cli provision-sensors")
+    parser.add_argument("organization_id", type=UUID)
+    parser.add_argument("path")
+    parser.add_argument("--format", choices=["csv", "json"])
+    parser.add_argument("--partial", action="store_true")
+    parser.add_argument("--dry-run", action="store_true")
+    args = parser.parse_args(argv)
+
+    return provision_sensors(
+        args.organization_id,
+        args.path,
+        file_format=args.format,
+        partial=args.partial,
+        dry_run=args.dry_run,
+    )
+
+
 if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == "export":
+        sys.exit(0 if run_export(sys.argv[2:]) else 1)
+    if len(sys.argv) > 1 and sys.argv[1] == "provision-sensors":
+        sys.exit(0 if run_provision(sys.argv[2:]) else 1)
+
     if len(sys.argv) < 3:
         print("Uso: python -m app.cli <email> <password> [first_name]")
         print("Exemplo: python -m app.cli admin@example.com senha123 Admin")
+        print("")
+        print("Exportacao: python -m app.cli export <soil|vision|weather> <farm_id> <arquivo>")
+        print("            [--format parquet|arrow] [--start ISO8601] [--end ISO8601]")
         sys.exit(1)
 
     email = sys.argv[1]
@@ -13,6 +13,15 @@ class Settings(BaseSettings):
     secret_key: str = "dev-secret-key-change-in-production"
     algorithm: str = "HS256"
     access_token_expire_minutes: int = 30
+    # Custo do bcrypt (hashes antigos sao refeitos no proximo login)
+    bcrypt_rounds: int = 12
+    # Threads dedicadas ao hashing de senhas por worker
+    password_hash_workers: int = 4
+    # Cache do usuario autenticado por token (0 desativa)
+    principal_cache_ttl_seconds: int = 60
+    principal_cache_max_entries: int = 10_000
+    # Cache dos ids de fazendas/talhoes/sensores por organizacao (0 desativa)
+    tenant_scope_ttl_seconds: int = 300
 
     # Application
     debug: bool = False
@@ -21,6 +30,84 @@ class Settings(BaseSettings):
     # CORS
     cors_origins: str = "http://localhost:3000,http://localhost:5173"
 
+    # Cache de respostas (memory ou redis)
+    cache_backend: str = "memory"
+    cache_max_entries: int = 2048
+    cache_ttl_seconds: int = 120
+    redis_url: str = "redis://localhost:6379/0"
+
+    # Compressao de respostas (bytes minimos para comprimir, nivel 1-9)
+    gzip_minimum_size: int = 1024
+    gzip_compress_level: int = 5
+
+    # Exportacao de leituras (linhas por lote do cursor no servidor)
+    export_batch_size: int = 5000
+    # Bytes de CSV lidos por RecordBatch na exportacao Arrow/Parquet
+    export_arrow_block_size: int = 8 * 1024 * 1024
+
+    # Ingestao HTTP de leituras (/api/ingest)
+    api_key_cache_ttl_seconds: int = 300
+    ingest_max_readings: int = 50_000
+    ingest_max_errors: int = 100
+
+    # Provisionamento de sensores em massa (linhas por arquivo)
+    provisioning_max_rows: int = 20_000
+
+    # Paginacao por cursor das listagens (itens por pagina quando ha cursor
+    # sem limit, maximo aceito e limite para trocar a contagem exata pela
+    # estimativa do planejador)
+    page_default_limit: int = 500
+    page_max_limit: int = 1000
+    page_count_estimate_threshold: int = 10_000
+
+    # Jobs em background (fila em background_jobs, um runner por worker)
+    jobs_enabled: bool = True
+    job_poll_seconds: int = 30
+    job_timeout_minutes: int = 30
+    # Dias que jobs encerrados (completed/failed) ficam na tabela
+    job_retention_days: int = 30
+    # Intervalo do job de snapshots de todas as organizacoes (0 desativa)
+    snapshot_job_interval_minutes: int = 60
+    # Ajuste noturno dos modelos de previsao: hora UTC (-1 desativa),
+    # historico usado, horizonte da curva e minimo de dias com dados
+    forecast_job_hour: int = 6
+    forecast_lookback_days: int = 120
+    forecast_horizon_days: int = 90
+    forecast_min_points: int = 3
+    # Avaliacao das regras de alerta: intervalo (0 desativa) e maior janela
+    # aceita nas condicoes
+    alert_rule_interval_minutes: int = 5
+    alert_rule_max_window_hours: int = 168
+
+    # Indice espacial por fazenda (bbox=): validade e numero maximo de
+    # indices (camada x fazenda) mantidos em memoria por worker
+    spatial_index_ttl_seconds: int = 600
+    spatial_index_max_entries: int = 512
+
+    # Raster interpolado do heatmap: celulas no maior lado (padrao e maximo)
+    # e validade no cache (descartado antes por novas leituras da fazenda)
+    heatmap_grid_size: int = 128
+    heatmap_max_grid_size: int = 512
+    heatmap_cache_ttl_seconds: int = 3600
+
+    # Tiles do mapa (/api/farms/{id}/tiles): tiles em memoria por worker e
+    # zoom maximo aceito
+    tile_cache_max_entries: int = 4096
+    tile_max_zoom: int = 22
+
+    # Reducao de pontos (max_points): leituras carregadas no maximo por serie
+    downsample_source_limit: int = 200_000
+
+    # Consulta generica de series (/api/timeseries/query)
+    timeseries_max_buckets: int = 10_000
+
+    # Eventos ao vivo (SSE): fila por cliente, keepalive e retry do EventSource
+    live_queue_size: int = 100
+    live_keepalive_seconds: int = 15
+    live_retry_ms: int = 5000
+    # Validade do token de stream (vai na URL do EventSource)
+    live_token_ttl_seconds: int = 60
+
     model_config = SettingsConfigDict(
         env_file=".env",
         env_file_encoding="utf-8",
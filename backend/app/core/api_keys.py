@@ -0,0 +1,132 @@
+"""Chaves de API de sensores para a ingestao HTTP.
+
+A coluna sensors.api_key guarda apenas o SHA-256 da chave; a chave em si e
+exibida uma unica vez, na geracao. A busca da chave usa um cache com TTL
+por hash, invalidado pelos eventos de sensor do canal de fazendas.
+"""
+
+import hashlib
+import secrets
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any
+from uuid import UUID
+
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.models.sensor import Sensor, SensorType
+
+API_KEY_PREFIX = "sk_"
+
+
+@dataclass(frozen=True, slots=True)
+class SensorIdentity:
+    """Sensor autenticado por chave de API."""
+
+    id: UUID
+    organization_id: UUID
+    farm_id: UUID | None
+    plot_id: UUID | None
+    category: str | None
+
+
+def generate_api_key() -> str:
+    """Gera uma nova chave de API aleatoria."""
+    return API_KEY_PREFIX + secrets.token_urlsafe(32)
+
+
+def hash_api_key(api_key: str) -> str:
+    """Hash armazenado em sensors.api_key."""
+    return hashlib.sha256(api_key.encode("utf-8")).hexdigest()
+
+
+def load_sensor_identity(db: Session, key_hash: str) -> SensorIdentity | None:
+    """Busca o sensor ativo dono da chave."""
+    row = (
+        db.query(
+            Sensor.id,
+            Sensor.organization_id,
+            Sensor.farm_id,
+            Sensor.plot_id,
+            SensorType.category,
+        )
+        .join(SensorType, SensorType.id == Sensor.sensor_type_id)
+        .filter(
+            Sensor.api_key == key_hash,
+            Sensor.is_active.is_(True),
+            Sensor.deleted_at.is_(None),
+        )
+        .first()
+    )
+    if row is None:
+        return None
+    return SensorIdentity(
+        id=row.id,
+        organization_id=row.organization_id,
+        farm_id=row.farm_id,
+        plot_id=row.plot_id,
+        category=row.category,
+    )
+
+
+class ApiKeyCache:
+    """Cache com TTL das identidades de sensor, chaveado pelo hash da chave."""
+
+    def __init__(self, ttl: int):
+        self.ttl = ttl
+        self._entries: dict[str, tuple[float, SensorIdentity]] = {}
+        self._lock = threading.Lock()
+
+    def resolve(self, db: Session, api_key: str) -> SensorIdentity | None:
+        """Retorna o sensor da chave, consultando o banco se necessario."""
+        key_hash = hash_api_key(api_key)
+        with self._lock:
+            entry = self._entries.get(key_hash)
+        if entry is not None and entry[0] > time.monotonic():
+            return entry[1]
+
+        identity = load_sensor_identity(db, key_hash)
+        if identity is not None and self.ttl > 0:
+            with self._lock:
+                self._entries[key_hash] = (time.monotonic() + self.ttl, identity)
+        return identity
+
+    def invalidate_sensor(self, sensor_id: UUID | str) -> None:
+        sensor_id = str(sensor_id)
+        with self._lock:
+            for key_hash in [
+                key for key, (_, identity) in self._entries.items()
+                if str(identity.id) == sensor_id
+            ]:
+                del self._entries[key_hash]
+
+    def invalidate_organization(self, organization_id: UUID | str) -> None:
+        organization_id = str(organization_id)
+        with self._lock:
+            for key_hash in [
+                key for key, (_, identity) in self._entries.items()
+                if str(identity.organization_id) == organization_id
+            ]:
+                del self._entries[key_hash]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def handle_farm_event(self, event: dict[str, Any]) -> None:
+        """Callback do canal de eventos de fazenda."""
+        event_type = event.get("type")
+        if event_type == "resync":
+            self.clear()
+        elif event_type == "sensor":
+            if event.get("sensor_id"):
+                self.invalidate_sensor(event["sensor_id"])
+            elif event.get("organization_id"):
+                self.invalidate_organization(event["organization_id"])
+        elif event_type == "organization" and event.get("organization_id"):
+            self.invalidate_organization(event["organization_id"])
+
+
+api_key_cache = ApiKeyCache(ttl=settings.api_key_cache_ttl_seconds)
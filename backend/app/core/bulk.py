@@ -0,0 +1,101 @@
+"""Insercao em massa via COPY ... FROM STDIN.
+
+As linhas sao serializadas em CSV em memoria e enviadas em um unico COPY
+pela conexao da sessao, dentro da transacao corrente (o commit fica a cargo
+de quem chama). copy_rows_ignore_conflicts passa por uma tabela temporaria
+para descartar linhas que violariam a chave primaria (reenvios).
+"""
+
+import csv
+import io
+from collections.abc import Iterable, Sequence
+from datetime import date, datetime
+from typing import Any
+from uuid import UUID
+
+import orjson
+from sqlalchemy.orm import Session
+
+# Marcador de NULL no CSV (distingue NULL de string vazia)
+NULL = r"\N"
+
+
+def _csv_value(value: Any) -> Any:
+    if value is None:
+        return NULL
+    if isinstance(value, bool):
+        return "t" if value else "f"
+    if isinstance(value, (dict, list)):
+        return orjson.dumps(value).decode()
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, UUID):
+        return str(value)
+    return value
+
+
+def _csv_buffer(rows: Iterable[Sequence[Any]]) -> tuple[io.StringIO, int]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator="\n")
+    count = 0
+    for row in rows:
+        writer.writerow([_csv_value(value) for value in row])
+        count += 1
+    buffer.seek(0)
+    return buffer, count
+
+
+def copy_rows(
+    db: Session,
+    table: str,
+    columns: Sequence[str],
+    rows: Iterable[Sequence[Any]],
+) -> int:
+    """Insere as linhas na tabela com COPY. Retorna o total de linhas."""
+    buffer, count = _csv_buffer(rows)
+    if count == 0:
+        return 0
+
+    column_list = ", ".join(columns)
+    raw_connection = db.connection().connection
+    with raw_connection.cursor() as cursor:
+        cursor.copy_expert(
+            f"COPY {table} ({column_list}) FROM STDIN WITH (FORMAT csv, NULL '{NULL}')",
+            buffer,
+        )
+    return count
+
+
+def copy_rows_ignore_conflicts(
+    db: Session,
+    table: str,
+    columns: Sequence[str],
+    rows: Iterable[Sequence[Any]],
+) -> tuple[int, int]:
+    """Insere com COPY ignorando conflitos de chave (ON CONFLICT DO NOTHING).
+
+    Retorna (linhas enviadas, linhas inseridas).
+    """
+    buffer, count = _csv_buffer(rows)
+    if count == 0:
+        return 0, 0
+
+    staging = f"_staging_{table}"
+    column_list = ", ".join(columns)
+    raw_connection = db.connection().connection
+    with raw_connection.cursor() as cursor:
+        cursor.execute(
+            f"CREATE TEMP TABLE IF NOT EXISTS {staging} "
+            f"(LIKE {table} INCLUDING DEFAULTS) ON COMMIT DELETE ROWS"
+        )
+        cursor.copy_expert(
+            f"COPY {staging} ({column_list}) FROM STDIN WITH (FORMAT csv, NULL '{NULL}')",
+            buffer,
+        )
+        cursor.execute(
+            f"INSERT INTO {table} ({column_list}) "
+            f"SELECT {column_list} FROM {staging} ON CONFLICT DO NOTHING"
+        )
+        inserted = cursor.rowcount
+        cursor.execute(f"TRUNCATE {staging}")
+    return count, inserted
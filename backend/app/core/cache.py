@@ -0,0 +1,286 @@
+"""Cache de respostas dos endpoints de dashboard.
+
+As entradas sao chaveadas por tenant + parametros, expiram por TTL, sao
+descartadas por LRU quando o cache enche e invalidadas quando chegam novas
+leituras, snapshots ou alertas da fazenda (ver app.core.pubsub).
+
+O backend em memoria e local ao processo; para compartilhar o cache entre
+workers configure CACHE_BACKEND=redis.
+"""
+
+import hashlib
+import json
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict, defaultdict
+from typing import Any
+from uuid import UUID
+
+from fastapi.encoders import jsonable_encoder
+
+from app.config import settings
+
+GLOBAL_TAG = "global"
+
+
+def farm_tag(farm_id: UUID | str) -> str:
+    return f"farm:{farm_id}"
+
+
+def org_tag(organization_id: UUID | str) -> str:
+    return f"org:{organization_id}"
+
+
+class CacheBackend(ABC):
+    """Interface dos backends de cache."""
+
+    @abstractmethod
+    def get(self, key: str) -> Any | None:
+        """Retorna o valor ou None se ausente/expirado."""
+
+    @abstractmethod
+    def set(self, key: str, value: Any, ttl: int, tags: list[str]) -> None:
+        """Armazena um valor associado as tags informadas."""
+
+    @abstractmethod
+    def invalidate_tags(self, tags: list[str]) -> int:
+        """Remove todas as entradas associadas as tags. Retorna o total removido."""
+
+    @abstractmethod
+    def clear(self) -> None:
+        """Remove todas as entradas."""
+
+    @abstractmethod
+    def size(self) -> int:
+        """Numero de entradas armazenadas."""
+
+    def take_evictions(self) -> int:
+        """Retorna e zera o contador de remocoes por LRU."""
+        return 0
+
+
+class InMemoryCacheBackend(CacheBackend):
+    """Cache LRU com TTL local ao processo."""
+
+    def __init__(self, max_entries: int = 2048):
+        self.max_entries = max_entries
+        self._entries: OrderedDict[str, tuple[float, Any, list[str]]] = OrderedDict()
+        self._tags: dict[str, set[str]] = defaultdict(set)
+        self._evictions = 0
+        self._lock = threading.Lock()
+
+    def _remove(self, key: str) -> None:
+        _, _, tags = self._entries.pop(key)
+        for tag in tags:
+            keys = self._tags.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tags[tag]
+
+    def get(self, key: str) -> Any | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value, _ = entry
+            if expires_at < time.monotonic():
+                self._remove(key)
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: Any, ttl: int, tags: list[str]) -> None:
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (time.monotonic() + ttl, value, tags)
+            for tag in tags:
+                self._tags[tag].add(key)
+            while len(self._entries) > self.max_entries:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self._evictions += 1
+
+    def invalidate_tags(self, tags: list[str]) -> int:
+        removed = 0
+        with self._lock:
+            for tag in tags:
+                for key in list(self._tags.get(tag, ())):
+                    if key in self._entries:
+                        self._remove(key)
+                        removed += 1
+        return removed
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._tags.clear()
+
+    def size(self) -> int:
+        return len(self._entries)
+
+    def take_evictions(self) -> int:
+        with self._lock:
+            evictions, self._evictions = self._evictions, 0
+        return evictions
+
+
+class RedisCacheBackend(CacheBackend):
+    """Cache compartilhado entre workers via Redis.
+
+    A remocao por LRU fica a cargo do Redis (maxmemory-policy allkeys-lru).
+    """
+
+    prefix = "respcache:"
+
+    def __init__(self, url: str):
+        import redis  # dependencia opcional
+
+        self._client = redis.Redis.from_url(url)
+
+    def get(self, key: str) -> Any | None:
+        raw = self._client.get(self.prefix + key)
+        return json.loads(raw) if raw is not None else None
+
+    def set(self, key: str, value: Any, ttl: int, tags: list[str]) -> None:
+        pipe = self._client.pipeline()
+        pipe.set(self.prefix + key, json.dumps(value), ex=ttl)
+        for tag in tags:
+            pipe.sadd(self.prefix + "tag:" + tag, key)
+            pipe.expire(self.prefix + "tag:" + tag, ttl)
+        pipe.execute()
+
+    def invalidate_tags(self, tags: list[str]) -> int:
+        removed = 0
+        for tag in tags:
+            tag_key = self.prefix + "tag:" + tag
+            keys = [k.decode() for k in self._client.smembers(tag_key)]
+            if keys:
+                removed += self._client.delete(*(self.prefix + k for k in keys))
+            self._client.delete(tag_key)
+        return removed
+
+    def clear(self) -> None:
+        keys = list(self._client.scan_iter(self.prefix + "*"))
+        if keys:
+            self._client.delete(*keys)
+
+    def size(self) -> int:
+        return sum(1 for k in self._client.scan_iter(self.prefix + "*") if b":tag:" not in k)
+
+
+class ResponseCache:
+    """Cache de respostas com metricas de hit/miss por namespace."""
+
+    def __init__(self, backend: CacheBackend, ttl: int):
+        self.backend = backend
+        self.ttl = ttl
+        self._metrics: dict[str, dict[str, int]] = defaultdict(
+            lambda: {"hits": 0, "misses": 0, "sets": 0}
+        )
+        self._invalidations = 0
+        self._evictions = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def build_key(namespace: str, current_user, **params: Any) -> str:
+        """Monta a chave a partir do tenant do usuario e dos parametros."""
+        tenant = "superuser" if current_user.is_superuser else str(current_user.organization_id)
+        raw = json.dumps(params, sort_keys=True, default=str)
+        digest = hashlib.sha1(raw.encode()).hexdigest()[:16]
+        return f"{namespace}:{tenant}:{digest}"
+
+    def _count(self, key: str, field: str) -> None:
+        namespace = key.split(":", 1)[0]
+        with self._lock:
+            self._metrics[namespace][field] += 1
+
+    def get(self, key: str) -> Any | None:
+        value = self.backend.get(key)
+        self._count(key, "hits" if value is not None else "misses")
+        return value
+
+    def set(
+        self,
+        key: str,
+        value: Any,
+        farm_id: UUID | None = None,
+        organization_id: UUID | None = None,
+        ttl: int | None = None,
+    ) -> Any:
+        """Armazena a resposta ja convertida para JSON e a retorna.
+
+        A entrada e associada a fazenda consultada ou, em consultas de toda
+        a organizacao, a organizacao (ou ao escopo global para superusers).
+        """
+        if farm_id:
+            tags = [farm_tag(farm_id)]
+        elif organization_id:
+            tags = [org_tag(organization_id)]
+        else:
+            tags = [GLOBAL_TAG]
+
+        encoded = jsonable_encoder(value)
+        self.backend.set(key, encoded, ttl or self.ttl, tags)
+        self._count(key, "sets")
+        return encoded
+
+    def invalidate_farm(self, farm_id: UUID | str | None, organization_id: UUID | str | None) -> int:
+        """Invalida as entradas da fazenda e as consultas agregadas que a incluem."""
+        tags = [GLOBAL_TAG]
+        if farm_id:
+            tags.append(farm_tag(farm_id))
+        if organization_id:
+            tags.append(org_tag(organization_id))
+        removed = self.backend.invalidate_tags(tags)
+        with self._lock:
+            self._invalidations += removed
+        return removed
+
+    def handle_farm_event(self, event: dict[str, Any]) -> None:
+        """Callback do canal de eventos de fazenda."""
+        if event.get("type") == "resync":
+            self.backend.clear()
+            return
+        self.invalidate_farm(event.get("farm_id"), event.get("organization_id"))
+
+    def clear(self) -> None:
+        self.backend.clear()
+
+    def stats(self) -> dict[str, Any]:
+        """Retorna metricas de uso do cache."""
+        evictions = self.backend.take_evictions()
+        with self._lock:
+            self._evictions += evictions
+            namespaces = {name: dict(values) for name, values in self._metrics.items()}
+            invalidations = self._invalidations
+            total_evictions = self._evictions
+
+        hits = sum(m["hits"] for m in namespaces.values())
+        misses = sum(m["misses"] for m in namespaces.values())
+        for values in namespaces.values():
+            lookups = values["hits"] + values["misses"]
+            values["hit_ratio"] = round(values["hits"] / lookups, 4) if lookups else None
+
+        return {
+            "backend": type(self.backend).__name__,
+            "entries": self.backend.size(),
+            "hits": hits,
+            "misses": misses,
+            "hit_ratio": round(hits / (hits + misses), 4) if hits + misses else None,
+            "evictions": total_evictions,
+            "invalidations": invalidations,
+            "namespaces": namespaces,
+        }
+
+
+def build_backend() -> CacheBackend:
+    """Cria o backend configurado em CACHE_BACKEND."""
+    if settings.cache_backend == "redis":
+        return RedisCacheBackend(settings.redis_url)
+    return InMemoryCacheBackend(max_entries=settings.cache_max_entries)
+
+
+response_cache = ResponseCache(build_backend(), ttl=settings.cache_ttl_seconds)
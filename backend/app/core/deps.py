@@ -4,55 +4,96 @@ from typing import Annotated
 from uuid import UUID
 
 from fastapi import Depends, HTTPException, status
-from fastapi.security import OAuth2PasswordBearer
+from fastapi.security import APIKeyHeader, OAuth2PasswordBearer
 from sqlalchemy.orm import Session
 
+from app.core.api_keys import SensorIdentity, api_key_cache
+from app.core.principal import Principal, load_principal, principal_cache
 from app.core.security import verify_token
 from app.database import get_db
 from app.models.organization import User
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/auth/login")
+# Para conexões de streaming (EventSource não envia cabeçalhos)
+optional_oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/auth/login", auto_error=False)
+# Chave de API dos sensores para a ingestão HTTP
+api_key_scheme = APIKeyHeader(name="X-API-Key", auto_error=False)
 
 
-async def get_current_user(
-    token: Annotated[str, Depends(oauth2_scheme)],
-    db: Session = Depends(get_db),
-) -> User:
-    """Obtém o usuário atual a partir do token JWT."""
+def authenticate_token(db: Session, token: str | None, scope: str | None = None) -> Principal:
+    """Valida o token JWT e retorna o principal do usuário ativo.
+
+    O principal é lido do cache por subject do token; o banco só é
+    consultado quando a entrada não existe ou expirou. Tokens de stream
+    (com scope) só valem onde o mesmo escopo é exigido, e o token de login
+    não vale nesses pontos.
+    """
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Credenciais inválidas",
         headers={"WWW-Authenticate": "Bearer"},
     )
 
+    if not token:
+        raise credentials_exception
+
     payload = verify_token(token)
-    if payload is None:
+    if payload is None or payload.get("scope") != scope:
         raise credentials_exception
 
     user_id: str | None = payload.get("sub")
     if user_id is None:
         raise credentials_exception
 
+    principal = principal_cache.get(user_id)
+    if principal is None:
+        try:
+            principal = load_principal(db, UUID(user_id))
+        except ValueError:
+            raise credentials_exception from None
+        if principal is None:
+            raise credentials_exception
+        principal_cache.set(user_id, principal)
+
+    if not principal.is_active:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Usuário inativo",
+        )
+
+    return principal
+
+
+async def get_current_user(
+    token: Annotated[str, Depends(oauth2_scheme)],
+    db: Session = Depends(get_db),
+) -> Principal:
+    """Obtém o usuário atual a partir do token JWT."""
+    return authenticate_token(db, token)
+
+
+async def get_current_user_record(
+    current_user: Annotated[Principal, Depends(get_current_user)],
+    db: Session = Depends(get_db),
+) -> User:
+    """Carrega o registro completo do usuário atual (perfil, senha)."""
     user = db.query(User).filter(
-        User.id == UUID(user_id),
+        User.id == current_user.id,
         User.deleted_at.is_(None),
     ).first()
 
     if user is None:
-        raise credentials_exception
-
-    if not user.is_active:
         raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Usuário inativo",
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Credenciais inválidas",
+            headers={"WWW-Authenticate": "Bearer"},
         )
-
     return user
 
 
 async def get_current_active_user(
-    current_user: Annotated[User, Depends(get_current_user)],
-) -> User:
+    current_user: Annotated[Principal, Depends(get_current_user)],
+) -> Principal:
     """Verifica se o usuário está ativo."""
     if not current_user.is_active:
         raise HTTPException(
@@ -63,8 +104,8 @@ async def get_current_active_user(
 
 
 async def get_current_superuser(
-    current_user: Annotated[User, Depends(get_current_user)],
-) -> User:
+    current_user: Annotated[Principal, Depends(get_current_user)],
+) -> Principal:
     """Verifica se o usuário é superuser."""
     if not current_user.is_superuser:
         raise HTTPException(
@@ -75,8 +116,8 @@ async def get_current_superuser(
 
 
 async def get_current_org_owner(
-    current_user: Annotated[User, Depends(get_current_user)],
-) -> User:
+    current_user: Annotated[Principal, Depends(get_current_user)],
+) -> Principal:
     """Verifica se o usuário é owner da organização."""
     if not current_user.is_superuser and not current_user.is_org_owner:
         raise HTTPException(
@@ -86,15 +127,32 @@ async def get_current_org_owner(
     return current_user
 
 
+async def get_api_key_sensor(
+    api_key: Annotated[str | None, Depends(api_key_scheme)],
+    db: Session = Depends(get_db),
+) -> SensorIdentity:
+    """Obtém o sensor autenticado pelo cabeçalho X-API-Key."""
+    sensor = api_key_cache.resolve(db, api_key) if api_key else None
+    if sensor is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Chave de API inválida",
+            headers={"WWW-Authenticate": "ApiKey"},
+        )
+    return sensor
+
+
 def get_organization_id(
-    current_user: Annotated[User, Depends(get_current_user)],
+    current_user: Annotated[Principal, Depends(get_current_user)],
 ) -> UUID | None:
     """Obtém o ID da organização do usuário atual."""
     return current_user.organization_id
 
 
 # Type aliases para uso nas rotas
-CurrentUser = Annotated[User, Depends(get_current_user)]
-CurrentActiveUser = Annotated[User, Depends(get_current_active_user)]
-CurrentSuperuser = Annotated[User, Depends(get_current_superuser)]
-CurrentOrgOwner = Annotated[User, Depends(get_current_org_owner)]
+CurrentUser = Annotated[Principal, Depends(get_current_user)]
+CurrentUserRecord = Annotated[User, Depends(get_current_user_record)]
+CurrentActiveUser = Annotated[Principal, Depends(get_current_active_user)]
+CurrentSuperuser = Annotated[Principal, Depends(get_current_superuser)]
+CurrentOrgOwner = Annotated[Principal, Depends(get_current_org_owner)]
+ApiKeySensor = Annotated[SensorIdentity, Depends(get_api_key_sensor)]
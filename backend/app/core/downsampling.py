@@ -0,0 +1,91 @@
+"""Reducao de series temporais para graficos.
+
+Implementa Largest-Triangle-Three-Buckets (LTTB), que preserva a forma
+visual da serie, e min/max por bucket, que preserva picos e vales. Ambos
+retornam indices dos pontos escolhidos, em ordem crescente de tempo.
+"""
+
+from collections.abc import Sequence
+from typing import Any
+
+import numpy as np
+
+DOWNSAMPLE_METHODS = ("lttb", "minmax")
+
+
+def lttb_indices(x: np.ndarray, y: np.ndarray, max_points: int) -> np.ndarray:
+    """Seleciona max_points indices com LTTB (x crescente)."""
+    n = len(x)
+    if max_points >= n or max_points < 3:
+        return np.arange(n)
+
+    # Pontos internos divididos em max_points - 2 buckets nao vazios
+    edges = np.linspace(1, n - 1, max_points - 1).astype(np.int64)
+    starts, ends = edges[:-1], edges[1:]
+    counts = ends - starts
+
+    # Media de cada bucket; o ponto "c" do bucket i e a media do bucket i + 1
+    avg_x = np.add.reduceat(x[: n - 1], starts) / counts
+    avg_y = np.add.reduceat(y[: n - 1], starts) / counts
+    next_x = np.append(avg_x[1:], x[-1])
+    next_y = np.append(avg_y[1:], y[-1])
+
+    selected = np.empty(max_points, dtype=np.int64)
+    selected[0], selected[-1] = 0, n - 1
+    a = 0
+    for i, (start, end) in enumerate(zip(starts, ends, strict=True)):
+        ax, ay = x[a], y[a]
+        area = np.abs(
+            (ax - next_x[i]) * (y[start:end] - ay) - (ax - x[start:end]) * (next_y[i] - ay)
+        )
+        a = start + int(np.argmax(area))
+        selected[i + 1] = a
+    return selected
+
+
+def minmax_indices(x: np.ndarray, y: np.ndarray, max_points: int) -> np.ndarray:
+    """Seleciona o minimo e o maximo de cada bucket (ate max_points indices)."""
+    n = len(x)
+    if max_points >= n or max_points < 2:
+        return np.arange(n)
+
+    buckets = np.arange(n) * (max_points // 2) // n
+    order = np.lexsort((y, buckets))
+    ordered_buckets = buckets[order]
+    firsts = np.flatnonzero(np.diff(ordered_buckets, prepend=-1))
+    lasts = np.append(firsts[1:] - 1, n - 1)
+    return np.unique(np.concatenate((order[firsts], order[lasts])))
+
+
+def downsample(x: np.ndarray, y: np.ndarray, max_points: int, method: str = "lttb") -> np.ndarray:
+    """Retorna os indices dos pontos a manter (x crescente, sem NaN)."""
+    if method == "minmax":
+        return minmax_indices(x, y, max_points)
+    return lttb_indices(x, y, max_points)
+
+
+def downsample_rows(
+    rows: Sequence[Any],
+    value_attr: str,
+    max_points: int,
+    method: str = "lttb",
+    time_attr: str = "time",
+) -> list[Any]:
+    """Reduz uma lista de leituras pela serie do atributo informado.
+
+    Leituras sem valor no atributo sao descartadas. A ordem original das
+    linhas e preservada.
+    """
+    if not rows:
+        return []
+
+    times = np.fromiter(
+        (getattr(row, time_attr).timestamp() for row in rows), dtype=np.float64, count=len(rows)
+    )
+    values = np.array([getattr(row, value_attr) for row in rows], dtype=np.float64)
+
+    valid = np.flatnonzero(~np.isnan(values))
+    valid = valid[np.argsort(times[valid], kind="stable")]
+    keep = valid[downsample(times[valid], values[valid], max_points, method)]
+
+    return [rows[i] for i in np.sort(keep)]
@@ -0,0 +1,55 @@
+"""ETags fortes e GET condicional para endpoints consultados por polling.
+
+O ETag e derivado de marcadores de versao baratos (max updated_at, ultima
+leitura, contagens) do escopo consultado, e nao do payload. Assim uma
+requisicao com If-None-Match igual recebe 304 sem executar as consultas
+pesadas nem serializar a resposta.
+"""
+
+import hashlib
+import json
+from typing import Any
+
+from fastapi import Request, Response, status
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+CACHE_CONTROL = "private, no-cache"
+
+
+def fetch_markers(db: Session, *markers) -> tuple:
+    """Executa os marcadores de versao (scalar subqueries) em uma unica consulta."""
+    return tuple(db.execute(select(*markers)).one())
+
+
+def compute_etag(namespace: str, current_user, params: dict[str, Any], markers: tuple) -> str:
+    """Calcula um ETag forte a partir do tenant, parametros e marcadores."""
+    tenant = "superuser" if current_user.is_superuser else str(current_user.organization_id)
+    raw = json.dumps([namespace, tenant, params, markers], sort_keys=True, default=str)
+    return '"' + hashlib.sha256(raw.encode()).hexdigest()[:32] + '"'
+
+
+def _matches(if_none_match: str | None, etag: str) -> bool:
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    candidates = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+    return etag in candidates
+
+
+def conditional_response(request: Request, response: Response, etag: str) -> Response | None:
+    """Retorna 304 se o cliente ja possui a versao atual.
+
+    Caso contrario define o ETag na resposta e retorna None para que a rota
+    continue o processamento normalmente.
+    """
+    if _matches(request.headers.get("if-none-match"), etag):
+        return Response(
+            status_code=status.HTTP_304_NOT_MODIFIED,
+            headers={"ETag": etag, "Cache-Control": CACHE_CONTROL},
+        )
+
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = CACHE_CONTROL
+    return None
@@ -0,0 +1,78 @@
+"""Sparse fieldsets (parametro fields=) para as rotas de leitura.
+
+Com fields=id,name a consulta carrega apenas essas colunas (load_only; as
+demais, como os JSONB extra_data/location/configuration, ficam adiadas e
+nao sao lidas do Postgres) e a resposta e serializada com um schema
+reduzido, gerado uma vez por combinacao de campos e mantido em cache.
+"""
+
+from dataclasses import dataclass
+from functools import lru_cache
+
+from fastapi import HTTPException, Response, status
+from pydantic import BaseModel, ConfigDict, TypeAdapter, create_model
+from sqlalchemy import inspect
+from sqlalchemy.orm import load_only
+
+from app.core.responses import serialize_response
+
+
+@lru_cache(maxsize=256)
+def partial_schema(schema: type[BaseModel], fields: tuple[str, ...]) -> type[BaseModel]:
+    """Schema com apenas os campos escolhidos (mesmos tipos e defaults)."""
+    definitions = {
+        name: (schema.model_fields[name].annotation, schema.model_fields[name])
+        for name in fields
+    }
+    return create_model(
+        f"{schema.__name__}Partial",
+        __config__=ConfigDict(from_attributes=True),
+        **definitions,
+    )
+
+
+@lru_cache(maxsize=256)
+def partial_adapter(schema: type[BaseModel], fields: tuple[str, ...]) -> TypeAdapter:
+    return TypeAdapter(list[partial_schema(schema, fields)])
+
+
+@dataclass(frozen=True)
+class FieldSet:
+    """Campos pedidos pelo cliente para um schema de resposta."""
+
+    schema: type[BaseModel]
+    fields: tuple[str, ...]
+
+    def apply(self, query, model, *always):
+        """Restringe as colunas carregadas (chave primaria sempre incluida).
+
+        Parametros:
+            always: Atributos usados pela rota alem da resposta (ex: chave do keyset)
+        """
+        column_attrs = inspect(model).column_attrs
+        attributes = [getattr(model, name) for name in self.fields if name in column_attrs]
+        return query.options(load_only(*attributes, *always))
+
+    @property
+    def adapter(self) -> TypeAdapter:
+        return partial_adapter(self.schema, self.fields)
+
+    def serialize(self, data, response: Response | None = None) -> Response:
+        return serialize_response(self.adapter, data, response)
+
+
+def parse_fields(fields: str | None, schema: type[BaseModel]) -> FieldSet | None:
+    """Valida o parametro fields (nomes separados por virgula) contra o schema."""
+    if not fields:
+        return None
+    requested = {name.strip() for name in fields.split(",") if name.strip()}
+    unknown = requested - schema.model_fields.keys()
+    if unknown:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Campos invalidos: {', '.join(sorted(unknown))}",
+        )
+    if not requested:
+        return None
+    # Ordem do schema: mesma chave de cache para qualquer ordem pedida
+    return FieldSet(schema, tuple(name for name in schema.model_fields if name in requested))
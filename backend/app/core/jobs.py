@@ -0,0 +1,251 @@
+"""Fila de jobs em background (tabela background_jobs).
+
+Cada worker da API roda um JobRunner: uma thread que retira jobs pendentes
+com FOR UPDATE SKIP LOCKED (um job nunca roda em dois workers), executa o
+handler registrado para o tipo e grava o resultado. Novos jobs acordam os
+runners pelo canal jobs (LISTEN/NOTIFY); sem eventos, a fila e verificada
+a cada job_poll_seconds. Jobs agendados (de todas as organizacoes) sao
+enfileirados sob um advisory lock, uma unica vez por intervalo no cluster.
+
+Um job que passa de job_timeout_minutes e marcado como falho (o worker
+pode ter caido); se o handler ainda terminar depois disso, o resultado nao
+sobrescreve esse status. Jobs encerrados ha mais de job_retention_days
+sao removidos da tabela.
+"""
+
+import logging
+import threading
+import zlib
+from collections.abc import Callable
+from datetime import datetime, timedelta, timezone
+from typing import Any
+from uuid import UUID
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.core.pubsub import publish
+from app.database import SessionLocal
+from app.models.job import BackgroundJob
+
+logger = logging.getLogger(__name__)
+
+# Canal que acorda os runners quando um job e enfileirado
+JOBS_CHANNEL = "jobs"
+
+JOB_STATUSES = ("queued", "running", "completed", "failed")
+
+Handler = Callable[[Session, BackgroundJob], dict[str, Any] | None]
+
+
+def enqueue_job(
+    db: Session,
+    job_type: str,
+    organization_id: UUID | None = None,
+    params: dict[str, Any] | None = None,
+    created_by: UUID | None = None,
+) -> BackgroundJob:
+    """Enfileira o job; um job identico ainda na fila e reaproveitado.
+
+    O commit fica a cargo de quem chama (os runners sao avisados no commit).
+    """
+    params = params or {}
+    existing = (
+        db.query(BackgroundJob)
+        .filter(
+            BackgroundJob.type == job_type,
+            BackgroundJob.organization_id == organization_id,
+            BackgroundJob.status == "queued",
+            BackgroundJob.params == params,
+        )
+        .first()
+    )
+    if existing is not None:
+        return existing
+
+    job = BackgroundJob(
+        type=job_type,
+        organization_id=organization_id,
+        params=params,
+        status="queued",
+        created_by=created_by,
+    )
+    db.add(job)
+    db.flush()
+    publish(db, JOBS_CHANNEL, {"job_id": str(job.id), "type": job_type})
+    return job
+
+
+def _lock_key(job_type: str) -> int:
+    return zlib.crc32(f"jobs:{job_type}".encode())
+
+
+class JobRunner:
+    """Executa os jobs da fila em uma thread do worker."""
+
+    def __init__(self, poll_seconds: int, timeout_minutes: int, retention_days: int):
+        self.poll_seconds = poll_seconds
+        self.timeout = timedelta(minutes=timeout_minutes)
+        self.retention = timedelta(days=retention_days)
+        self._handlers: dict[str, Handler] = {}
+        self._schedules: list[tuple[str, timedelta, dict[str, Any], int | None]] = []
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def register(self, job_type: str, handler: Handler) -> None:
+        self._handlers[job_type] = handler
+
+    def schedule(
+        self,
+        job_type: str,
+        interval: timedelta,
+        params: dict[str, Any] | None = None,
+        hour: int | None = None,
+    ) -> None:
+        """Enfileira o job (todas as organizacoes) a cada intervalo.
+
+        Parametros:
+            hour: Hora (UTC) em que o job pode ser enfileirado (ex: job noturno)
+        """
+        self._schedules.append((job_type, interval, params or {}, hour))
+
+    def wake(self, event: dict[str, Any] | None = None) -> None:
+        """Callback do canal de jobs: verifica a fila imediatamente."""
+        self._wake.set()
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="job-runner", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                self.enqueue_due()
+                while not self._stop.is_set() and self.run_next():
+                    pass
+            except Exception:
+                logger.exception("Falha no processamento da fila de jobs")
+            self._wake.wait(self.poll_seconds)
+            self._wake.clear()
+
+    def enqueue_due(self) -> None:
+        """Enfileira os jobs agendados vencidos, encerra os travados e remove os antigos."""
+        db = SessionLocal()
+        try:
+            now = datetime.now(timezone.utc)
+            # Jobs de um worker que caiu durante a execucao
+            db.execute(
+                text("""
+                    UPDATE background_jobs
+                    SET status = 'failed', error = 'Tempo limite excedido', finished_at = now()
+                    WHERE status = 'running' AND started_at < :limit
+                """),
+                {"limit": now - self.timeout},
+            )
+            db.execute(
+                text("""
+                    DELETE FROM background_jobs
+                    WHERE status IN ('completed', 'failed') AND finished_at < :limit
+                """),
+                {"limit": now - self.retention},
+            )
+            db.commit()
+
+            for job_type, interval, params, hour in self._schedules:
+                if hour is not None and now.hour != hour:
+                    continue
+                # Um unico worker decide o agendamento (lock liberado no commit)
+                locked = db.execute(
+                    text("SELECT pg_try_advisory_xact_lock(:key)"),
+                    {"key": _lock_key(job_type)},
+                ).scalar()
+                if not locked:
+                    db.rollback()
+                    continue
+                recent = (
+                    db.query(BackgroundJob.id)
+                    .filter(
+                        BackgroundJob.type == job_type,
+                        BackgroundJob.organization_id.is_(None),
+                        BackgroundJob.created_at > now - interval,
+                    )
+                    .first()
+                )
+                if recent is None:
+                    enqueue_job(db, job_type, params=params)
+                db.commit()
+        finally:
+            db.close()
+
+    def run_next(self) -> bool:
+        """Executa o proximo job da fila. Retorna False se a fila esta vazia."""
+        if not self._handlers:
+            return False
+
+        db = SessionLocal()
+        try:
+            job_id = db.execute(
+                text("""
+                    UPDATE background_jobs SET status = 'running', started_at = now()
+                    WHERE id = (
+                        SELECT id FROM background_jobs
+                        WHERE status = 'queued' AND type = ANY(:types)
+                        ORDER BY created_at
+                        LIMIT 1
+                        FOR UPDATE SKIP LOCKED
+                    )
+                    RETURNING id
+                """),
+                {"types": list(self._handlers)},
+            ).scalar()
+            db.commit()
+            if job_id is None:
+                return False
+
+            job = db.get(BackgroundJob, job_id)
+            job_type = job.type
+            try:
+                result = self._handlers[job_type](db, job)
+            except Exception as e:
+                db.rollback()
+                logger.exception("Job %s (%s) falhou", job_id, job_type)
+                outcome = {"status": "failed", "error": str(e)[:1000]}
+            else:
+                outcome = {"status": "completed", "result": result}
+
+            # So encerra o job se o watchdog nao o marcou como falho
+            finished = (
+                db.query(BackgroundJob)
+                .filter(BackgroundJob.id == job_id, BackgroundJob.status == "running")
+                .update(
+                    {**outcome, "finished_at": datetime.now(timezone.utc)},
+                    synchronize_session=False,
+                )
+            )
+            db.commit()
+            if not finished:
+                logger.warning(
+                    "Job %s (%s) terminou apos o tempo limite; status mantido", job_id, job_type
+                )
+            return True
+        finally:
+            db.close()
+
+
+job_runner = JobRunner(
+    poll_seconds=settings.job_poll_seconds,
+    timeout_minutes=settings.job_timeout_minutes,
+    retention_days=settings.job_retention_days,
+)
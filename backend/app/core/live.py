@@ -0,0 +1,77 @@
+"""Distribuicao de eventos ao vivo por fazenda (Server-Sent Events).
+
+Os eventos chegam pelo listener compartilhado de app.core.pubsub (uma
+conexao LISTEN por worker) e sao repassados, no event loop da aplicacao,
+para as filas dos clientes conectados a cada fazenda.
+"""
+
+import asyncio
+import threading
+from collections import defaultdict
+from typing import Any
+
+from app.config import settings
+
+# Tipos de evento entregues aos dashboards
+LIVE_EVENT_TYPES = {"reading", "sensor_status", "alert"}
+
+
+class LiveHub:
+    """Assinaturas por fazenda com fan-out para filas asyncio."""
+
+    def __init__(self, queue_size: int = 100):
+        self.queue_size = queue_size
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._subscribers: dict[str, set[asyncio.Queue]] = defaultdict(set)
+        self._lock = threading.Lock()
+
+    def bind(self, loop: asyncio.AbstractEventLoop) -> None:
+        """Define o event loop que recebe os eventos (no startup)."""
+        self._loop = loop
+
+    def subscribe(self, farm_id: str) -> asyncio.Queue:
+        """Cria a fila de um cliente da fazenda."""
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.queue_size)
+        with self._lock:
+            self._subscribers[farm_id].add(queue)
+        return queue
+
+    def unsubscribe(self, farm_id: str, queue: asyncio.Queue) -> None:
+        """Remove a fila de um cliente."""
+        with self._lock:
+            queues = self._subscribers.get(farm_id)
+            if queues is not None:
+                queues.discard(queue)
+                if not queues:
+                    del self._subscribers[farm_id]
+
+    def subscriber_count(self) -> int:
+        with self._lock:
+            return sum(len(queues) for queues in self._subscribers.values())
+
+    def handle_farm_event(self, event: dict[str, Any]) -> None:
+        """Callback do canal de eventos (chamado fora do event loop)."""
+        if self._loop is None or self._loop.is_closed():
+            return
+        if event.get("type") != "resync" and event.get("type") not in LIVE_EVENT_TYPES:
+            return
+        self._loop.call_soon_threadsafe(self._fan_out, event)
+
+    def _fan_out(self, event: dict[str, Any]) -> None:
+        with self._lock:
+            if event.get("type") == "resync":
+                targets = [q for queues in self._subscribers.values() for q in queues]
+            else:
+                targets = list(self._subscribers.get(event.get("farm_id") or "", ()))
+
+        for queue in targets:
+            try:
+                queue.put_nowait(event)
+            except asyncio.QueueFull:
+                # Cliente lento: descarta a fila e pede que recarregue o estado
+                while not queue.empty():
+                    queue.get_nowait()
+                queue.put_nowait({"type": "resync"})
+
+
+live_hub = LiveHub(queue_size=settings.live_queue_size)
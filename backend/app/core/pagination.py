@@ -0,0 +1,172 @@
+"""Paginacao por keyset (cursor) para as rotas de listagem.
+
+A ordenacao usa uma chave indexada terminada na chave primaria, e a pagina
+seguinte e buscada com uma comparacao de tupla (col, id) > (valor, id)
+sobre o ultimo item, sem OFFSET. O cursor e opaco (base64 do nome da
+ordenacao e dos valores do ultimo item) e vai nos cabecalhos X-Next-Cursor
+e Link, mantendo o corpo da resposta como lista.
+
+O total (X-Total-Count) e opcional: abaixo de um limite e exato; acima,
+usa a estimativa do planejador (EXPLAIN), sinalizada por
+X-Total-Count-Estimated.
+"""
+
+import base64
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Annotated, Any
+from uuid import UUID
+
+import orjson
+from fastapi import Depends, HTTPException, Query, Request, Response, status
+from sqlalchemy import func, inspect, tuple_
+from sqlalchemy.orm import Query as ORMQuery
+
+from app.config import settings
+
+PAGINATION_HEADERS = ["X-Next-Cursor", "X-Total-Count", "X-Total-Count-Estimated", "Link"]
+
+
+@dataclass(frozen=True)
+class Keyset:
+    """Ordenacao paginavel: colunas indexadas, a ultima unica (id)."""
+
+    name: str
+    columns: tuple
+    descending: bool = False
+
+    def order_by(self) -> list:
+        return [column.desc() if self.descending else column.asc() for column in self.columns]
+
+    def after(self, values: list[Any]):
+        """Condicao dos itens apos o cursor."""
+        key = tuple_(*self.columns)
+        cursor = tuple_(*values)
+        return key < cursor if self.descending else key > cursor
+
+    def values_of(self, item) -> list[Any]:
+        return [getattr(item, column.key) for column in self.columns]
+
+
+class PageParams:
+    """Parametros de paginacao comuns (dependencia das rotas)."""
+
+    def __init__(
+        self,
+        cursor: str | None = None,
+        limit: int | None = Query(default=None, ge=1, le=settings.page_max_limit),
+        include_total: bool = False,
+    ):
+        self.cursor = cursor
+        self.limit = limit
+        self.include_total = include_total
+
+
+Page = Annotated[PageParams, Depends()]
+
+
+def encode_cursor(keyset: Keyset, values: list[Any]) -> str:
+    raw = orjson.dumps([keyset.name, values], default=str)
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(keyset: Keyset, cursor: str) -> list[Any]:
+    """Valida o cursor para a ordenacao e converte os valores para as colunas."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        name, values = orjson.loads(raw)
+        if name != keyset.name or len(values) != len(keyset.columns):
+            raise ValueError
+        parsed = []
+        for column, value in zip(keyset.columns, values, strict=True):
+            python_type = column.type.python_type
+            if python_type is datetime:
+                value = datetime.fromisoformat(value)
+            elif python_type is UUID:
+                value = UUID(value)
+            parsed.append(value)
+        return parsed
+    except (ValueError, TypeError, AttributeError, orjson.JSONDecodeError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Cursor invalido",
+        ) from None
+
+
+def set_next_cursor(
+    keyset: Keyset, values: list[Any], request: Request, response: Response
+) -> None:
+    """Cabecalhos X-Next-Cursor/Link da pagina seguinte ao item com esses valores."""
+    cursor = encode_cursor(keyset, values)
+    next_url = request.url.include_query_params(cursor=cursor)
+    response.headers["X-Next-Cursor"] = cursor
+    response.headers["Link"] = f'<{next_url}>; rel="next"'
+
+
+def estimate_rows(query: ORMQuery) -> int:
+    """Linhas estimadas pelo planejador para a consulta (sem executa-la).
+
+    Estima sobre a chave primaria da entidade: joins de eager loading
+    (joinedload) multiplicariam as linhas.
+    """
+    entity = query.column_descriptions[0]["entity"]
+    statement = query.order_by(None).with_entities(*inspect(entity).primary_key).statement
+    connection = query.session.connection()
+    compiled = statement.compile(
+        dialect=connection.dialect,
+        compile_kwargs={"render_postcompile": True},
+    )
+    plan = connection.exec_driver_sql(
+        f"EXPLAIN (FORMAT JSON) {compiled}", compiled.params
+    ).scalar()
+    if isinstance(plan, str):
+        plan = orjson.loads(plan)
+    return int(plan[0]["Plan"]["Plan Rows"])
+
+
+def count_rows(query: ORMQuery) -> tuple[int, bool]:
+    """Total de linhas da consulta; retorna (total, estimado)."""
+    estimate = estimate_rows(query)
+    if estimate >= settings.page_count_estimate_threshold:
+        return estimate, True
+    total = query.order_by(None).with_entities(func.count()).scalar()
+    return total, False
+
+
+def paginate(
+    query: ORMQuery,
+    keyset: Keyset,
+    page: PageParams,
+    request: Request,
+    response: Response,
+    default_limit: int | None = None,
+) -> list:
+    """Aplica o keyset a consulta e define os cabecalhos da pagina.
+
+    Retorna os itens da pagina; X-Next-Cursor/Link so existem se houver
+    proxima pagina. Sem default_limit, a pagina so e limitada quando o
+    cliente envia cursor ou limit: a requisicao sem eles devolve a lista
+    completa, como antes da paginacao.
+    """
+    limit = page.limit or default_limit
+    if limit is None and page.cursor:
+        limit = settings.page_default_limit
+
+    if page.include_total:
+        total, estimated = count_rows(query)
+        response.headers["X-Total-Count"] = str(total)
+        if estimated:
+            response.headers["X-Total-Count-Estimated"] = "true"
+
+    if page.cursor:
+        query = query.filter(keyset.after(decode_cursor(keyset, page.cursor)))
+
+    query = query.order_by(*keyset.order_by())
+    if limit is None:
+        return query.all()
+
+    items = query.limit(limit + 1).all()
+    if len(items) > limit:
+        items = items[:limit]
+        set_next_cursor(keyset, keyset.values_of(items[-1]), request, response)
+    return items
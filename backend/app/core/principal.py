@@ -0,0 +1,159 @@
+"""Principal autenticado com cache por subject do token.
+
+Evita consultar users/roles a cada requisicao autenticada. As entradas
+expiram por TTL e sao invalidadas (em todos os workers, via
+app.core.pubsub) quando o usuario e alterado, desativado, removido, troca
+de senha ou de cargo.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any
+from uuid import UUID
+
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.core.pubsub import publish
+from app.models.organization import Role, User, UserRole
+
+# Canal com invalidacoes de principals
+AUTH_EVENTS_CHANNEL = "auth_events"
+
+
+@dataclass(frozen=True, slots=True)
+class Principal:
+    """Dados do usuario autenticado usados na autorizacao."""
+
+    id: UUID
+    organization_id: UUID | None
+    email: str
+    is_active: bool
+    is_superuser: bool
+    is_org_owner: bool
+    permissions: frozenset[str] = field(default_factory=frozenset)
+
+
+class PrincipalCache:
+    """Cache LRU com TTL de principals, chaveado pelo subject do token."""
+
+    def __init__(self, ttl: int, max_entries: int):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries: OrderedDict[str, tuple[float, Principal]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, subject: str) -> Principal | None:
+        with self._lock:
+            entry = self._entries.get(subject)
+            if entry is None:
+                return None
+            if entry[0] < time.monotonic():
+                del self._entries[subject]
+                return None
+            self._entries.move_to_end(subject)
+            return entry[1]
+
+    def set(self, subject: str, principal: Principal) -> None:
+        if self.ttl <= 0:
+            return
+        with self._lock:
+            self._entries[subject] = (time.monotonic() + self.ttl, principal)
+            self._entries.move_to_end(subject)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate_user(self, user_id: UUID | str) -> None:
+        with self._lock:
+            self._entries.pop(str(user_id), None)
+
+    def invalidate_organization(self, organization_id: UUID | str) -> None:
+        org_id = str(organization_id)
+        with self._lock:
+            for subject in [
+                key
+                for key, (_, principal) in self._entries.items()
+                if str(principal.organization_id) == org_id
+            ]:
+                del self._entries[subject]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def handle_auth_event(self, event: dict[str, Any]) -> None:
+        """Callback do canal de invalidacoes."""
+        if event.get("type") == "resync":
+            self.clear()
+        elif event.get("user_id"):
+            self.invalidate_user(event["user_id"])
+        elif event.get("organization_id"):
+            self.invalidate_organization(event["organization_id"])
+
+
+def load_principal(db: Session, user_id: UUID) -> Principal | None:
+    """Carrega usuario e permissoes dos cargos em uma unica consulta."""
+    rows = (
+        db.query(User, Role.permissions)
+        .outerjoin(UserRole, UserRole.user_id == User.id)
+        .outerjoin(Role, Role.id == UserRole.role_id)
+        .filter(
+            User.id == user_id,
+            User.deleted_at.is_(None),
+        )
+        .all()
+    )
+
+    if not rows:
+        return None
+
+    user = rows[0][0]
+    permissions: set[str] = set()
+    for _, role_permissions in rows:
+        permissions.update(role_permissions or [])
+
+    return Principal(
+        id=user.id,
+        organization_id=user.organization_id,
+        email=user.email,
+        is_active=bool(user.is_active),
+        is_superuser=bool(user.is_superuser),
+        is_org_owner=bool(user.is_org_owner),
+        permissions=frozenset(permissions),
+    )
+
+
+def invalidate_principal(
+    db: Session,
+    user_id: UUID | None = None,
+    organization_id: UUID | None = None,
+) -> None:
+    """Invalida o principal de um usuario (ou de toda a organizacao).
+
+    Remove a entrada local imediatamente e publica a invalidacao para os
+    demais workers (entregue no commit da sessao).
+    """
+    if user_id:
+        principal_cache.invalidate_user(user_id)
+    elif organization_id:
+        principal_cache.invalidate_organization(organization_id)
+    else:
+        return
+
+    publish(
+        db,
+        AUTH_EVENTS_CHANNEL,
+        {
+            "type": "principal",
+            "user_id": str(user_id) if user_id else None,
+            "organization_id": str(organization_id) if organization_id else None,
+        },
+    )
+
+
+principal_cache = PrincipalCache(
+    ttl=settings.principal_cache_ttl_seconds,
+    max_entries=settings.principal_cache_max_entries,
+)
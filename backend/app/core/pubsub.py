@@ -0,0 +1,162 @@
+"""Publicacao e escuta de eventos via Postgres LISTEN/NOTIFY.
+
+Os eventos sao publicados com pg_notify dentro da transacao corrente e so
+sao entregues apos o commit. Cada worker da API mantem uma unica conexao
+dedicada escutando os canais e despacha os eventos para os callbacks
+registrados. Fora do Postgres os eventos sao despachados localmente.
+"""
+
+import json
+import logging
+import select
+import threading
+from collections import defaultdict
+from collections.abc import Callable
+from typing import Any
+from uuid import UUID
+
+import psycopg2
+from sqlalchemy import text
+from sqlalchemy.engine import make_url
+from sqlalchemy.orm import Session
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Canal com eventos de dados por fazenda (leituras, snapshots, alertas, cadastros)
+FARM_EVENTS_CHANNEL = "farm_events"
+
+Callback = Callable[[dict[str, Any]], None]
+
+
+def _uses_postgres() -> bool:
+    return settings.database_url.startswith("postgresql")
+
+
+def _libpq_dsn() -> str:
+    """Converte a URL do SQLAlchemy para um DSN aceito pelo psycopg2."""
+    url = make_url(settings.database_url).set(drivername="postgresql")
+    return url.render_as_string(hide_password=False)
+
+
+def publish(db: Session, channel: str, payload: dict[str, Any]) -> None:
+    """Publica um evento no canal (entregue no commit da sessao)."""
+    message = json.dumps(payload, default=str)
+
+    if _uses_postgres():
+        db.execute(
+            text("SELECT pg_notify(:channel, :payload)"),
+            {"channel": channel, "payload": message},
+        )
+    else:
+        listener.dispatch(channel, json.loads(message))
+
+
+def publish_farm_event(
+    db: Session,
+    event_type: str,
+    farm_id: UUID | str | None,
+    organization_id: UUID | str | None,
+    **data: Any,
+) -> None:
+    """Publica um evento de dados de uma fazenda.
+
+    Parametros:
+        event_type: Tipo do evento (reading, snapshot, alert, plot, farm, sensor)
+        farm_id: Fazenda afetada (None para eventos de toda a organizacao)
+        organization_id: Organizacao dona da fazenda
+    """
+    publish(
+        db,
+        FARM_EVENTS_CHANNEL,
+        {
+            "type": event_type,
+            "farm_id": str(farm_id) if farm_id else None,
+            "organization_id": str(organization_id) if organization_id else None,
+            **data,
+        },
+    )
+
+
+class NotificationListener:
+    """Escuta canais do Postgres em uma thread e despacha para os callbacks."""
+
+    def __init__(self, reconnect_delay: float = 5.0):
+        self.reconnect_delay = reconnect_delay
+        self._callbacks: dict[str, list[Callback]] = defaultdict(list)
+        self._thread: threading.Thread | None = None
+        self._stop = threading.Event()
+
+    def subscribe(self, channel: str, callback: Callback) -> None:
+        """Registra um callback para um canal."""
+        if callback not in self._callbacks[channel]:
+            self._callbacks[channel].append(callback)
+
+    def unsubscribe(self, channel: str, callback: Callback) -> None:
+        """Remove um callback de um canal."""
+        if callback in self._callbacks[channel]:
+            self._callbacks[channel].remove(callback)
+
+    def dispatch(self, channel: str, payload: dict[str, Any]) -> None:
+        """Entrega um evento para os callbacks do canal."""
+        for callback in list(self._callbacks.get(channel, [])):
+            try:
+                callback(payload)
+            except Exception:
+                logger.exception("Erro ao processar evento do canal %s", channel)
+
+    def start(self) -> None:
+        """Inicia a thread de escuta (apenas com Postgres)."""
+        if not _uses_postgres() or (self._thread and self._thread.is_alive()):
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="pg-listener", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Sinaliza a thread para encerrar."""
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=self.reconnect_delay + 1)
+            self._thread = None
+
+    def _run(self) -> None:
+        connected_before = False
+        while not self._stop.is_set():
+            conn = None
+            try:
+                conn = psycopg2.connect(_libpq_dsn())
+                conn.set_isolation_level(psycopg2.extensions.ISOLATION_LEVEL_AUTOCOMMIT)
+                with conn.cursor() as cursor:
+                    for channel in list(self._callbacks):
+                        cursor.execute(f'LISTEN "{channel}"')
+                logger.info("Escutando canais: %s", ", ".join(self._callbacks))
+
+                # Eventos publicados durante a queda foram perdidos: avisa os assinantes
+                if connected_before:
+                    for channel in list(self._callbacks):
+                        self.dispatch(channel, {"type": "resync"})
+                connected_before = True
+
+                while not self._stop.is_set():
+                    if select.select([conn], [], [], 1.0) == ([], [], []):
+                        continue
+                    conn.poll()
+                    while conn.notifies:
+                        notify = conn.notifies.pop(0)
+                        try:
+                            payload = json.loads(notify.payload)
+                        except ValueError:
+                            logger.warning("Payload invalido no canal %s", notify.channel)
+                            continue
+                        self.dispatch(notify.channel, payload)
+            except Exception:
+                logger.exception("Conexao de escuta perdida, reconectando")
+                self._stop.wait(self.reconnect_delay)
+            finally:
+                if conn is not None:
+                    conn.close()
+
+
+listener = NotificationListener()
@@ -0,0 +1,71 @@
+"""Respostas JSON de alto desempenho.
+
+ORJSONResponse substitui o json.dumps padrao do Starlette pelo orjson
+(compilado) e e a classe de resposta padrao da aplicacao.
+
+Para listas grandes de objetos ORM, serialize_response valida e gera o
+JSON diretamente no pydantic-core com um TypeAdapter pre-construido (ver
+app.schemas.serializers), sem passar pelo jsonable_encoder nem por
+dicionarios intermediarios.
+"""
+
+from decimal import Decimal
+from typing import Any
+
+import orjson
+from fastapi import Response
+from fastapi.responses import JSONResponse
+from pydantic import TypeAdapter
+
+# Cabecalhos calculados pelo Starlette para o novo corpo
+_SKIP_HEADERS = {"content-length", "content-type"}
+
+
+def json_default(value: Any) -> Any:
+    """Tipos nao suportados nativamente pelo orjson (mesma regra do jsonable_encoder)."""
+    if isinstance(value, Decimal):
+        return int(value) if value.as_tuple().exponent >= 0 else float(value)
+    if isinstance(value, set | frozenset):
+        return list(value)
+    raise TypeError(f"Tipo nao serializavel: {type(value).__name__}")
+
+
+class ORJSONResponse(JSONResponse):
+    """JSONResponse serializada com orjson."""
+
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(
+            content,
+            default=json_default,
+            option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY,
+        )
+
+
+def serialize_response(
+    adapter: TypeAdapter,
+    data: Any,
+    response: Response | None = None,
+    status_code: int = 200,
+) -> Response:
+    """Serializa objetos ORM com um TypeAdapter e retorna a resposta pronta.
+
+    Parametros:
+        adapter: TypeAdapter do schema de resposta (from_attributes)
+        data: Objeto ou lista de objetos ORM
+        response: Resposta injetada na rota; seus cabecalhos (ETag etc.) sao copiados
+        status_code: Status HTTP da resposta
+    """
+    content = adapter.dump_json(adapter.validate_python(data, from_attributes=True))
+    headers = None
+    if response is not None:
+        headers = {
+            key: value
+            for key, value in response.headers.items()
+            if key.lower() not in _SKIP_HEADERS
+        }
+    return Response(
+        content=content,
+        status_code=status_code,
+        headers=headers,
+        media_type="application/json",
+    )
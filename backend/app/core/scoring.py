@@ -0,0 +1,355 @@
+"""Motor de score de saude e status dos talhoes.
+
+Unica definicao das regras usadas na listagem de talhoes, no resumo da
+fazenda e nos snapshots de producao. As faixas de cada cultura (perfis)
+sao compiladas uma vez em arrays; o calculo recebe colunas com a ultima
+leitura de solo e de visao de cada talhao e avalia todos os talhoes de
+uma vez com numpy.
+
+Regras (limites do perfil da cultura):
+    - sem leitura de solo: status offline e score 50
+    - umidade, pH e temperatura fora da faixa de alerta: warning; fora da
+      faixa critica: critical
+    - pragas, falhas de irrigacao ou estresse hidrico moderado: warning;
+      estresse hidrico alto: critical
+    - score: 100 menos penalidades por metrica fora da faixa ideal/toleravel,
+      pragas, irrigacao e estresse; NDVI alto soma e NDVI baixo subtrai
+
+Em relacao as funcoes antigas da listagem de talhoes (calculate_plot_status
+e calculate_health_score), o estresse hidrico passou a valer tambem ali:
+estresse moderado (acima de 40%) agora gera warning, e o score perde 10
+pontos com estresse moderado e 20 com estresse alto (acima de 70%). Antes
+a listagem so marcava critical acima de 70% (e so se nao houvesse pragas
+nem falhas de irrigacao, que retornavam warning antes) e nao penalizava o
+score, entao talhoes com estresse podem mudar de status e de score em
+/api/plots.
+"""
+
+import unicodedata
+from collections.abc import Sequence
+from dataclasses import dataclass, replace
+from functools import cached_property, lru_cache
+from typing import Any
+from uuid import UUID
+
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+PLOT_STATUSES = np.array(["ok", "warning", "critical", "offline"])
+RISK_LEVELS = np.array(["baixo", "medio", "alto", "critico"])
+
+# Score de talhoes sem leitura de solo
+OFFLINE_HEALTH_SCORE = 50
+
+INF = float("inf")
+
+
+@dataclass(frozen=True)
+class MetricLimits:
+    """Faixas (min, max) de uma metrica de solo."""
+
+    warning: tuple[float, float]
+    critical: tuple[float, float]
+    ideal: tuple[float, float]
+    tolerable: tuple[float, float]
+    # Penalidades no score: fora da faixa ideal / fora da toleravel
+    penalties: tuple[int, int] = (10, 25)
+
+
+@dataclass(frozen=True)
+class CropProfile:
+    """Limites de uma cultura."""
+
+    moisture: MetricLimits
+    ph: MetricLimits
+    temperature: MetricLimits
+    # Estresse hidrico (%): warning acima do primeiro, critical acima do segundo
+    water_stress: tuple[float, float] = (40, 70)
+    water_stress_penalties: tuple[int, int] = (10, 20)
+    # NDVI: bonus acima de good, penalidade abaixo de poor
+    ndvi_good: float = 0.6
+    ndvi_poor: float = 0.4
+    ndvi_bonus: int = 10
+    ndvi_penalty: int = 15
+    pests_penalty: int = 15
+    irrigation_penalty: int = 10
+    # Peso medio de um fruto (kg) para estimativa de producao
+    fruit_weight_kg: float = 0.35
+
+
+MANGA = CropProfile(
+    moisture=MetricLimits(
+        warning=(15, 30), critical=(10, 35), ideal=(18, 28), tolerable=(14, 32)
+    ),
+    ph=MetricLimits(
+        warning=(6.0, 7.5), critical=(5.5, 8.0), ideal=(6.0, 7.5), tolerable=(5.5, 8.0)
+    ),
+    temperature=MetricLimits(
+        warning=(15, 35), critical=(-INF, 40), ideal=(18, 32), tolerable=(15, 38),
+        penalties=(10, 20),
+    ),
+)
+
+# Chave: cultura normalizada (minusculas, sem acento, antes de " - ")
+CROP_PROFILES: dict[str, CropProfile] = {
+    "manga": MANGA,
+    "uva": replace(
+        MANGA,
+        moisture=MetricLimits(
+            warning=(12, 28), critical=(8, 35), ideal=(15, 25), tolerable=(12, 30)
+        ),
+        ph=MetricLimits(
+            warning=(5.5, 7.0), critical=(5.0, 8.0), ideal=(6.0, 7.0), tolerable=(5.5, 7.5)
+        ),
+        temperature=MetricLimits(
+            warning=(10, 35), critical=(-INF, 40), ideal=(15, 30), tolerable=(12, 35),
+            penalties=(10, 20),
+        ),
+        fruit_weight_kg=0.4,  # cacho
+    ),
+    "coco": replace(
+        MANGA,
+        moisture=MetricLimits(
+            warning=(18, 35), critical=(12, 40), ideal=(20, 32), tolerable=(16, 36)
+        ),
+        temperature=MetricLimits(
+            warning=(20, 36), critical=(-INF, 42), ideal=(22, 34), tolerable=(18, 38),
+            penalties=(10, 20),
+        ),
+        fruit_weight_kg=1.5,
+    ),
+    "mamao": replace(MANGA, fruit_weight_kg=1.0),
+    "goiaba": replace(MANGA, fruit_weight_kg=0.2),
+    "acerola": replace(MANGA, fruit_weight_kg=0.01),
+    "melao": replace(
+        MANGA,
+        temperature=MetricLimits(
+            warning=(18, 35), critical=(-INF, 40), ideal=(20, 32), tolerable=(18, 36),
+            penalties=(10, 20),
+        ),
+        fruit_weight_kg=1.5,
+    ),
+}
+DEFAULT_CROP = "manga"
+
+_SOIL_METRICS = ("moisture", "ph", "temperature")
+
+# (metrica, fator abaixo da faixa, fator acima da faixa)
+_SOIL_FACTORS = (
+    ("moisture", "Umidade do solo baixa", "Umidade do solo alta"),
+    ("ph", "pH fora da faixa ideal", "pH fora da faixa ideal"),
+    ("temperature", "Temperatura baixa", "Temperatura elevada"),
+)
+
+
+@lru_cache(maxsize=256)
+def crop_key(crop_type: str | None) -> str:
+    """Normaliza o tipo de cultura ("Manga - Tommy Atkins" -> "manga")."""
+    if not crop_type:
+        return DEFAULT_CROP
+    name = crop_type.split(" - ")[0].strip().lower()
+    name = unicodedata.normalize("NFKD", name).encode("ascii", "ignore").decode()
+    return name if name in CROP_PROFILES else DEFAULT_CROP
+
+
+class _CompiledProfiles:
+    """Limites de todos os perfis em arrays indexados pelo perfil."""
+
+    def __init__(self, profiles: dict[str, CropProfile]):
+        self.keys = list(profiles)
+        self.index = {key: i for i, key in enumerate(self.keys)}
+        values = list(profiles.values())
+        self.limits: dict[str, np.ndarray] = {}
+        for metric in _SOIL_METRICS:
+            for band in ("warning", "critical", "ideal", "tolerable"):
+                bounds = np.array([getattr(getattr(p, metric), band) for p in values])
+                self.limits[f"{metric}_{band}_min"] = bounds[:, 0]
+                self.limits[f"{metric}_{band}_max"] = bounds[:, 1]
+            penalties = np.array([getattr(p, metric).penalties for p in values])
+            self.limits[f"{metric}_penalty_minor"] = penalties[:, 0]
+            self.limits[f"{metric}_penalty_major"] = penalties[:, 1]
+        stress = np.array([p.water_stress for p in values], dtype=np.float64)
+        self.limits["water_stress_warning"] = stress[:, 0]
+        self.limits["water_stress_critical"] = stress[:, 1]
+        stress_penalties = np.array([p.water_stress_penalties for p in values])
+        self.limits["water_stress_penalty_minor"] = stress_penalties[:, 0]
+        self.limits["water_stress_penalty_major"] = stress_penalties[:, 1]
+        for name in (
+            "ndvi_good",
+            "ndvi_poor",
+            "ndvi_bonus",
+            "ndvi_penalty",
+            "pests_penalty",
+            "irrigation_penalty",
+            "fruit_weight_kg",
+        ):
+            self.limits[name] = np.array([getattr(p, name) for p in values])
+
+    def for_plots(self, crop_types: Sequence[str | None]) -> dict[str, np.ndarray]:
+        """Limites de cada talhao (uma posicao por talhao)."""
+        indices = np.array([self.index[crop_key(crop)] for crop in crop_types], dtype=np.int64)
+        return {name: values[indices] for name, values in self.limits.items()}
+
+
+@lru_cache(maxsize=1)
+def compiled_profiles() -> _CompiledProfiles:
+    return _CompiledProfiles(CROP_PROFILES)
+
+
+@dataclass
+class PlotScores:
+    """Resultado do score de cada talhao (mesma ordem da entrada)."""
+
+    status: np.ndarray
+    health_score: np.ndarray
+    risk_level: np.ndarray
+    fruit_weight_kg: np.ndarray
+    # Matriz (fator, talhao) das condicoes de risco encontradas
+    factor_masks: np.ndarray
+    factor_labels: tuple[str, ...]
+
+    def __len__(self) -> int:
+        return len(self.status)
+
+    @cached_property
+    def risk_factors(self) -> list[list[str]]:
+        """Fatores de risco de cada talhao (so montados quando usados)."""
+        if not len(self):
+            return []
+        plots, factors = np.nonzero(self.factor_masks.T)
+        labels = np.array(self.factor_labels, dtype=object)[factors]
+        bounds = np.searchsorted(plots, np.arange(1, len(self)))
+        return [group.tolist() for group in np.split(labels, bounds)]
+
+
+def _column(rows: Sequence[Any], attribute: str) -> np.ndarray:
+    """Valores da leitura de cada talhao (NaN se ausente, nulo ou zero)."""
+    return np.array(
+        [
+            float(value) if (value := getattr(row, attribute, None)) else np.nan
+            for row in rows
+        ],
+        dtype=np.float64,
+    )
+
+
+def _outside(values: np.ndarray, low: np.ndarray, high: np.ndarray) -> np.ndarray:
+    return (values < low) | (values > high)
+
+
+def score_plots(
+    crop_types: Sequence[str | None],
+    soil: Sequence[Any],
+    vision: Sequence[Any],
+) -> PlotScores:
+    """Calcula status, score e fatores de risco dos talhoes.
+
+    Parametros:
+        crop_types: Cultura de cada talhao (perfil padrao se desconhecida)
+        soil / vision: Ultima leitura de cada talhao (None se nao houver);
+            linhas ORM ou Row com as colunas usadas
+    """
+    n = len(crop_types)
+    limits = compiled_profiles().for_plots(crop_types)
+    has_soil = np.array([row is not None for row in soil], dtype=bool)
+
+    severity = np.zeros(n, dtype=np.int64)
+    health = np.full(n, 100, dtype=np.int64)
+    factors: list[tuple[np.ndarray, str]] = []
+
+    for metric, low_factor, high_factor in _SOIL_FACTORS:
+        values = _column(soil, metric)
+        below = values < limits[f"{metric}_warning_min"]
+        above = values > limits[f"{metric}_warning_max"]
+        critical = _outside(
+            values, limits[f"{metric}_critical_min"], limits[f"{metric}_critical_max"]
+        )
+        severity = np.maximum(severity, np.where(critical, 2, (below | above).astype(np.int64)))
+        if low_factor == high_factor:
+            factors.append((below | above, low_factor))
+        else:
+            factors += [(below, low_factor), (above, high_factor)]
+
+        present = ~np.isnan(values)
+        not_ideal = present & _outside(
+            values, limits[f"{metric}_ideal_min"], limits[f"{metric}_ideal_max"]
+        )
+        not_tolerable = present & _outside(
+            values, limits[f"{metric}_tolerable_min"], limits[f"{metric}_tolerable_max"]
+        )
+        health -= np.where(
+            not_tolerable,
+            limits[f"{metric}_penalty_major"],
+            np.where(not_ideal, limits[f"{metric}_penalty_minor"], 0),
+        )
+
+    pests = np.array([bool(getattr(row, "pests_detected", False)) for row in vision], dtype=bool)
+    irrigation = np.array(
+        [(getattr(row, "irrigation_failures", 0) or 0) > 0 for row in vision], dtype=bool
+    )
+    stress = _column(vision, "water_stress_level")
+    stress_high = stress > limits["water_stress_critical"]
+    stress_moderate = ~stress_high & (stress > limits["water_stress_warning"])
+    ndvi = _column(vision, "ndvi")
+
+    severity = np.maximum(severity, (pests | irrigation | stress_moderate).astype(np.int64))
+    severity = np.maximum(severity, stress_high * 2)
+    factors += [
+        (stress_high, "Estresse hidrico alto"),
+        (stress_moderate, "Estresse hidrico moderado"),
+        (pests, "Pragas detectadas"),
+        (irrigation, "Falhas de irrigacao"),
+    ]
+
+    health += np.where(ndvi >= limits["ndvi_good"], limits["ndvi_bonus"], 0)
+    health -= np.where(ndvi < limits["ndvi_poor"], limits["ndvi_penalty"], 0)
+    health -= pests * limits["pests_penalty"] + irrigation * limits["irrigation_penalty"]
+    health -= np.where(
+        stress_high,
+        limits["water_stress_penalty_major"],
+        np.where(stress_moderate, limits["water_stress_penalty_minor"], 0),
+    )
+    health = np.where(has_soil, np.clip(health, 0, 100), OFFLINE_HEALTH_SCORE)
+
+    status = PLOT_STATUSES[np.where(has_soil, severity, 3)]
+
+    masks = np.array([mask for mask, _ in factors]).reshape(len(factors), n)
+    risk_count = masks.sum(axis=0)
+    risk_index = np.select(
+        [(risk_count >= 3) | (severity == 2), risk_count >= 2, risk_count >= 1],
+        [3, 2, 1],
+        default=0,
+    )
+
+    return PlotScores(
+        status=status,
+        health_score=health,
+        risk_level=RISK_LEVELS[risk_index],
+        fruit_weight_kg=limits["fruit_weight_kg"],
+        factor_masks=masks,
+        factor_labels=tuple(label for _, label in factors),
+    )
+
+
+def latest_by_plot(db: Session, entity, plot_ids: Sequence[UUID], *columns) -> dict:
+    """Ultima leitura de cada talhao (DISTINCT ON plot_id).
+
+    Parametros:
+        entity: Modelo com plot_id e time (SoilReading, VisionData)
+        columns: Colunas a carregar (padrao: a linha ORM completa)
+    """
+    if not plot_ids:
+        return {}
+    if columns:
+        statement = select(entity.plot_id, *columns)
+    else:
+        statement = select(entity)
+    statement = (
+        statement.where(entity.plot_id.in_(plot_ids))
+        .order_by(entity.plot_id, entity.time.desc())
+        .distinct(entity.plot_id)
+    )
+    if columns:
+        return {row.plot_id: row for row in db.execute(statement)}
+    return {row.plot_id: row for row in db.execute(statement).scalars()}
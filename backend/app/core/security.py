@@ -1,5 +1,7 @@
 """Funções de segurança - hashing e JWT."""
 
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta, timezone
 from typing import Any
 
@@ -12,6 +14,13 @@ from app.config import settings
 ALGORITHM = settings.algorithm
 ACCESS_TOKEN_EXPIRE_MINUTES = settings.access_token_expire_minutes
 
+# bcrypt é intencionalmente lento (~250 ms no custo 12): nas rotas async o
+# hashing roda neste pool limitado, fora do event loop
+_password_executor = ThreadPoolExecutor(
+    max_workers=settings.password_hash_workers,
+    thread_name_prefix="password-hash",
+)
+
 
 def create_access_token(data: dict[str, Any], expires_delta: timedelta | None = None) -> str:
     """Cria um token JWT de acesso."""
@@ -25,6 +34,18 @@ def create_access_token(data: dict[str, Any], expires_delta: timedelta | None =
     return encoded_jwt
 
 
+def create_stream_token(user_id: str, scope: str) -> str:
+    """Cria um token curto restrito a um stream (EventSource nao envia cabecalhos).
+
+    O token vai na URL e acaba em logs de proxy: vale por
+    live_token_ttl_seconds e so e aceito onde o escopo e exigido.
+    """
+    return create_access_token(
+        {"sub": user_id, "scope": scope},
+        timedelta(seconds=settings.live_token_ttl_seconds),
+    )
+
+
 def verify_token(token: str) -> dict[str, Any] | None:
     """Verifica e decodifica um token JWT."""
     try:
@@ -59,10 +80,33 @@ def get_password_hash(password: str) -> str:
         raise ValueError("A senha deve ser uma string")
     
     password_bytes = password.encode("utf-8")
-    salt = bcrypt.gensalt()
+    salt = bcrypt.gensalt(rounds=settings.bcrypt_rounds)
     hashed = bcrypt.hashpw(password_bytes, salt)
     
     # Garante que o resultado é uma string UTF-8 válida
     if isinstance(hashed, bytes):
         return hashed.decode("utf-8")
     return str(hashed)
+
+
+def password_needs_rehash(hashed_password: str) -> bool:
+    """Indica se o hash foi gerado com um custo diferente do configurado."""
+    try:
+        # Formato: $2b$<custo>$<salt+hash>
+        return int(hashed_password.split("$")[2]) != settings.bcrypt_rounds
+    except (AttributeError, IndexError, ValueError):
+        return False
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """Verifica a senha no pool de hashing, sem bloquear o event loop."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        _password_executor, verify_password, plain_password, hashed_password
+    )
+
+
+async def get_password_hash_async(password: str) -> str:
+    """Gera o hash da senha no pool de hashing, sem bloquear o event loop."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_password_executor, get_password_hash, password)
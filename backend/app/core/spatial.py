@@ -0,0 +1,260 @@
+"""Indice espacial em memoria para consultas por viewport (bbox=).
+
+As geometrias (Sensor.location, Plot.coordinates, Tree.coordinates) sao
+JSONB sem indice no Postgres. Cada worker mantem, por fazenda e camada, um
+indice em grade: os retangulos envolventes dos itens ficam em arrays numpy
+e os itens de cada celula em um layout CSR (ordem + deslocamentos). Uma
+consulta visita apenas as celulas que cruzam o bbox e testa os candidatos
+de forma vetorizada. O indice e descartado pelos eventos farm/plot/sensor
+do canal de fazendas e reconstruido na proxima consulta.
+"""
+
+import math
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any
+from uuid import UUID
+
+import numpy as np
+from fastapi import HTTPException, status
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.models.farm import Plot, Tree
+from app.models.sensor import Sensor
+
+SPATIAL_LAYERS = ("sensors", "plots", "trees")
+
+# Eventos que alteram geometrias de uma fazenda
+GEOMETRY_EVENT_TYPES = {"farm", "plot", "sensor", "tree", "organization"}
+
+# Itens por celula desejados na grade
+_ITEMS_PER_CELL = 16
+_MAX_CELLS_PER_SIDE = 256
+
+
+@dataclass(frozen=True)
+class BBox:
+    """Retangulo em graus (longitude, latitude)."""
+
+    min_lng: float
+    min_lat: float
+    max_lng: float
+    max_lat: float
+
+
+def parse_bbox(bbox: str | None) -> BBox | None:
+    """Valida o parametro bbox=min_lng,min_lat,max_lng,max_lat."""
+    if not bbox:
+        return None
+    try:
+        min_lng, min_lat, max_lng, max_lat = (float(part) for part in bbox.split(","))
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="bbox invalido (use min_lng,min_lat,max_lng,max_lat)",
+        ) from None
+    if not (
+        -180 <= min_lng <= max_lng <= 180
+        and -90 <= min_lat <= max_lat <= 90
+    ):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="bbox invalido (use min_lng,min_lat,max_lng,max_lat)",
+        )
+    return BBox(min_lng, min_lat, max_lng, max_lat)
+
+
+def geometry_bounds(value: dict | None) -> tuple[float, float, float, float] | None:
+    """Retangulo (min_lng, min_lat, max_lng, max_lat) de uma geometria JSONB.
+
+    Aceita polygon ([[lat, lng], ...]), lat/lng e latitude/longitude.
+    """
+    if not isinstance(value, dict):
+        return None
+    try:
+        polygon = value.get("polygon")
+        if polygon and len(polygon) >= 3:
+            lats = [float(point[0]) for point in polygon]
+            lngs = [float(point[1]) for point in polygon]
+            return min(lngs), min(lats), max(lngs), max(lats)
+        lat = value.get("lat", value.get("latitude"))
+        lng = value.get("lng", value.get("longitude"))
+        if lat is None or lng is None:
+            return None
+        lat, lng = float(lat), float(lng)
+        return lng, lat, lng, lat
+    except (TypeError, ValueError, IndexError):
+        return None
+
+
+class GridIndex:
+    """Grade uniforme sobre os retangulos dos itens de uma camada."""
+
+    def __init__(self, ids: list[UUID], bounds: np.ndarray):
+        self.ids = np.array(ids, dtype=object)
+        self.bounds = bounds.reshape(-1, 4)
+        n = len(ids)
+        if n == 0:
+            self.origin = np.zeros(2)
+            self.cell = np.ones(2)
+            self.shape = (1, 1)
+            self.order = np.zeros(0, dtype=np.int64)
+            self.offsets = np.zeros(2, dtype=np.int64)
+            return
+
+        low = self.bounds[:, :2].min(axis=0)
+        high = self.bounds[:, 2:].max(axis=0)
+        side = min(max(int(math.sqrt(n / _ITEMS_PER_CELL)), 1), _MAX_CELLS_PER_SIDE)
+        self.origin = low
+        self.cell = np.maximum((high - low) / side, 1e-9)
+        self.shape = (side, side)
+
+        first = self._cells(self.bounds[:, :2])
+        last = self._cells(self.bounds[:, 2:])
+        items, cells = [], []
+        single = (first == last).all(axis=1)
+        items.append(np.flatnonzero(single))
+        cells.append(first[single, 1] * side + first[single, 0])
+        # Itens que cobrem mais de uma celula (poligonos grandes)
+        for i in np.flatnonzero(~single):
+            xs = np.arange(first[i, 0], last[i, 0] + 1)
+            ys = np.arange(first[i, 1], last[i, 1] + 1)
+            grid = (ys[:, None] * side + xs[None, :]).ravel()
+            items.append(np.full(len(grid), i))
+            cells.append(grid)
+        items = np.concatenate(items)
+        cells = np.concatenate(cells)
+        by_cell = np.argsort(cells, kind="stable")
+        self.order = items[by_cell]
+        self.offsets = np.searchsorted(cells[by_cell], np.arange(side * side + 1))
+
+    def _cells(self, points: np.ndarray) -> np.ndarray:
+        cells = np.floor((points - self.origin) / self.cell).astype(np.int64)
+        return np.clip(cells, 0, np.array(self.shape) - 1)
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def query(self, bbox: BBox) -> list[UUID]:
+        """Ids dos itens cujo retangulo cruza o bbox."""
+        if not len(self):
+            return []
+        (x0, y0), (x1, y1) = self._cells(
+            np.array([[bbox.min_lng, bbox.min_lat], [bbox.max_lng, bbox.max_lat]])
+        )
+        side = self.shape[0]
+        slices = [
+            self.order[self.offsets[row * side + x0]:self.offsets[row * side + x1 + 1]]
+            for row in range(y0, y1 + 1)
+        ]
+        candidates = np.unique(np.concatenate(slices))
+        b = self.bounds[candidates]
+        hit = (
+            (b[:, 0] <= bbox.max_lng)
+            & (b[:, 2] >= bbox.min_lng)
+            & (b[:, 1] <= bbox.max_lat)
+            & (b[:, 3] >= bbox.min_lat)
+        )
+        return self.ids[candidates[hit]].tolist()
+
+
+def load_geometries(db: Session, layer: str, farm_id: UUID) -> list[tuple[UUID, Any]]:
+    """Ids e geometria JSONB dos itens ativos da camada na fazenda."""
+    if layer == "sensors":
+        return db.query(Sensor.id, Sensor.location).filter(
+            Sensor.farm_id == farm_id, Sensor.deleted_at.is_(None)
+        ).all()
+    if layer == "plots":
+        return db.query(Plot.id, Plot.coordinates).filter(
+            Plot.farm_id == farm_id, Plot.deleted_at.is_(None)
+        ).all()
+    return (
+        db.query(Tree.id, Tree.coordinates)
+        .join(Plot, Plot.id == Tree.plot_id)
+        .filter(Plot.farm_id == farm_id, Plot.deleted_at.is_(None))
+        .all()
+    )
+
+
+def build_index(db: Session, layer: str, farm_id: UUID) -> GridIndex:
+    ids, bounds = [], []
+    for item_id, geometry in load_geometries(db, layer, farm_id):
+        box = geometry_bounds(geometry)
+        if box is not None:
+            ids.append(item_id)
+            bounds.append(box)
+    return GridIndex(ids, np.array(bounds, dtype=np.float64))
+
+
+class SpatialIndexCache:
+    """Indices por (camada, fazenda), com TTL e limite de fazendas (LRU)."""
+
+    def __init__(self, ttl: int, max_entries: int):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries: OrderedDict[tuple[str, str], tuple[float, GridIndex]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, db: Session, layer: str, farm_id: UUID) -> GridIndex:
+        key = (layer, str(farm_id))
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > time.monotonic():
+                self._entries.move_to_end(key)
+                return entry[1]
+
+        index = build_index(db, layer, farm_id)
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, index)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return index
+
+    def query(self, db: Session, layer: str, farm_id: UUID, bbox: BBox) -> list[UUID]:
+        """Ids da camada na fazenda que cruzam o bbox."""
+        return self.get(db, layer, farm_id).query(bbox)
+
+    def invalidate(self, farm_id: UUID | str | None) -> None:
+        """Descarta os indices de uma fazenda (None descarta todos)."""
+        with self._lock:
+            if farm_id is None:
+                self._entries.clear()
+                return
+            for layer in SPATIAL_LAYERS:
+                self._entries.pop((layer, str(farm_id)), None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def handle_farm_event(self, event: dict[str, Any]) -> None:
+        """Callback do canal de eventos de fazenda."""
+        if event.get("type") == "resync":
+            self.clear()
+        elif event.get("type") in GEOMETRY_EVENT_TYPES:
+            self.invalidate(event.get("farm_id"))
+
+
+def bbox_filter(
+    db: Session, query, column, layer: str, farm_id: UUID | None, bbox: str | None
+):
+    """Restringe a query aos itens visiveis no bbox (exige farm_id)."""
+    box = parse_bbox(bbox)
+    if box is None:
+        return query
+    if farm_id is None:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="bbox requer farm_id",
+        )
+    return query.filter(column.in_(spatial_indexes.query(db, layer, farm_id, box)))
+
+
+spatial_indexes = SpatialIndexCache(
+    ttl=settings.spatial_index_ttl_seconds,
+    max_entries=settings.spatial_index_max_entries,
+)
@@ -0,0 +1,133 @@
+"""Escopo de tenant com os ids acessiveis por organizacao.
+
+Resolve, e mantem em cache por organizacao, os conjuntos de fazendas,
+talhoes e sensores ativos. As rotas filtram por esses conjuntos de chaves
+primarias em vez de refazer o join com farms a cada requisicao. O cache e
+invalidado pelos eventos farm/plot/sensor do canal de fazendas (em todos os
+workers) e, no proprio worker, logo apos o commit dos cadastros.
+"""
+
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any
+from uuid import UUID
+
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.models.farm import Farm, Plot
+from app.models.sensor import Sensor
+
+# Eventos que alteram o conjunto de entidades de uma organizacao
+SCOPE_EVENT_TYPES = {"farm", "plot", "sensor", "organization"}
+
+
+@dataclass(frozen=True, slots=True)
+class TenantScope:
+    """Ids ativos acessiveis por um usuario (superuser acessa tudo)."""
+
+    organization_id: UUID | None
+    farm_ids: frozenset[UUID] = frozenset()
+    plot_ids: frozenset[UUID] = frozenset()
+    sensor_ids: frozenset[UUID] = frozenset()
+    unrestricted: bool = False
+
+    def has_farm(self, farm_id: UUID | None) -> bool:
+        return self.unrestricted or farm_id in self.farm_ids
+
+    def has_plot(self, plot_id: UUID | None) -> bool:
+        return self.unrestricted or plot_id in self.plot_ids
+
+    def has_sensor(self, sensor_id: UUID | None) -> bool:
+        return self.unrestricted or sensor_id in self.sensor_ids
+
+    def restrict(self, query, column, ids: frozenset[UUID]):
+        """Filtra a query pela coluna de chave (sem efeito para superuser)."""
+        if self.unrestricted:
+            return query
+        return query.filter(column.in_(ids))
+
+
+UNRESTRICTED_SCOPE = TenantScope(organization_id=None, unrestricted=True)
+
+
+def load_tenant_scope(db: Session, organization_id: UUID) -> TenantScope:
+    """Carrega do banco os ids ativos da organizacao."""
+    farm_ids = frozenset(
+        row.id
+        for row in db.query(Farm.id).filter(
+            Farm.organization_id == organization_id,
+            Farm.deleted_at.is_(None),
+        )
+    )
+    plot_ids = frozenset(
+        row.id
+        for row in db.query(Plot.id).filter(
+            Plot.farm_id.in_(farm_ids),
+            Plot.deleted_at.is_(None),
+        )
+    ) if farm_ids else frozenset()
+    sensor_ids = frozenset(
+        row.id
+        for row in db.query(Sensor.id).filter(
+            Sensor.organization_id == organization_id,
+            Sensor.deleted_at.is_(None),
+        )
+    )
+    return TenantScope(
+        organization_id=organization_id,
+        farm_ids=farm_ids,
+        plot_ids=plot_ids,
+        sensor_ids=sensor_ids,
+    )
+
+
+class TenantScopeCache:
+    """Cache com TTL dos escopos, chaveado pela organizacao."""
+
+    def __init__(self, ttl: int):
+        self.ttl = ttl
+        self._entries: dict[str, tuple[float, TenantScope]] = {}
+        self._lock = threading.Lock()
+
+    def resolve(self, db: Session, current_user) -> TenantScope:
+        """Retorna o escopo do usuario, carregando-o se necessario."""
+        if current_user.is_superuser:
+            return UNRESTRICTED_SCOPE
+        if current_user.organization_id is None:
+            return TenantScope(organization_id=None)
+
+        key = str(current_user.organization_id)
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry is not None and entry[0] > time.monotonic():
+            return entry[1]
+
+        scope = load_tenant_scope(db, current_user.organization_id)
+        if self.ttl > 0:
+            with self._lock:
+                self._entries[key] = (time.monotonic() + self.ttl, scope)
+        return scope
+
+    def invalidate(self, organization_id: UUID | str | None) -> None:
+        """Descarta o escopo de uma organizacao (None descarta todos)."""
+        with self._lock:
+            if organization_id is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(str(organization_id), None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def handle_farm_event(self, event: dict[str, Any]) -> None:
+        """Callback do canal de eventos de fazenda."""
+        if event.get("type") == "resync":
+            self.clear()
+        elif event.get("type") in SCOPE_EVENT_TYPES:
+            self.invalidate(event.get("organization_id"))
+
+
+tenant_scopes = TenantScopeCache(ttl=settings.tenant_scope_ttl_seconds)
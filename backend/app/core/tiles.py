@@ -0,0 +1,151 @@
+"""Tiles XYZ (Web Mercator) em PNG e cache de tiles por fazenda.
+
+O PNG e montado direto com zlib + struct (RGBA 8 bits, filtro 0), sem
+dependencia de bibliotecas de imagem. Os tiles renderizados ficam em um
+LRU local ao processo chaveado por (fazenda, camada, z, x, y, versao). A
+versao de dados de cada fazenda e incrementada pelos eventos do canal de
+fazendas (leituras, cadastros), o que descarta os tiles da fazenda e
+impede que um tile renderizado com dados antigos volte a ser servido.
+"""
+
+import math
+import struct
+import threading
+import zlib
+from collections import OrderedDict, defaultdict
+from typing import Any
+
+import numpy as np
+
+from app.config import settings
+
+TILE_SIZE = 256
+
+_PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+
+
+def _png_chunk(tag: bytes, data: bytes) -> bytes:
+    return (
+        struct.pack(">I", len(data))
+        + tag
+        + data
+        + struct.pack(">I", zlib.crc32(tag + data) & 0xFFFFFFFF)
+    )
+
+
+def encode_png(rgba: np.ndarray, level: int = 6) -> bytes:
+    """Codifica uma imagem altura x largura x 4 (uint8) em PNG RGBA."""
+    height, width, _ = rgba.shape
+    raw = np.zeros((height, width * 4 + 1), dtype=np.uint8)
+    raw[:, 1:] = rgba.reshape(height, width * 4)
+    header = struct.pack(">IIBBBBB", width, height, 8, 6, 0, 0, 0)
+    return (
+        _PNG_SIGNATURE
+        + _png_chunk(b"IHDR", header)
+        + _png_chunk(b"IDAT", zlib.compress(raw.tobytes(), level))
+        + _png_chunk(b"IEND", b"")
+    )
+
+
+EMPTY_TILE = encode_png(np.zeros((TILE_SIZE, TILE_SIZE, 4), dtype=np.uint8))
+
+
+def valid_tile(z: int, x: int, y: int) -> bool:
+    return 0 <= z <= settings.tile_max_zoom and 0 <= x < 2**z and 0 <= y < 2**z
+
+
+def tile_bounds(z: int, x: int, y: int) -> tuple[float, float, float, float]:
+    """Retangulo (min_lng, min_lat, max_lng, max_lat) do tile."""
+    n = 2**z
+
+    def lat(row: float) -> float:
+        return math.degrees(math.atan(math.sinh(math.pi * (1 - 2 * row / n))))
+
+    return x / n * 360 - 180, lat(y + 1), (x + 1) / n * 360 - 180, lat(y)
+
+
+def pixel_centers(z: int, x: int, y: int) -> tuple[np.ndarray, np.ndarray]:
+    """Longitudes (oeste -> leste) e latitudes (norte -> sul) dos pixels do tile."""
+    world = TILE_SIZE * 2**z
+    offsets = np.arange(TILE_SIZE) + 0.5
+    lngs = (x * TILE_SIZE + offsets) / world * 360 - 180
+    lats = np.degrees(np.arctan(np.sinh(np.pi * (1 - 2 * (y * TILE_SIZE + offsets) / world))))
+    return lngs, lats
+
+
+class TileCache:
+    """LRU de tiles (e dados de origem das camadas) por fazenda."""
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries: OrderedDict[tuple, Any] = OrderedDict()
+        self._by_farm: dict[str, set[tuple]] = defaultdict(set)
+        self._versions: dict[str, int] = defaultdict(int)
+        self._hits = 0
+        self._misses = 0
+        self._lock = threading.Lock()
+
+    def version(self, farm_id) -> int:
+        """Versao atual dos dados da fazenda (parte da chave dos tiles)."""
+        with self._lock:
+            return self._versions[str(farm_id)]
+
+    def get(self, key: tuple) -> Any | None:
+        """Busca uma entrada; key[0] e sempre o id da fazenda."""
+        with self._lock:
+            value = self._entries.get(key)
+            if value is None:
+                self._misses += 1
+                return None
+            self._hits += 1
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: tuple, value: Any) -> Any:
+        if self.max_entries <= 0:
+            return value
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            self._by_farm[key[0]].add(key)
+            while len(self._entries) > self.max_entries:
+                oldest, _ = self._entries.popitem(last=False)
+                keys = self._by_farm.get(oldest[0])
+                if keys is not None:
+                    keys.discard(oldest)
+                    if not keys:
+                        del self._by_farm[oldest[0]]
+        return value
+
+    def invalidate(self, farm_id) -> None:
+        """Nova versao de dados da fazenda (None: todas)."""
+        with self._lock:
+            farms = list(self._versions) if farm_id is None else [str(farm_id)]
+            for farm in farms:
+                self._versions[farm] += 1
+                for key in self._by_farm.pop(farm, ()):
+                    self._entries.pop(key, None)
+            if farm_id is None:
+                self._entries.clear()
+                self._by_farm.clear()
+
+    def handle_farm_event(self, event: dict[str, Any]) -> None:
+        """Callback do canal de eventos de fazenda."""
+        if event.get("type") == "resync" or not event.get("farm_id"):
+            self.invalidate(None)
+        else:
+            self.invalidate(event["farm_id"])
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "entries": len(self._entries),
+                "farms": len(self._by_farm),
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_ratio": round(self._hits / lookups, 4) if lookups else None,
+            }
+
+
+tile_cache = TileCache(max_entries=settings.tile_cache_max_entries)
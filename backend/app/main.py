@@ -1,16 +1,101 @@
 """Aplicação principal FastAPI."""
 
+import asyncio
+from contextlib import asynccontextmanager
+from datetime import timedelta
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
 
 from app.config import settings
-from app.routers import admin, alerts, analytics, auth, events, farms, plots, roles, sensors, users
+from app.core.api_keys import api_key_cache
+from app.core.cache import response_cache
+from app.core.jobs import JOBS_CHANNEL, job_runner
+from app.core.live import live_hub
+from app.core.pagination import PAGINATION_HEADERS
+from app.core.principal import AUTH_EVENTS_CHANNEL, principal_cache
+from app.core.pubsub import FARM_EVENTS_CHANNEL, listener
+from app.core.responses import ORJSONResponse
+from app.core.spatial import spatial_indexes
+from app.core.tenant import tenant_scopes
+from app.core.tiles import tile_cache
+from app.routers import (
+    admin,
+    alerts,
+    analytics,
+    auth,
+    events,
+    exports,
+    farms,
+    ingest,
+    plots,
+    roles,
+    search,
+    sensors,
+    timeseries,
+    users,
+)
+from app.services.alert_rule_service import ALERT_RULE_JOB, run_alert_rule_job
+from app.services.forecast_service import FORECAST_JOB, run_forecast_job
+from app.services.snapshot_service import SNAPSHOT_JOB, run_snapshot_job
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Inicia e encerra os servicos de background da API."""
+    # Invalida o cache de respostas quando chegam dados novos das fazendas
+    listener.subscribe(FARM_EVENTS_CHANNEL, response_cache.handle_farm_event)
+    # Descarta os ids acessiveis quando fazendas, talhoes ou sensores mudam
+    listener.subscribe(FARM_EVENTS_CHANNEL, tenant_scopes.handle_farm_event)
+    # Descarta chaves de API de sensores alterados, removidos ou com chave nova
+    listener.subscribe(FARM_EVENTS_CHANNEL, api_key_cache.handle_farm_event)
+    # Repassa leituras, status de sensores e alertas aos clientes SSE
+    live_hub.bind(asyncio.get_running_loop())
+    listener.subscribe(FARM_EVENTS_CHANNEL, live_hub.handle_farm_event)
+    # Indices espaciais (bbox) descartados quando geometrias mudam
+    listener.subscribe(FARM_EVENTS_CHANNEL, spatial_indexes.handle_farm_event)
+    # Tiles do mapa descartados quando leituras ou cadastros da fazenda mudam
+    listener.subscribe(FARM_EVENTS_CHANNEL, tile_cache.handle_farm_event)
+    # Descarta usuarios alterados em outros workers
+    listener.subscribe(AUTH_EVENTS_CHANNEL, principal_cache.handle_auth_event)
+    # Jobs em background: snapshots sob demanda e agendados
+    job_runner.register(SNAPSHOT_JOB, run_snapshot_job)
+    if settings.snapshot_job_interval_minutes > 0:
+        job_runner.schedule(
+            SNAPSHOT_JOB, timedelta(minutes=settings.snapshot_job_interval_minutes)
+        )
+    job_runner.register(FORECAST_JOB, run_forecast_job)
+    if settings.forecast_job_hour >= 0:
+        job_runner.schedule(FORECAST_JOB, timedelta(hours=23), hour=settings.forecast_job_hour)
+    job_runner.register(ALERT_RULE_JOB, run_alert_rule_job)
+    if settings.alert_rule_interval_minutes > 0:
+        job_runner.schedule(
+            ALERT_RULE_JOB, timedelta(minutes=settings.alert_rule_interval_minutes)
+        )
+    listener.subscribe(JOBS_CHANNEL, job_runner.wake)
+    listener.start()
+    if settings.jobs_enabled:
+        job_runner.start()
+    yield
+    job_runner.stop()
+    listener.stop()
+
 
 app = FastAPI(
     title="Mango Farm Monitor API",
     description="Sistema de monitoramento de fazenda de mangas",
     version="0.1.0",
     debug=settings.debug,
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse,
+)
+
+# Compressao negociada via Accept-Encoding para respostas grandes
+app.add_middleware(
+    GZipMiddleware,
+    minimum_size=settings.gzip_minimum_size,
+    compresslevel=settings.gzip_compress_level,
 )
 
 # CORS
@@ -20,6 +105,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag", *PAGINATION_HEADERS],
 )
 
 # Rotas públicas
@@ -41,6 +127,12 @@ app.include_router(sensors.router, prefix="/api/sensors", tags=["sensors"])
 app.include_router(alerts.router, prefix="/api/alerts", tags=["alerts"])
 app.include_router(events.router, prefix="/api/events", tags=["events"])
 app.include_router(analytics.router, prefix="/api/analytics", tags=["analytics"])
+app.include_router(exports.router, prefix="/api/exports", tags=["exports"])
+app.include_router(timeseries.router, prefix="/api/timeseries", tags=["timeseries"])
+app.include_router(search.router, prefix="/api/search", tags=["search"])
+
+# Ingestao de leituras por chave de API do sensor (X-API-Key)
+app.include_router(ingest.router, prefix="/api/ingest", tags=["ingest"])
 
 
 @app.get("/")
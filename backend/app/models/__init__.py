@@ -9,10 +9,11 @@ from app.models.timeseries import (
     VisionData,
     WeatherData,
 )
-from app.models.alert import Alert, AlertRule
+from app.models.alert import Alert, AlertCounter, AlertRule
 from app.models.event import Event, EventAttachment
 from app.models.note import Note
-from app.models.analytics import PlotProductionSnapshot
+from app.models.analytics import PlotProductionSnapshot, PlotYieldForecast
+from app.models.job import BackgroundJob
 
 __all__ = [
     "Organization",
@@ -31,8 +32,11 @@ __all__ = [
     "WeatherData",
     "Alert",
     "AlertRule",
+    "AlertCounter",
     "Event",
     "EventAttachment",
     "Note",
     "PlotProductionSnapshot",
+    "PlotYieldForecast",
+    "BackgroundJob",
 ]
@@ -5,15 +5,18 @@ from uuid import uuid4
 from sqlalchemy import (
     Boolean,
     Column,
+    Computed,
     DateTime,
     ForeignKey,
+    Index,
     Integer,
     String,
     Text,
     func,
+    text,
 )
-from sqlalchemy.dialects.postgresql import JSONB, UUID
-from sqlalchemy.orm import relationship
+from sqlalchemy.dialects.postgresql import JSONB, TSVECTOR, UUID
+from sqlalchemy.orm import deferred, relationship
 
 from app.database import Base
 
@@ -72,6 +75,33 @@ class Alert(Base):
         server_default=func.now(),
         onupdate=func.now(),
     )
+    # Documento da busca textual (titulo > mensagem > impacto/acao > demais campos)
+    search_vector = deferred(
+        Column(
+            TSVECTOR,
+            Computed(
+                "setweight(to_tsvector('portuguese', title), 'A')"
+                " || setweight(to_tsvector('portuguese', message), 'B')"
+                " || setweight(to_tsvector('portuguese', coalesce(impact, '') || ' '"
+                " || coalesce(suggested_action, '')), 'C')"
+                " || setweight(to_tsvector('portuguese', category || ' ' || type || ' '"
+                " || coalesce(resolution_notes, '')), 'D')",
+                persisted=True,
+            ),
+        )
+    )
+
+    __table_args__ = (
+        Index("idx_alerts_search", "search_vector", postgresql_using="gin"),
+        # Um alerta aberto por regra e talhao (avaliacao das regras)
+        Index(
+            "idx_alerts_open_rule_plot",
+            "source_id",
+            "plot_id",
+            unique=True,
+            postgresql_where=(source == "alert_rule") & resolved_at.is_(None),
+        ),
+    )
 
 
 class AlertRule(Base):
@@ -98,3 +128,44 @@ class AlertRule(Base):
         onupdate=func.now(),
     )
     created_by = Column(UUID(as_uuid=True), ForeignKey("users.id"), nullable=True)
+
+
+# UUID usado no lugar de fazenda/talhao nulos na chave dos contadores
+_NIL_UUID = text("'00000000-0000-0000-0000-000000000000'::uuid")
+
+
+class AlertCounter(Base):
+    """Contadores de alertas abertos por organizacao/fazenda/talhao/categoria/severidade.
+
+    Mantidos pelo trigger trg_alerts_counters na tabela alerts (na mesma
+    transacao da criacao, reconhecimento, resolucao ou remocao do alerta).
+    """
+
+    __tablename__ = "alert_counters"
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid4)
+    organization_id = Column(
+        UUID(as_uuid=True),
+        ForeignKey("organizations.id", ondelete="CASCADE"),
+        nullable=False,
+    )
+    farm_id = Column(UUID(as_uuid=True), nullable=True)
+    plot_id = Column(UUID(as_uuid=True), nullable=True)
+    category = Column(String(50), nullable=False)
+    severity = Column(String(20), nullable=False)
+    open_count = Column(Integer, nullable=False, default=0)
+    unacknowledged_count = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    __table_args__ = (
+        Index(
+            "uq_alert_counters_scope",
+            "organization_id",
+            func.coalesce(farm_id, _NIL_UUID),
+            func.coalesce(plot_id, _NIL_UUID),
+            "category",
+            "severity",
+            unique=True,
+        ),
+        Index("idx_alert_counters_org_farm", "organization_id", "farm_id"),
+    )
@@ -56,3 +56,27 @@ class PlotProductionSnapshot(Base):
     __table_args__ = (
         UniqueConstraint("plot_id", "snapshot_date", name="unique_plot_snapshot_date"),
     )
+
+
+class PlotYieldForecast(Base):
+    """Modelo de tendência de produção do talhão (ajustado no job noturno)."""
+
+    __tablename__ = "plot_yield_forecasts"
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid4)
+    plot_id = Column(
+        UUID(as_uuid=True),
+        ForeignKey("plots.id", ondelete="CASCADE"),
+        nullable=False,
+        unique=True,
+    )
+    model = Column(String(20), nullable=False, default="linear")
+    fitted_at = Column(DateTime(timezone=True), server_default=func.now())
+    base_date = Column(Date, nullable=False)
+    observations = Column(Integer, nullable=False)
+    # Produção estimada (kg) = intercept_kg + slope_kg_per_day * dias desde base_date
+    slope_kg_per_day = Column(Numeric(12, 4), nullable=False)
+    intercept_kg = Column(Numeric(12, 2), nullable=False)
+    residual_std_kg = Column(Numeric(12, 4))
+    # [{date, yield_kg, lower_kg, upper_kg}] do dia do ajuste até o horizonte
+    curve = Column(JSONB, nullable=False, default=[])
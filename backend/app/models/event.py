@@ -4,15 +4,17 @@ from uuid import uuid4
 
 from sqlalchemy import (
     Column,
+    Computed,
     DateTime,
     ForeignKey,
+    Index,
     Integer,
     String,
     Text,
     func,
 )
-from sqlalchemy.dialects.postgresql import JSONB, UUID
-from sqlalchemy.orm import relationship
+from sqlalchemy.dialects.postgresql import JSONB, TSVECTOR, UUID
+from sqlalchemy.orm import deferred, relationship
 
 from app.database import Base
 
@@ -69,10 +71,31 @@ class Event(Base):
         onupdate=func.now(),
     )
     deleted_at = Column(DateTime(timezone=True), nullable=True)
+    # Documento da busca textual (titulo > notas > produtos/tags > demais campos)
+    search_vector = deferred(
+        Column(
+            TSVECTOR,
+            Computed(
+                "setweight(to_tsvector('portuguese', coalesce(title, '')), 'A')"
+                " || setweight(to_tsvector('portuguese', coalesce(notes, '')), 'B')"
+                " || setweight(jsonb_to_tsvector('portuguese', coalesce(product_data, '{}')"
+                " || coalesce(fertilization_data, '{}'), '[\"string\"]'), 'C')"
+                " || setweight(jsonb_to_tsvector('portuguese', coalesce(tags, '[]'),"
+                " '[\"string\"]'), 'C')"
+                " || setweight(to_tsvector('portuguese', type || ' ' || coalesce(scope_name, '')"
+                " || ' ' || coalesce(operator, '') || ' ' || coalesce(team, '')), 'D')",
+                persisted=True,
+            ),
+        )
+    )
 
     # Relationships
     attachments = relationship("EventAttachment", back_populates="event", cascade="all, delete-orphan")
 
+    __table_args__ = (
+        Index("idx_events_search", "search_vector", postgresql_using="gin"),
+    )
+
 
 class EventAttachment(Base):
     """Anexo de evento."""
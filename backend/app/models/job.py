@@ -0,0 +1,37 @@
+"""Modelos de jobs em background."""
+
+from uuid import uuid4
+
+from sqlalchemy import (
+    Column,
+    DateTime,
+    ForeignKey,
+    String,
+    Text,
+    func,
+)
+from sqlalchemy.dialects.postgresql import JSONB, UUID
+
+from app.database import Base
+
+
+class BackgroundJob(Base):
+    """Job executado em background pelo JobRunner (ver app.core.jobs)."""
+
+    __tablename__ = "background_jobs"
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid4)
+    type = Column(String(50), nullable=False)
+    # Organizacao alvo; NULL em jobs de todas as organizacoes (agendados)
+    organization_id = Column(
+        UUID(as_uuid=True),
+        ForeignKey("organizations.id", ondelete="CASCADE"),
+    )
+    params = Column(JSONB, nullable=False, default={})
+    status = Column(String(20), nullable=False, default="queued")
+    result = Column(JSONB)
+    error = Column(Text)
+    created_by = Column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="SET NULL"))
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    started_at = Column(DateTime(timezone=True))
+    finished_at = Column(DateTime(timezone=True))
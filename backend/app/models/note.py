@@ -4,13 +4,16 @@ from uuid import uuid4
 
 from sqlalchemy import (
     Column,
+    Computed,
     DateTime,
     ForeignKey,
+    Index,
     String,
     Text,
     func,
 )
-from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.dialects.postgresql import TSVECTOR, UUID
+from sqlalchemy.orm import deferred
 
 from app.database import Base
 
@@ -60,3 +63,18 @@ class Note(Base):
         onupdate=func.now(),
     )
     deleted_at = Column(DateTime(timezone=True), nullable=True)
+    # Documento da busca textual
+    search_vector = deferred(
+        Column(
+            TSVECTOR,
+            Computed(
+                "setweight(to_tsvector('portuguese', text), 'A')"
+                " || setweight(to_tsvector('portuguese', coalesce(category, '')), 'B')",
+                persisted=True,
+            ),
+        )
+    )
+
+    __table_args__ = (
+        Index("idx_notes_search", "search_vector", postgresql_using="gin"),
+    )
@@ -56,11 +56,11 @@ class SoilReading(Base):
     )
     moisture = Column(Numeric(5, 2))
     temperature = Column(Numeric(5, 2))
-    ec = Column(Numeric(6, 3))
+    ec = Column(Numeric(10, 3))
     ph = Column(Numeric(4, 2))
-    nitrogen = Column(Numeric(6, 2))
-    phosphorus = Column(Numeric(6, 2))
-    potassium = Column(Numeric(6, 2))
+    nitrogen = Column(Numeric(10, 2))
+    phosphorus = Column(Numeric(10, 2))
+    potassium = Column(Numeric(10, 2))
     extra_data = Column(JSONB, default={})
 
 
@@ -3,10 +3,15 @@
 from datetime import datetime, timezone
 from uuid import UUID
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, File, HTTPException, Query, UploadFile, status
 from sqlalchemy.orm import Session
 
+from app.core.api_keys import api_key_cache
+from app.core.cache import response_cache
 from app.core.deps import CurrentSuperuser
+from app.core.pubsub import publish_farm_event
+from app.core.tenant import tenant_scopes
+from app.core.tiles import tile_cache
 from app.database import get_db
 from app.models.farm import Farm, Plot
 from app.models.sensor import Sensor, SensorType
@@ -16,7 +21,12 @@ from app.schemas.organization import (
     OrganizationUpdate,
     OrganizationWithOwner,
 )
-from app.schemas.sensor import SensorCreate, SensorResponse, SensorUpdate
+from app.schemas.sensor import (
+    SensorCreate,
+    SensorProvisioningResult,
+    SensorResponse,
+    SensorUpdate,
+)
 from app.schemas.sensor_type import (
     SensorTypeCreate,
     SensorTypeResponse,
@@ -25,6 +35,11 @@ from app.schemas.sensor_type import (
 from app.schemas.auth import PasswordReset
 from app.schemas.user import SuperUserCreate, UserResponse
 from app.services.organization_service import OrganizationService
+from app.services.sensor_provisioning_service import (
+    PROVISIONING_FORMATS,
+    SensorProvisioningService,
+    parse_rows,
+)
 from app.services.sensor_type_service import SensorTypeService
 from app.services.user_service import UserService
 
@@ -92,7 +107,7 @@ async def create_organization(
             detail="Email do owner já está em uso",
         )
 
-    organization, owner = org_service.create(org_data)
+    organization, owner = await org_service.create(org_data)
 
     result = OrganizationWithOwner.model_validate(organization)
     result.owner_id = owner.id
@@ -148,7 +163,7 @@ async def update_organization(
         )
 
     try:
-        updated_org = org_service.update(organization, org_data)
+        updated_org = await org_service.update(organization, org_data)
     except ValueError as e:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -183,6 +198,7 @@ async def delete_organization(
         )
 
     org_service.delete(organization)
+    tenant_scopes.invalidate(org_id)
 
 
 # ==================== Tipos de Sensor ====================
@@ -384,12 +400,72 @@ async def create_sensor(
     )
 
     db.add(sensor)
+    db.flush()  # Para obter o ID
+    publish_farm_event(db, "sensor", sensor.farm_id, organization_id, sensor_id=sensor.id)
     db.commit()
+    tenant_scopes.invalidate(organization_id)
     db.refresh(sensor)
 
     return sensor
 
 
+@router.post("/sensors/bulk", response_model=SensorProvisioningResult)
+async def provision_sensors(
+    organization_id: UUID,
+    current_user: CurrentSuperuser,
+    file: UploadFile = File(...),
+    file_format: str | None = Query(default=None, alias="format"),
+    partial: bool = False,
+    dry_run: bool = False,
+    db: Session = Depends(get_db),
+):
+    """Provisiona sensores em massa a partir de um arquivo CSV ou JSON.
+
+    Cada linha tem os campos de criacao de sensor (farm_id, plot_id,
+    sensor_type_id, name, dev_eui, ...). Todas as linhas sao validadas e o
+    resultado lista os erros por linha. Por padrao nada e inserido se houver
+    erro; com partial=true as linhas validas sao inseridas. Com dry_run=true
+    apenas valida.
+    """
+    org_service = OrganizationService(db)
+    if not org_service.get_by_id(organization_id):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Organizacao nao encontrada",
+        )
+
+    if file_format is None:
+        is_json = (file.filename or "").lower().endswith(".json") or (
+            file.content_type == "application/json"
+        )
+        file_format = "json" if is_json else "csv"
+    if file_format not in PROVISIONING_FORMATS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Formato invalido (use csv ou json)",
+        )
+
+    service = SensorProvisioningService(db)
+    try:
+        rows = parse_rows(await file.read(), file_format)
+        result = service.provision(
+            organization_id,
+            rows,
+            created_by=current_user.id,
+            partial=partial,
+            dry_run=dry_run,
+        )
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e),
+        ) from e
+
+    if result.created:
+        tenant_scopes.invalidate(organization_id)
+    return result
+
+
 @router.get("/sensors/{sensor_id}", response_model=SensorResponse)
 async def get_sensor(
     sensor_id: UUID,
@@ -442,11 +518,15 @@ async def update_sensor(
                 detail="Ja existe um sensor com este DevEUI",
             )
 
+    previous_farm_id = sensor.farm_id
     update_data = sensor_data.model_dump(exclude_unset=True)
     for field, value in update_data.items():
         setattr(sensor, field, value)
 
+    for farm_id in {previous_farm_id, sensor.farm_id}:
+        publish_farm_event(db, "sensor", farm_id, sensor.organization_id, sensor_id=sensor.id)
     db.commit()
+    api_key_cache.invalidate_sensor(sensor.id)
     db.refresh(sensor)
 
     return sensor
@@ -471,7 +551,26 @@ async def delete_sensor(
         )
 
     sensor.deleted_at = datetime.now(timezone.utc)
+    publish_farm_event(db, "sensor", sensor.farm_id, sensor.organization_id, sensor_id=sensor.id)
     db.commit()
+    tenant_scopes.invalidate(sensor.organization_id)
+    api_key_cache.invalidate_sensor(sensor.id)
+
+
+# ==================== Cache ====================
+
+
+@router.get("/cache/stats")
+async def get_cache_stats(current_user: CurrentSuperuser):
+    """Retorna metricas de hit/miss do cache de respostas e do cache de tiles."""
+    return {**response_cache.stats(), "tiles": tile_cache.stats()}
+
+
+@router.delete("/cache", status_code=status.HTTP_204_NO_CONTENT)
+async def clear_cache(current_user: CurrentSuperuser):
+    """Limpa o cache de respostas e o cache de tiles."""
+    response_cache.clear()
+    tile_cache.invalidate(None)
 
 
 # ==================== Super Users ====================
@@ -497,7 +596,7 @@ async def create_superuser(
             detail="Email já está em uso",
         )
 
-    return user_service.create_superuser(user_data)
+    return await user_service.create_superuser(user_data)
 
 
 @router.post("/users/{user_id}/reset-password")
@@ -528,6 +627,6 @@ async def admin_reset_user_password(
             detail="A senha deve ter no mínimo 8 caracteres",
         )
 
-    user_service.change_password(user, password_data.new_password)
+    await user_service.change_password(user, password_data.new_password)
 
     return {"message": "Senha redefinida com sucesso"}
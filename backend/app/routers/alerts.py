@@ -3,21 +3,48 @@
 from datetime import datetime, timezone
 from uuid import UUID
 
-from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
+from sqlalchemy import func
 from sqlalchemy.orm import Session
 
 from app.core.deps import CurrentUser
+from app.core.etag import compute_etag, conditional_response, fetch_markers
+from app.core.fields import parse_fields
+from app.core.pagination import Keyset, Page, paginate
+from app.core.pubsub import publish_farm_event
+from app.core.responses import serialize_response
 from app.database import get_db
 from app.models.alert import Alert
 from app.schemas.alert import (
     AlertAcknowledge,
+    AlertCountsResponse,
     AlertCreate,
     AlertResolve,
     AlertResponse,
 )
+from app.schemas.serializers import alerts_adapter
+from app.services.alert_counter_service import AlertCounterService
 
 router = APIRouter()
 
+ALERT_KEYSET = Keyset("alerts", (Alert.timestamp, Alert.id), descending=True)
+
+
+def publish_alert_event(db: Session, alert: Alert, action: str) -> None:
+    """Publica o delta do alerta para caches e clientes ao vivo."""
+    publish_farm_event(
+        db,
+        "alert",
+        alert.farm_id,
+        alert.organization_id,
+        action=action,
+        alert_id=alert.id,
+        plot_id=alert.plot_id,
+        category=alert.category,
+        severity=alert.severity,
+        title=alert.title,
+    )
+
 
 def get_user_alerts_query(db: Session, current_user):
     """Retorna query base para alertas do usuario."""
@@ -31,7 +58,10 @@ def get_user_alerts_query(db: Session, current_user):
 
 @router.get("/", response_model=list[AlertResponse])
 async def list_alerts(
+    request: Request,
+    response: Response,
     current_user: CurrentUser,
+    page: Page,
     db: Session = Depends(get_db),
     farm_id: UUID | None = None,
     plot_id: UUID | None = None,
@@ -39,7 +69,7 @@ async def list_alerts(
     severity: str | None = None,
     resolved: bool | None = None,
     acknowledged: bool | None = None,
-    limit: int = Query(default=100, le=500),
+    fields: str | None = None,
 ):
     """Lista alertas da organizacao.
 
@@ -50,8 +80,13 @@ async def list_alerts(
         severity: Filtrar por severidade (critical, warning, info)
         resolved: Se True, apenas resolvidos. Se False, apenas nao resolvidos
         acknowledged: Se True, apenas reconhecidos. Se False, apenas nao reconhecidos
-        limit: Numero maximo de alertas (padrao: 100, max: 500)
+        cursor / limit / include_total: Paginacao, do mais recente ao mais
+            antigo (padrao: 100 por pagina; ver app.core.pagination)
+        fields: Campos da resposta separados por virgula (ex: id,title,severity)
+
+    Suporta GET condicional via ETag/If-None-Match.
     """
+    fieldset = parse_fields(fields, AlertResponse)
     query = get_user_alerts_query(db, current_user)
 
     if farm_id:
@@ -76,7 +111,43 @@ async def list_alerts(
     elif acknowledged is False:
         query = query.filter(Alert.acknowledged_at.is_(None))
 
-    return query.order_by(Alert.timestamp.desc()).limit(limit).all()
+    markers = fetch_markers(
+        db,
+        query.with_entities(func.count(Alert.id)).scalar_subquery(),
+        query.with_entities(func.max(Alert.updated_at)).scalar_subquery(),
+    )
+    etag = compute_etag("alerts", current_user, dict(request.query_params), markers)
+    not_modified = conditional_response(request, response, etag)
+    if not_modified:
+        return not_modified
+
+    if fieldset:
+        query = fieldset.apply(query, Alert, *ALERT_KEYSET.columns)
+    alerts = paginate(query, ALERT_KEYSET, page, request, response, default_limit=100)
+    adapter = fieldset.adapter if fieldset else alerts_adapter
+    return serialize_response(adapter, alerts, response)
+
+
+@router.get("/counts", response_model=AlertCountsResponse)
+async def get_alert_counts(
+    current_user: CurrentUser,
+    db: Session = Depends(get_db),
+    farm_id: UUID | None = None,
+    plot_id: UUID | None = None,
+):
+    """Totais de alertas abertos e nao reconhecidos.
+
+    Le os contadores mantidos pelo banco (ver AlertCounterService) em vez de
+    contar os alertas.
+
+    Parametros:
+        farm_id: Filtrar por fazenda
+        plot_id: Filtrar por talhao
+    """
+    organization_id = None if current_user.is_superuser else current_user.organization_id
+    return AlertCounterService(db).counts(
+        organization_id=organization_id, farm_id=farm_id, plot_id=plot_id
+    )
 
 
 @router.get("/{alert_id}", response_model=AlertResponse)
@@ -128,6 +199,8 @@ async def create_alert(
         timestamp=datetime.now(timezone.utc),
     )
     db.add(alert)
+    db.flush()  # Para obter o ID
+    publish_alert_event(db, alert, "created")
     db.commit()
     db.refresh(alert)
     return alert
@@ -152,6 +225,7 @@ async def acknowledge_alert(
 
     alert.acknowledged_at = datetime.now(timezone.utc)
     alert.acknowledged_by = current_user.id
+    publish_alert_event(db, alert, "acknowledged")
     db.commit()
     db.refresh(alert)
 
@@ -179,6 +253,7 @@ async def resolve_alert(
     alert.resolved_by = current_user.id
     if data and data.resolution_notes:
         alert.resolution_notes = data.resolution_notes
+    publish_alert_event(db, alert, "resolved")
     db.commit()
     db.refresh(alert)
 
@@ -3,16 +3,23 @@
 from datetime import date, datetime, timedelta, timezone
 from uuid import UUID
 
+import numpy as np
 from fastapi import APIRouter, Depends, HTTPException, Query, status
 from sqlalchemy.orm import Session
 
+from app.core.cache import response_cache
 from app.core.deps import CurrentUser
+from app.core.downsampling import DOWNSAMPLE_METHODS
+from app.core.downsampling import downsample as downsample_series
+from app.core.jobs import enqueue_job
+from app.core.pubsub import publish_farm_event
+from app.core.tenant import tenant_scopes
 from app.database import get_db
-from app.models.alert import Alert
 from app.models.analytics import PlotProductionSnapshot
 from app.models.farm import Farm, Plot
+from app.models.job import BackgroundJob
 from app.models.sensor import Sensor
-from app.models.timeseries import SoilReading, VisionData
+from app.models.timeseries import SoilReading
 from app.schemas.analytics import (
     ForecastResponse,
     HistoricalDataPoint,
@@ -21,6 +28,10 @@ from app.schemas.analytics import (
     SnapshotCreate,
     SnapshotResponse,
 )
+from app.schemas.job import JobResponse
+from app.services.alert_counter_service import AlertCounterService
+from app.services.forecast_service import CONFIDENCE_LEVEL, ForecastService
+from app.services.snapshot_service import SNAPSHOT_JOB
 
 router = APIRouter()
 
@@ -29,10 +40,9 @@ def get_user_plots_query(db: Session, current_user):
     """Retorna query base para plots do usuario."""
     query = db.query(Plot).filter(Plot.deleted_at.is_(None))
 
-    if not current_user.is_superuser:
-        query = query.join(Farm).filter(Farm.organization_id == current_user.organization_id)
-
-    return query
+    # Filtra pelos talhoes das fazendas da organizacao do usuario
+    scope = tenant_scopes.resolve(db, current_user)
+    return scope.restrict(query, Plot.id, scope.plot_ids)
 
 
 @router.get("/", response_model=list[SnapshotResponse])
@@ -196,6 +206,11 @@ async def get_production_analytics(
     farm_id: UUID | None = None,
 ):
     """Obtem analytics de producao agregados."""
+    cache_key = response_cache.build_key("production_analytics", current_user, farm_id=farm_id)
+    cached = response_cache.get(cache_key)
+    if cached is not None:
+        return cached
+
     plots_query = get_user_plots_query(db, current_user)
 
     if farm_id:
@@ -237,7 +252,7 @@ async def get_production_analytics(
         if status in status_count:
             status_count[status] += 1
 
-    return ProductionAnalyticsResponse(
+    analytics = ProductionAnalyticsResponse(
         total_plots=len(plots),
         plots_with_data=len(snapshots),
         total_fruits=total_fruits,
@@ -246,6 +261,13 @@ async def get_production_analytics(
         status_summary=status_count,
         snapshots=snapshots,
     )
+    # Superuser consulta todas as organizacoes: entrada no escopo global
+    return response_cache.set(
+        cache_key,
+        analytics,
+        farm_id=farm_id,
+        organization_id=None if current_user.is_superuser else current_user.organization_id,
+    )
 
 
 @router.get("/farm/{farm_id}/summary")
@@ -258,6 +280,11 @@ async def get_farm_analytics_summary(
 
     Retorna estatisticas agregadas da fazenda.
     """
+    cache_key = response_cache.build_key("farm_analytics_summary", current_user, farm_id=farm_id)
+    cached = response_cache.get(cache_key)
+    if cached is not None:
+        return cached
+
     farm_query = db.query(Farm).filter(Farm.id == farm_id, Farm.deleted_at.is_(None))
 
     if not current_user.is_superuser:
@@ -279,11 +306,7 @@ async def get_farm_analytics_summary(
         .all()
     )
 
-    alerts = (
-        db.query(Alert)
-        .filter(Alert.farm_id == farm_id, Alert.resolved_at.is_(None))
-        .all()
-    )
+    alert_counts = AlertCounterService(db).counts(farm_id=farm_id)
 
     plots_ok = 0
     plots_warning = 0
@@ -339,8 +362,8 @@ async def get_farm_analytics_summary(
     sensors_online = sum(1 for s in sensors if s.is_online)
     sensors_offline = len(sensors) - sensors_online
 
-    critical_alerts = sum(1 for a in alerts if a.severity == "critical")
-    warning_alerts = sum(1 for a in alerts if a.severity == "warning")
+    critical_alerts = alert_counts["by_severity"]["critical"]
+    warning_alerts = alert_counts["by_severity"]["warning"]
 
     avg_moisture = sum(moisture_values) / len(moisture_values) if moisture_values else None
     avg_temperature = sum(temperature_values) / len(temperature_values) if temperature_values else None
@@ -359,7 +382,7 @@ async def get_farm_analytics_summary(
         base_score -= warning_alerts * 3
     health_score = max(0, min(100, base_score))
 
-    return {
+    summary = {
         "farm_id": str(farm.id),
         "farm_name": farm.name,
         "total_area": float(farm.total_area) if farm.total_area else None,
@@ -372,7 +395,7 @@ async def get_farm_analytics_summary(
         "plots_warning": plots_warning,
         "plots_critical": plots_critical,
         "plots_offline": plots_offline,
-        "active_alerts": len(alerts),
+        "active_alerts": alert_counts["open"],
         "critical_alerts": critical_alerts,
         "warning_alerts": warning_alerts,
         "avg_moisture": avg_moisture,
@@ -381,6 +404,7 @@ async def get_farm_analytics_summary(
         "health_score": health_score,
         "estimated_yield_kg": total_yield_kg,
     }
+    return response_cache.set(cache_key, summary, farm_id=farm.id)
 
 
 @router.get("/farm/{farm_id}/forecast", response_model=ForecastResponse)
@@ -389,7 +413,17 @@ async def get_farm_forecast(
     current_user: CurrentUser,
     db: Session = Depends(get_db),
 ):
-    """Obtem previsao de producao de uma fazenda."""
+    """Obtem previsao de producao de uma fazenda.
+
+    Alem dos totais do ultimo snapshot de cada talhao, retorna a curva de
+    producao prevista (soma dos modelos por talhao ajustados no job
+    noturno) com intervalo de confianca.
+    """
+    cache_key = response_cache.build_key("farm_forecast", current_user, farm_id=farm_id)
+    cached = response_cache.get(cache_key)
+    if cached is not None:
+        return cached
+
     farm_query = db.query(Farm).filter(Farm.id == farm_id, Farm.deleted_at.is_(None))
 
     if not current_user.is_superuser:
@@ -399,11 +433,12 @@ async def get_farm_forecast(
     if not farm:
         raise HTTPException(status_code=404, detail="Fazenda nao encontrada")
 
-    plots = (
-        db.query(Plot)
-        .filter(Plot.farm_id == farm_id, Plot.deleted_at.is_(None), Plot.is_active == True)
-        .all()
-    )
+    plot_ids = [
+        plot_id
+        for (plot_id,) in db.query(Plot.id).filter(
+            Plot.farm_id == farm_id, Plot.deleted_at.is_(None), Plot.is_active == True
+        )
+    ]
 
     total_yield_kg = 0.0
     harvest_start = None
@@ -411,39 +446,50 @@ async def get_farm_forecast(
     plots_ready = 0
     plots_in_progress = 0
 
-    for plot in plots:
-        snapshot = (
-            db.query(PlotProductionSnapshot)
-            .filter(PlotProductionSnapshot.plot_id == plot.id)
-            .order_by(PlotProductionSnapshot.snapshot_date.desc())
-            .first()
-        )
+    # Ultimo snapshot de cada talhao em uma consulta
+    snapshots = (
+        db.query(PlotProductionSnapshot)
+        .filter(PlotProductionSnapshot.plot_id.in_(plot_ids))
+        .order_by(PlotProductionSnapshot.plot_id, PlotProductionSnapshot.snapshot_date.desc())
+        .distinct(PlotProductionSnapshot.plot_id)
+        .all()
+        if plot_ids
+        else []
+    )
 
-        if snapshot:
-            if snapshot.estimated_yield_kg:
-                total_yield_kg += float(snapshot.estimated_yield_kg)
+    for snapshot in snapshots:
+        if snapshot.estimated_yield_kg:
+            total_yield_kg += float(snapshot.estimated_yield_kg)
+
+        if snapshot.harvest_start_date:
+            if harvest_start is None or snapshot.harvest_start_date < harvest_start:
+                harvest_start = snapshot.harvest_start_date
 
-            if snapshot.harvest_start_date:
-                if harvest_start is None or snapshot.harvest_start_date < harvest_start:
-                    harvest_start = snapshot.harvest_start_date
+        if snapshot.harvest_end_date:
+            if harvest_end is None or snapshot.harvest_end_date > harvest_end:
+                harvest_end = snapshot.harvest_end_date
 
-            if snapshot.harvest_end_date:
-                if harvest_end is None or snapshot.harvest_end_date > harvest_end:
-                    harvest_end = snapshot.harvest_end_date
+        if snapshot.production_stage == "pronto_colheita":
+            plots_ready += 1
+        elif snapshot.production_stage in ["maturacao", "crescimento", "frutificacao"]:
+            plots_in_progress += 1
 
-            if snapshot.production_stage == "pronto_colheita":
-                plots_ready += 1
-            elif snapshot.production_stage in ["maturacao", "crescimento", "frutificacao"]:
-                plots_in_progress += 1
+    # Curvas ajustadas no job noturno (ver ForecastService)
+    curve = ForecastService(db).farm_curve(plot_ids)
 
-    return ForecastResponse(
+    forecast = ForecastResponse(
         total_estimated_kg=total_yield_kg,
         total_estimated_tons=total_yield_kg / 1000,
         harvest_start=harvest_start,
         harvest_end=harvest_end,
         plots_ready=plots_ready,
         plots_in_progress=plots_in_progress,
+        plots_forecasted=curve["plots_forecasted"],
+        confidence_level=CONFIDENCE_LEVEL,
+        fitted_at=curve["fitted_at"],
+        forecast=curve["points"],
     )
+    return response_cache.set(cache_key, forecast, farm_id=farm.id)
 
 
 @router.get("/farm/{farm_id}/history", response_model=HistoricalDataResponse)
@@ -453,13 +499,20 @@ async def get_farm_history(
     db: Session = Depends(get_db),
     metric: str = Query(default="health_score"),
     period: str = Query(default="30d"),
+    max_points: int | None = Query(default=None, ge=3, le=5000),
+    downsample: str = "lttb",
 ):
     """Obtem dados historicos de uma fazenda para graficos.
 
     Parametros:
         metric: Metrica (health_score, yield, moisture, temperature)
         period: Periodo (7d, 30d, 90d, 1y)
+        max_points: Reduz a serie a no maximo N pontos
+        downsample: Metodo de reducao (lttb, minmax)
     """
+    if max_points and downsample not in DOWNSAMPLE_METHODS:
+        raise HTTPException(status_code=400, detail="Metodo de reducao invalido")
+
     farm_query = db.query(Farm).filter(Farm.id == farm_id, Farm.deleted_at.is_(None))
 
     if not current_user.is_superuser:
@@ -542,6 +595,14 @@ async def get_farm_history(
                 avg_value = sum(values) / len(values)
                 data_points.append(HistoricalDataPoint(date=date_str, value=avg_value))
 
+    if max_points and len(data_points) > max_points:
+        x = np.array(
+            [date.fromisoformat(point.date).toordinal() for point in data_points],
+            dtype=np.float64,
+        )
+        y = np.array([point.value for point in data_points], dtype=np.float64)
+        data_points = [data_points[i] for i in downsample_series(x, y, max_points, downsample)]
+
     return HistoricalDataResponse(
         metric=metric,
         period=period,
@@ -557,14 +618,7 @@ async def get_plot_snapshots(
     limit: int = Query(default=30, le=100),
 ):
     """Obtem snapshots de producao de um talhao."""
-    plot_query = db.query(Plot).filter(Plot.id == plot_id, Plot.deleted_at.is_(None))
-
-    if not current_user.is_superuser:
-        plot_query = plot_query.join(Farm).filter(
-            Farm.organization_id == current_user.organization_id
-        )
-
-    plot = plot_query.first()
+    plot = get_user_plots_query(db, current_user).filter(Plot.id == plot_id).first()
     if not plot:
         raise HTTPException(status_code=404, detail="Talhao nao encontrado")
 
@@ -623,14 +677,7 @@ async def get_snapshot(
     if not snapshot:
         raise HTTPException(status_code=404, detail="Snapshot nao encontrado")
 
-    plot_query = db.query(Plot).filter(Plot.id == snapshot.plot_id, Plot.deleted_at.is_(None))
-
-    if not current_user.is_superuser:
-        plot_query = plot_query.join(Farm).filter(
-            Farm.organization_id == current_user.organization_id
-        )
-
-    plot = plot_query.first()
+    plot = get_user_plots_query(db, current_user).filter(Plot.id == snapshot.plot_id).first()
     if not plot:
         raise HTTPException(status_code=404, detail="Snapshot nao encontrado")
 
@@ -671,14 +718,7 @@ async def create_snapshot(
     db: Session = Depends(get_db),
 ):
     """Cria um novo snapshot de producao."""
-    plot_query = db.query(Plot).filter(Plot.id == data.plot_id, Plot.deleted_at.is_(None))
-
-    if not current_user.is_superuser:
-        plot_query = plot_query.join(Farm).filter(
-            Farm.organization_id == current_user.organization_id
-        )
-
-    plot = plot_query.first()
+    plot = get_user_plots_query(db, current_user).filter(Plot.id == data.plot_id).first()
     if not plot:
         raise HTTPException(status_code=404, detail="Talhao nao encontrado")
 
@@ -723,6 +763,7 @@ async def create_snapshot(
     )
 
     db.add(snapshot)
+    publish_farm_event(db, "snapshot", plot.farm_id, plot.farm.organization_id, plot_id=plot.id)
     db.commit()
     db.refresh(snapshot)
 
@@ -756,209 +797,52 @@ async def create_snapshot(
     )
 
 
-@router.post("/generate", response_model=list[SnapshotResponse])
+@router.post("/generate", response_model=JobResponse, status_code=status.HTTP_202_ACCEPTED)
 async def generate_snapshots_from_sensors(
     current_user: CurrentUser,
     db: Session = Depends(get_db),
     farm_id: UUID | None = None,
 ):
-    """Gera ou atualiza snapshots baseado nos dados de sensores.
-    
-    Este endpoint analisa os dados de soil_readings e vision_data
-    para criar ou atualizar snapshots de producao para cada talhao.
-    Se ja existir um snapshot para hoje, ele sera atualizado com os dados mais recentes.
+    """Enfileira a geracao dos snapshots do dia a partir dos dados de sensores.
+
+    O job analisa a ultima leitura de soil_readings e vision_data de cada
+    talhao e cria ou atualiza o snapshot de hoje. Acompanhe o andamento
+    em GET /jobs/{job_id}.
     """
-    from decimal import Decimal
-    
-    plots_query = get_user_plots_query(db, current_user)
-    
+    organization_id = current_user.organization_id
     if farm_id:
-        plots_query = plots_query.filter(Plot.farm_id == farm_id)
-    
-    plots = plots_query.all()
-    today = date.today()
-    created_snapshots = []
-    
-    for plot_item in plots:
-        # Verificar se ja existe snapshot para hoje
-        existing = (
-            db.query(PlotProductionSnapshot)
-            .filter(
-                PlotProductionSnapshot.plot_id == plot_item.id,
-                PlotProductionSnapshot.snapshot_date == today,
-            )
-            .first()
-        )
-        
-        # Buscar ultima leitura de solo
-        last_soil = (
-            db.query(SoilReading)
-            .filter(SoilReading.plot_id == plot_item.id)
-            .order_by(SoilReading.time.desc())
-            .first()
-        )
-        
-        # Buscar ultima leitura de visao
-        last_vision = (
-            db.query(VisionData)
-            .filter(VisionData.plot_id == plot_item.id)
-            .order_by(VisionData.time.desc())
-            .first()
+        farm = db.query(Farm).filter(Farm.id == farm_id, Farm.deleted_at.is_(None)).first()
+        if not farm or not tenant_scopes.resolve(db, current_user).has_farm(farm_id):
+            raise HTTPException(status_code=404, detail="Fazenda nao encontrada")
+        organization_id = farm.organization_id
+    elif not current_user.is_superuser and organization_id is None:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Usuario sem organizacao",
         )
-        
-        # Calcular health score baseado nas leituras
-        health_score = Decimal("70")  # Base
-        risk_factors = []
-        plot_status = "ok"
-        
-        if last_soil:
-            # Ajustar health score baseado em umidade
-            moisture = float(last_soil.moisture or 0)
-            if moisture < 15:
-                health_score -= Decimal("15")
-                risk_factors.append("Umidade do solo baixa")
-                plot_status = "warning"
-            elif moisture > 35:
-                health_score -= Decimal("10")
-                risk_factors.append("Umidade do solo alta")
-            
-            # Ajustar baseado em pH
-            ph = float(last_soil.ph or 6.5)
-            if ph < 5.5 or ph > 7.5:
-                health_score -= Decimal("10")
-                risk_factors.append("pH fora da faixa ideal")
-                if plot_status == "ok":
-                    plot_status = "warning"
-            
-            # Ajustar baseado em temperatura
-            temp = float(last_soil.temperature or 25)
-            if temp > 35:
-                health_score -= Decimal("15")
-                risk_factors.append("Temperatura elevada")
-                plot_status = "critical"
-            elif temp < 15:
-                health_score -= Decimal("10")
-                risk_factors.append("Temperatura baixa")
-        
-        # Dados de visao
-        total_fruits = 0
-        avg_fruit_size = None
-        flowering_percentage = None
-        
-        if last_vision:
-            total_fruits = last_vision.fruit_count or 0
-            avg_fruit_size = last_vision.avg_fruit_size
-            flowering_percentage = last_vision.flowering_percentage
-            
-            # Ajustar health score baseado em estresse hidrico
-            water_stress = float(last_vision.water_stress_level or 0)
-            if water_stress > 60:
-                health_score -= Decimal("20")
-                risk_factors.append("Estresse hidrico alto")
-                plot_status = "critical"
-            elif water_stress > 40:
-                health_score -= Decimal("10")
-                risk_factors.append("Estresse hidrico moderado")
-                if plot_status == "ok":
-                    plot_status = "warning"
-        
-        # Garantir que health_score esta entre 0 e 100
-        health_score = max(Decimal("0"), min(Decimal("100"), health_score))
-        
-        # Determinar risk level
-        risk_level = "baixo"
-        if len(risk_factors) >= 3 or plot_status == "critical":
-            risk_level = "critico"
-        elif len(risk_factors) >= 2:
-            risk_level = "alto"
-        elif len(risk_factors) >= 1:
-            risk_level = "medio"
-        
-        # Estimar producao (simplificado)
-        tree_count = plot_item.tree_count or 100
-        fruits_per_tree = total_fruits / tree_count if tree_count > 0 else 0
-        avg_weight_kg = 0.35  # Peso medio de uma manga em kg
-        estimated_yield_kg = Decimal(str(total_fruits * avg_weight_kg))
-        estimated_yield_tons = estimated_yield_kg / 1000
-        
-        # Determinar estagio de producao
-        production_stage = "vegetativo"
-        if flowering_percentage and float(flowering_percentage) > 50:
-            production_stage = "floracao"
-        elif total_fruits > tree_count * 5:
-            production_stage = "frutificacao"
-        elif total_fruits > tree_count * 20:
-            production_stage = "maturacao"
-        
-        if existing:
-            # Atualizar snapshot existente
-            existing.status = plot_status
-            existing.health_score = health_score
-            existing.production_stage = production_stage
-            existing.fruits_per_tree = Decimal(str(fruits_per_tree)) if fruits_per_tree else None
-            existing.total_fruits = total_fruits
-            existing.avg_fruit_size = avg_fruit_size
-            existing.estimated_yield_kg = estimated_yield_kg
-            existing.estimated_yield_tons = estimated_yield_tons
-            existing.flowering_percentage = flowering_percentage
-            existing.risk_level = risk_level
-            existing.risk_factors = risk_factors
-            created_snapshots.append((existing, plot_item))
-        else:
-            # Criar novo snapshot
-            new_snapshot = PlotProductionSnapshot(
-                plot_id=plot_item.id,
-                snapshot_date=today,
-                status=plot_status,
-                health_score=health_score,
-                production_stage=production_stage,
-                fruits_per_tree=Decimal(str(fruits_per_tree)) if fruits_per_tree else None,
-                total_fruits=total_fruits,
-                avg_fruit_size=avg_fruit_size,
-                estimated_yield_kg=estimated_yield_kg,
-                estimated_yield_tons=estimated_yield_tons,
-                flowering_percentage=flowering_percentage,
-                risk_level=risk_level,
-                risk_factors=risk_factors,
-            )
-            db.add(new_snapshot)
-            created_snapshots.append((new_snapshot, plot_item))
-    
+
+    job = enqueue_job(
+        db,
+        SNAPSHOT_JOB,
+        organization_id=organization_id,
+        params={"farm_id": str(farm_id)} if farm_id else {},
+        created_by=current_user.id,
+    )
     db.commit()
-    
-    # Preparar resposta
-    result = []
-    for snap, p in created_snapshots:
-        db.refresh(snap)
-        result.append(
-            SnapshotResponse(
-                id=snap.id,
-                plot_id=snap.plot_id,
-                snapshot_date=snap.snapshot_date,
-                status=snap.status,
-                health_score=snap.health_score,
-                production_stage=snap.production_stage,
-                flowers_per_tree=snap.flowers_per_tree,
-                total_flowers=snap.total_flowers,
-                flowering_percentage=snap.flowering_percentage,
-                fruits_per_tree=snap.fruits_per_tree,
-                total_fruits=snap.total_fruits,
-                avg_fruit_size=snap.avg_fruit_size,
-                fruit_caliber=snap.fruit_caliber,
-                estimated_yield_kg=snap.estimated_yield_kg,
-                estimated_yield_tons=snap.estimated_yield_tons,
-                harvest_start_date=snap.harvest_start_date,
-                harvest_end_date=snap.harvest_end_date,
-                days_to_harvest=snap.days_to_harvest,
-                risk_level=snap.risk_level,
-                risk_factors=snap.risk_factors or [],
-                extra_data=snap.extra_data or {},
-                last_soil_reading_id=snap.last_soil_reading_id,
-                last_vision_data_id=snap.last_vision_data_id,
-                created_at=snap.created_at,
-                plot_name=p.name,
-                plot_code=p.code,
-            )
-        )
-    
-    return result
+    db.refresh(job)
+    return job
+
+
+@router.get("/jobs/{job_id}", response_model=JobResponse)
+async def get_job(
+    job_id: UUID,
+    current_user: CurrentUser,
+    db: Session = Depends(get_db),
+):
+    """Obtem o estado de um job de analytics."""
+    job = db.query(BackgroundJob).filter(BackgroundJob.id == job_id).first()
+    if not job or (
+        not current_user.is_superuser and job.organization_id != current_user.organization_id
+    ):
+        raise HTTPException(status_code=404, detail="Job nao encontrado")
+    return job
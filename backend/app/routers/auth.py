@@ -4,8 +4,8 @@ from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordRequestForm
 from sqlalchemy.orm import Session
 
-from app.core.deps import CurrentUser
-from app.core.security import create_access_token, verify_password
+from app.core.deps import CurrentUserRecord
+from app.core.security import create_access_token, verify_password_async
 from app.database import get_db
 from app.schemas.auth import LoginRequest, PasswordChange, Token
 from app.schemas.user import UserResponse
@@ -24,7 +24,7 @@ async def login(
     Autentica o usuário e retorna um token JWT.
     """
     user_service = UserService(db)
-    user = user_service.authenticate(form_data.username, form_data.password)
+    user = await user_service.authenticate(form_data.username, form_data.password)
 
     if not user:
         raise HTTPException(
@@ -58,7 +58,7 @@ async def login_json(
     Alternativa ao login OAuth2 para clientes que preferem JSON.
     """
     user_service = UserService(db)
-    user = user_service.authenticate(login_data.email, login_data.password)
+    user = await user_service.authenticate(login_data.email, login_data.password)
 
     if not user:
         raise HTTPException(
@@ -82,7 +82,7 @@ async def login_json(
 
 
 @router.get("/me", response_model=UserResponse)
-async def get_current_user_info(current_user: CurrentUser):
+async def get_current_user_info(current_user: CurrentUserRecord):
     """Retorna informações do usuário autenticado."""
     return current_user
 
@@ -90,17 +90,19 @@ async def get_current_user_info(current_user: CurrentUser):
 @router.post("/change-password")
 async def change_password(
     password_data: PasswordChange,
-    current_user: CurrentUser,
+    current_user: CurrentUserRecord,
     db: Session = Depends(get_db),
 ):
     """Altera a senha do usuário autenticado."""
-    if not verify_password(password_data.current_password, current_user.password_hash):
+    if not await verify_password_async(
+        password_data.current_password, current_user.password_hash
+    ):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Senha atual incorreta",
         )
 
     user_service = UserService(db)
-    user_service.change_password(current_user, password_data.new_password)
+    await user_service.change_password(current_user, password_data.new_password)
 
     return {"message": "Senha alterada com sucesso"}
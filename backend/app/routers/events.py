@@ -3,16 +3,31 @@
 from datetime import datetime, timezone
 from uuid import UUID
 
-from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
 from sqlalchemy.orm import Session
 
 from app.core.deps import CurrentUser
+from app.core.fields import parse_fields
+from app.core.pagination import Keyset, Page, paginate
+from app.core.responses import serialize_response
 from app.database import get_db
 from app.models.event import Event
 from app.schemas.event import EventCreate, EventResponse, EventUpdate
+from app.schemas.serializers import events_adapter
 
 router = APIRouter()
 
+# Ordenacoes aceitas em list_events (sort_by, sort_order)
+EVENT_KEYSETS = {
+    (sort_by, sort_order): Keyset(
+        f"events_{sort_by}_{sort_order}",
+        (getattr(Event, sort_by), Event.id),
+        descending=sort_order == "desc",
+    )
+    for sort_by in ("timestamp", "created_at")
+    for sort_order in ("asc", "desc")
+}
+
 
 def get_user_events_query(db: Session, current_user):
     """Retorna query base para eventos do usuario."""
@@ -26,7 +41,10 @@ def get_user_events_query(db: Session, current_user):
 
 @router.get("/", response_model=list[EventResponse])
 async def list_events(
+    request: Request,
+    response: Response,
     current_user: CurrentUser,
+    page: Page,
     db: Session = Depends(get_db),
     farm_id: UUID | None = None,
     plot_id: UUID | None = None,
@@ -34,9 +52,9 @@ async def list_events(
     scope: str | None = None,
     start_date: datetime | None = None,
     end_date: datetime | None = None,
-    limit: int = Query(default=100, le=500),
     sort_by: str = "timestamp",
     sort_order: str = "desc",
+    fields: str | None = None,
 ):
     """Lista eventos da organizacao.
 
@@ -47,10 +65,13 @@ async def list_events(
         scope: Filtrar por escopo (farm, plot, subarea, tree_group)
         start_date: Filtrar eventos a partir desta data
         end_date: Filtrar eventos ate esta data
-        limit: Numero maximo de eventos (padrao: 100, max: 500)
+        cursor / limit / include_total: Paginacao (padrao: 100 por pagina;
+            ver app.core.pagination)
         sort_by: Campo para ordenacao (timestamp, created_at)
         sort_order: Ordem (asc, desc)
+        fields: Campos da resposta separados por virgula (ex: id,type,title,timestamp)
     """
+    fieldset = parse_fields(fields, EventResponse)
     query = get_user_events_query(db, current_user)
 
     if farm_id:
@@ -71,17 +92,17 @@ async def list_events(
     if end_date:
         query = query.filter(Event.timestamp <= end_date)
 
-    if sort_by == "timestamp":
-        order_col = Event.timestamp
-    else:
-        order_col = Event.created_at
-
-    if sort_order == "asc":
-        query = query.order_by(order_col.asc())
-    else:
-        query = query.order_by(order_col.desc())
-
-    return query.limit(limit).all()
+    keyset = EVENT_KEYSETS[
+        (
+            "timestamp" if sort_by == "timestamp" else "created_at",
+            "asc" if sort_order == "asc" else "desc",
+        )
+    ]
+    if fieldset:
+        query = fieldset.apply(query, Event, *keyset.columns)
+    events = paginate(query, keyset, page, request, response, default_limit=100)
+    adapter = fieldset.adapter if fieldset else events_adapter
+    return serialize_response(adapter, events, response)
 
 
 @router.get("/{event_id}", response_model=EventResponse)
@@ -0,0 +1,118 @@
+"""Rotas de exportacao de leituras."""
+
+from datetime import datetime, timezone
+from uuid import UUID
+
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import StreamingResponse
+from sqlalchemy.orm import Session
+
+from app.core.deps import CurrentUser
+from app.database import get_db
+from app.models.farm import Farm, Plot
+from app.services.export_service import (
+    COLUMNAR_FORMATS,
+    DATASETS,
+    EXPORT_FORMATS,
+    ExportService,
+    stream_columnar_export,
+    stream_export,
+)
+
+router = APIRouter()
+
+
+def get_export_farm(db: Session, current_user, farm_id: UUID) -> Farm:
+    """Retorna a fazenda se o usuario tiver acesso a ela."""
+    farm_query = db.query(Farm).filter(Farm.id == farm_id, Farm.deleted_at.is_(None))
+
+    if not current_user.is_superuser:
+        farm_query = farm_query.filter(Farm.organization_id == current_user.organization_id)
+
+    farm = farm_query.first()
+    if not farm:
+        raise HTTPException(status_code=404, detail="Fazenda nao encontrada")
+
+    return farm
+
+
+@router.get("/{dataset}")
+async def export_readings(
+    dataset: str,
+    farm_id: UUID,
+    current_user: CurrentUser,
+    db: Session = Depends(get_db),
+    plot_id: UUID | None = None,
+    sensor_id: UUID | None = None,
+    start_time: datetime | None = None,
+    end_time: datetime | None = None,
+    format: str = "ndjson",
+):
+    """Exporta leituras de uma fazenda em streaming, sem limite de linhas.
+
+    Parametros:
+        dataset: Conjunto de dados (soil, vision, weather, uplink)
+        farm_id: Fazenda das leituras
+        plot_id: Filtrar por talhao (apenas soil e vision)
+        sensor_id: Filtrar por sensor
+        start_time: Filtrar leituras a partir desta data
+        end_time: Filtrar leituras ate esta data
+        format: Formato do arquivo (ndjson, csv, parquet, arrow)
+
+    Os formatos parquet e arrow (Arrow IPC stream) requerem o pacote pyarrow.
+    """
+    if dataset not in DATASETS:
+        raise HTTPException(status_code=404, detail="Conjunto de dados nao encontrado")
+
+    media_types = EXPORT_FORMATS | COLUMNAR_FORMATS
+    if format not in media_types:
+        raise HTTPException(status_code=400, detail="Formato de exportacao invalido")
+
+    if format in COLUMNAR_FORMATS:
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError:
+            raise HTTPException(
+                status_code=501,
+                detail="Exportacao colunar requer o pacote pyarrow",
+            ) from None
+
+    if plot_id and dataset not in ("soil", "vision"):
+        raise HTTPException(
+            status_code=400,
+            detail="Filtro por talhao disponivel apenas para soil e vision",
+        )
+
+    farm = get_export_farm(db, current_user, farm_id)
+
+    if plot_id:
+        plot = db.query(Plot).filter(
+            Plot.id == plot_id,
+            Plot.farm_id == farm.id,
+            Plot.deleted_at.is_(None),
+        ).first()
+        if not plot:
+            raise HTTPException(status_code=404, detail="Talhao nao encontrado")
+
+    stmt = ExportService.build_query(
+        dataset,
+        farm_id=farm.id,
+        plot_id=plot_id,
+        sensor_id=sensor_id,
+        start_time=start_time,
+        end_time=end_time,
+    )
+
+    stamp = datetime.now(timezone.utc).strftime("%Y%m%d%H%M%S")
+    filename = f"{dataset}_{farm.id}_{stamp}.{format}"
+
+    if format in COLUMNAR_FORMATS:
+        content = stream_columnar_export(stmt, format)
+    else:
+        content = stream_export(stmt, format)
+
+    return StreamingResponse(
+        content,
+        media_type=media_types[format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
@@ -1,19 +1,42 @@
 """Rotas de fazendas."""
 
+import asyncio
+import hashlib
 from datetime import datetime, timedelta, timezone
+from typing import Annotated
 from uuid import UUID
 
-from fastapi import APIRouter, Depends, HTTPException, status
+import orjson
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 from sqlalchemy.orm import Session
 
-from app.core.deps import CurrentUser
-from app.database import get_db
-from app.models.alert import Alert
-from app.models.farm import Farm, Plot
+from app.config import settings
+from app.core.cache import response_cache
+from app.core.deps import CurrentUser, authenticate_token, optional_oauth2_scheme
+from app.core.etag import CACHE_CONTROL, conditional_response
+from app.core.fields import parse_fields
+from app.core.live import live_hub
+from app.core.pagination import Keyset, Page, paginate
+from app.core.pubsub import publish_farm_event
+from app.core.scoring import latest_by_plot, score_plots
+from app.core.security import create_stream_token
+from app.core.spatial import bbox_filter
+from app.core.tenant import tenant_scopes
+from app.core.tiles import valid_tile
+from app.database import SessionLocal, get_db
+from app.models.farm import Farm, Plot, Tree
 from app.models.sensor import Sensor
 from app.models.timeseries import SoilReading, VisionData
+from app.schemas.auth import StreamToken
 from app.schemas.farm import FarmCreate, FarmResponse, FarmUpdate
+from app.schemas.tree import TreeResponse
+from app.schemas.weather import WeatherResponse
+from app.services.alert_counter_service import AlertCounterService
+from app.services.heatmap_service import HEATMAP_METRICS
+from app.services.tile_service import TILE_LAYERS, TileService
+from app.services.weather_service import WeatherService
 
 
 class FarmSummaryResponse(BaseModel):
@@ -43,23 +66,34 @@ class FarmSummaryResponse(BaseModel):
 
 router = APIRouter()
 
+FARM_KEYSET = Keyset("farms", (Farm.created_at, Farm.id))
+TREE_KEYSET = Keyset("trees", (Tree.created_at, Tree.id))
+
 
 @router.get("/", response_model=list[FarmResponse])
 async def list_farms(
+    request: Request,
+    response: Response,
     current_user: CurrentUser,
+    page: Page,
     db: Session = Depends(get_db),
+    fields: str | None = None,
 ):
-    """Lista fazendas da organização do usuário."""
-    if current_user.is_superuser:
-        # Superuser vê todas as fazendas
-        farms = db.query(Farm).filter(Farm.deleted_at.is_(None)).all()
-    else:
+    """Lista fazendas da organização do usuário.
+
+    Paginada por cursor (ver app.core.pagination): cursor, limit e include_total.
+    fields limita os campos da resposta (ex: id,name).
+    """
+    fieldset = parse_fields(fields, FarmResponse)
+    query = db.query(Farm).filter(Farm.deleted_at.is_(None))
+    if not current_user.is_superuser:
         # Usuário normal vê apenas fazendas da sua organização
-        farms = db.query(Farm).filter(
-            Farm.organization_id == current_user.organization_id,
-            Farm.deleted_at.is_(None),
-        ).all()
-    return farms
+        query = query.filter(Farm.organization_id == current_user.organization_id)
+    if fieldset:
+        query = fieldset.apply(query, Farm, *FARM_KEYSET.columns)
+
+    farms = paginate(query, FARM_KEYSET, page, request, response)
+    return fieldset.serialize(farms, response) if fieldset else farms
 
 
 @router.get("/{farm_id}", response_model=FarmResponse)
@@ -126,7 +160,10 @@ async def create_farm(
         created_by=current_user.id,
     )
     db.add(farm)
+    db.flush()  # Para obter o ID
+    publish_farm_event(db, "farm", farm.id, farm.organization_id)
     db.commit()
+    tenant_scopes.invalidate(farm.organization_id)
     db.refresh(farm)
     return farm
 
@@ -153,6 +190,7 @@ async def update_farm(
     for field, value in update_data.items():
         setattr(farm, field, value)
 
+    publish_farm_event(db, "farm", farm.id, farm.organization_id)
     db.commit()
     db.refresh(farm)
     return farm
@@ -176,33 +214,174 @@ async def delete_farm(
         raise HTTPException(status_code=404, detail="Fazenda nao encontrada")
 
     farm.deleted_at = datetime.now(timezone.utc)
+    publish_farm_event(db, "farm", farm.id, farm.organization_id)
     db.commit()
+    tenant_scopes.invalidate(farm.organization_id)
 
 
-def calculate_plot_status_from_readings(soil: SoilReading | None) -> str:
-    """Calcula status do talhao baseado na leitura de solo."""
-    if not soil:
-        return "offline"
+def _live_scope(farm_id: UUID) -> str:
+    return f"live:{farm_id}"
 
-    moisture = float(soil.moisture) if soil.moisture else None
-    ph = float(soil.ph) if soil.ph else None
-    temp = float(soil.temperature) if soil.temperature else None
 
-    if moisture is not None and (moisture < 10 or moisture > 35):
-        return "critical"
-    if ph is not None and (ph < 5.5 or ph > 8.0):
-        return "critical"
-    if temp is not None and temp > 40:
-        return "critical"
+def _check_live_farm(db: Session, farm_id: UUID, current_user) -> None:
+    query = db.query(Farm.id).filter(Farm.id == farm_id, Farm.deleted_at.is_(None))
+    if not current_user.is_superuser:
+        query = query.filter(Farm.organization_id == current_user.organization_id)
+    if not query.first():
+        raise HTTPException(status_code=404, detail="Fazenda nao encontrada")
 
-    if moisture is not None and (moisture < 15 or moisture > 30):
-        return "warning"
-    if ph is not None and (ph < 6.0 or ph > 7.5):
-        return "warning"
-    if temp is not None and (temp < 15 or temp > 35):
-        return "warning"
 
-    return "ok"
+@router.post("/{farm_id}/live/token", response_model=StreamToken)
+async def create_farm_stream_token(
+    farm_id: UUID,
+    current_user: CurrentUser,
+    db: Session = Depends(get_db),
+):
+    """Token curto para abrir o stream ao vivo da fazenda com EventSource.
+
+    O token so vale para /{farm_id}/live e expira em poucos segundos; o
+    cliente pede um novo a cada (re)conexao.
+    """
+    _check_live_farm(db, farm_id, current_user)
+    return StreamToken(
+        token=create_stream_token(str(current_user.id), _live_scope(farm_id)),
+        expires_in=settings.live_token_ttl_seconds,
+    )
+
+
+@router.get("/{farm_id}/live")
+async def stream_farm_events(
+    farm_id: UUID,
+    request: Request,
+    header_token: Annotated[str | None, Depends(optional_oauth2_scheme)],
+    token: str | None = None,
+):
+    """Stream de eventos ao vivo da fazenda (Server-Sent Events).
+
+    Envia novas leituras (reading), mudancas de status de sensores
+    (sensor_status) e alertas (alert) como pequenos deltas. Um evento
+    resync indica que o cliente deve recarregar o estado completo.
+
+    Parametros:
+        token: Token de stream de POST /{farm_id}/live/token (para EventSource,
+            que nao envia o cabecalho Authorization; o token de login nao e
+            aceito na URL)
+    """
+    # Sessao curta: a conexao nao fica presa ao pool durante o streaming
+    db = SessionLocal()
+    try:
+        if header_token:
+            current_user = authenticate_token(db, header_token)
+        else:
+            current_user = authenticate_token(db, token, scope=_live_scope(farm_id))
+        _check_live_farm(db, farm_id, current_user)
+    finally:
+        db.close()
+
+    key = str(farm_id)
+    queue = live_hub.subscribe(key)
+
+    async def event_stream():
+        try:
+            yield f"retry: {settings.live_retry_ms}\n\n"
+            while not await request.is_disconnected():
+                try:
+                    event = await asyncio.wait_for(
+                        queue.get(), timeout=settings.live_keepalive_seconds
+                    )
+                except TimeoutError:
+                    yield ": keepalive\n\n"
+                    continue
+                data = orjson.dumps(event).decode()
+                yield f"event: {event['type']}\ndata: {data}\n\n"
+        finally:
+            live_hub.unsubscribe(key, queue)
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.get("/{farm_id}/weather", response_model=WeatherResponse)
+async def get_farm_weather(
+    farm_id: UUID,
+    current_user: CurrentUser,
+    interval: str = "day",
+    start_time: datetime | None = None,
+    end_time: datetime | None = None,
+    db: Session = Depends(get_db),
+):
+    """Dados meteorologicos da fazenda a partir dos rollups das estacoes.
+
+    Parametros:
+        interval: hour (weather_hourly) ou day (weather_daily, com min/max,
+            chuva acumulada e graus-dia do dia)
+        start_time: Inicio do periodo (padrao: 2 dias para hour, 30 para day)
+        end_time: Fim do periodo (padrao: agora)
+    """
+    scope = tenant_scopes.resolve(db, current_user)
+    if scope.unrestricted:
+        found = db.query(Farm.id).filter(Farm.id == farm_id, Farm.deleted_at.is_(None)).first()
+    else:
+        found = scope.has_farm(farm_id)
+    if not found:
+        raise HTTPException(status_code=404, detail="Fazenda nao encontrada")
+
+    try:
+        return WeatherService(db).farm_weather(farm_id, interval, start_time, end_time)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e),
+        ) from e
+
+
+@router.get("/{farm_id}/trees", response_model=list[TreeResponse])
+async def list_farm_trees(
+    farm_id: UUID,
+    request: Request,
+    response: Response,
+    current_user: CurrentUser,
+    page: Page,
+    plot_id: UUID | None = None,
+    bbox: str | None = None,
+    fields: str | None = None,
+    db: Session = Depends(get_db),
+):
+    """Lista as arvores dos talhoes da fazenda.
+
+    Parametros:
+        plot_id: Filtrar por talhao
+        bbox: Apenas arvores visiveis no retangulo min_lng,min_lat,max_lng,max_lat
+        cursor / limit / include_total: Paginacao (ver app.core.pagination)
+        fields: Campos da resposta separados por virgula (ex: id,coordinates)
+    """
+    scope = tenant_scopes.resolve(db, current_user)
+    if scope.unrestricted:
+        found = db.query(Farm.id).filter(Farm.id == farm_id, Farm.deleted_at.is_(None)).first()
+    else:
+        found = scope.has_farm(farm_id)
+    if not found:
+        raise HTTPException(status_code=404, detail="Fazenda nao encontrada")
+
+    fieldset = parse_fields(fields, TreeResponse)
+    query = (
+        db.query(Tree)
+        .join(Plot, Plot.id == Tree.plot_id)
+        .filter(Plot.farm_id == farm_id, Plot.deleted_at.is_(None))
+    )
+    if plot_id:
+        query = query.filter(Tree.plot_id == plot_id)
+    query = bbox_filter(db, query, Tree.id, "trees", farm_id, bbox)
+    if fieldset:
+        query = fieldset.apply(query, Tree, *TREE_KEYSET.columns)
+
+    trees = paginate(
+        query, TREE_KEYSET, page, request, response, default_limit=settings.page_default_limit
+    )
+    return fieldset.serialize(trees, response) if fieldset else trees
 
 
 @router.get("/{farm_id}/summary", response_model=FarmSummaryResponse)
@@ -215,6 +394,11 @@ async def get_farm_summary(
 
     Inclui estatisticas de talhoes, sensores, alertas e metricas agregadas.
     """
+    cache_key = response_cache.build_key("farm_summary", current_user, farm_id=farm_id)
+    cached = response_cache.get(cache_key)
+    if cached is not None:
+        return cached
+
     query = db.query(Farm).filter(Farm.id == farm_id, Farm.deleted_at.is_(None))
 
     if not current_user.is_superuser:
@@ -236,43 +420,33 @@ async def get_farm_summary(
         .all()
     )
 
-    alerts = (
-        db.query(Alert)
-        .filter(Alert.farm_id == farm_id, Alert.acknowledged_at.is_(None))
-        .all()
-    )
+    alert_counts = AlertCounterService(db).counts(farm_id=farm_id)
 
-    plots_ok = 0
-    plots_warning = 0
-    plots_critical = 0
-    plots_offline = 0
     total_trees = 0
     moisture_values = []
     temperature_values = []
     ph_values = []
     total_fruit_count = 0
+    estimated_yield_kg = 0.0
+
+    plot_ids = [plot.id for plot in plots]
+    soil_readings = latest_by_plot(db, SoilReading, plot_ids)
+    vision_readings = latest_by_plot(db, VisionData, plot_ids)
+    scores = score_plots(
+        [plot.crop_type for plot in plots],
+        [soil_readings.get(plot.id) for plot in plots],
+        [vision_readings.get(plot.id) for plot in plots],
+    )
+    statuses = scores.status.tolist()
+    plots_ok = statuses.count("ok")
+    plots_warning = statuses.count("warning")
+    plots_critical = statuses.count("critical")
+    plots_offline = statuses.count("offline")
 
-    for plot in plots:
+    for i, plot in enumerate(plots):
         total_trees += plot.tree_count or 0
 
-        soil_reading = (
-            db.query(SoilReading)
-            .filter(SoilReading.plot_id == plot.id)
-            .order_by(SoilReading.time.desc())
-            .first()
-        )
-
-        status = calculate_plot_status_from_readings(soil_reading)
-
-        if status == "ok":
-            plots_ok += 1
-        elif status == "warning":
-            plots_warning += 1
-        elif status == "critical":
-            plots_critical += 1
-        else:
-            plots_offline += 1
-
+        soil_reading = soil_readings.get(plot.id)
         if soil_reading:
             if soil_reading.moisture is not None:
                 moisture_values.append(float(soil_reading.moisture))
@@ -281,21 +455,16 @@ async def get_farm_summary(
             if soil_reading.ph is not None:
                 ph_values.append(float(soil_reading.ph))
 
-        vision_data = (
-            db.query(VisionData)
-            .filter(VisionData.plot_id == plot.id)
-            .order_by(VisionData.time.desc())
-            .first()
-        )
-
+        vision_data = vision_readings.get(plot.id)
         if vision_data and vision_data.fruit_count:
             total_fruit_count += vision_data.fruit_count
+            estimated_yield_kg += vision_data.fruit_count * float(scores.fruit_weight_kg[i])
 
     sensors_online = sum(1 for s in sensors if s.is_online)
     sensors_offline = len(sensors) - sensors_online
 
-    critical_alerts = sum(1 for a in alerts if a.severity == "critical")
-    warning_alerts = sum(1 for a in alerts if a.severity == "warning")
+    critical_alerts = alert_counts["unacknowledged_by_severity"]["critical"]
+    warning_alerts = alert_counts["unacknowledged_by_severity"]["warning"]
 
     avg_moisture = sum(moisture_values) / len(moisture_values) if moisture_values else None
     avg_temperature = sum(temperature_values) / len(temperature_values) if temperature_values else None
@@ -314,10 +483,7 @@ async def get_farm_summary(
         base_score -= warning_alerts * 3
     health_score = max(0, min(100, base_score))
 
-    avg_fruit_weight_kg = 0.35
-    estimated_yield_kg = total_fruit_count * avg_fruit_weight_kg
-
-    return FarmSummaryResponse(
+    summary = FarmSummaryResponse(
         farm_id=farm.id,
         farm_name=farm.name,
         total_area=float(farm.total_area) if farm.total_area else None,
@@ -330,7 +496,7 @@ async def get_farm_summary(
         plots_warning=plots_warning,
         plots_critical=plots_critical,
         plots_offline=plots_offline,
-        active_alerts=len(alerts),
+        active_alerts=alert_counts["unacknowledged"],
         critical_alerts=critical_alerts,
         warning_alerts=warning_alerts,
         avg_moisture=avg_moisture,
@@ -339,3 +505,61 @@ async def get_farm_summary(
         health_score=health_score,
         estimated_yield_kg=estimated_yield_kg,
     )
+    return response_cache.set(cache_key, summary, farm_id=farm.id)
+
+
+@router.get("/{farm_id}/tiles/{layer}/{z}/{x}/{y}.png")
+async def get_farm_tile(
+    farm_id: UUID,
+    layer: str,
+    z: int,
+    x: int,
+    y: int,
+    request: Request,
+    response: Response,
+    current_user: CurrentUser,
+    db: Session = Depends(get_db),
+    metric: str = "soilMoisture",
+):
+    """Tile XYZ (PNG 256x256, Web Mercator) de uma camada do mapa da fazenda.
+
+    Parametros:
+        layer: plot-status (status dos talhoes) ou heatmap
+        metric: Metrica da camada heatmap (ver /api/sensors/heatmap-raster)
+
+    Os tiles sao renderizados sob demanda e ficam em cache ate chegarem
+    novas leituras da fazenda. Suporta GET condicional via ETag/If-None-Match.
+    """
+    if layer not in TILE_LAYERS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Camada invalida. Use: {', '.join(TILE_LAYERS)}",
+        )
+    if layer == "heatmap":
+        if metric not in HEATMAP_METRICS:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Metrica invalida. Use: {', '.join(HEATMAP_METRICS)}",
+            )
+        layer = f"heatmap:{metric}"
+    if not valid_tile(z, x, y):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Tile invalido")
+
+    scope = tenant_scopes.resolve(db, current_user)
+    if scope.unrestricted:
+        found = db.query(Farm.id).filter(Farm.id == farm_id, Farm.deleted_at.is_(None)).first()
+    else:
+        found = scope.has_farm(farm_id)
+    if not found:
+        raise HTTPException(status_code=404, detail="Fazenda nao encontrada")
+
+    tile = TileService(db).render(farm_id, layer, z, x, y)
+    etag = '"' + hashlib.sha256(tile).hexdigest()[:32] + '"'
+    not_modified = conditional_response(request, response, etag)
+    if not_modified:
+        return not_modified
+    return Response(
+        content=tile,
+        media_type="image/png",
+        headers={"ETag": etag, "Cache-Control": CACHE_CONTROL},
+    )
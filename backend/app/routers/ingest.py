@@ -0,0 +1,41 @@
+"""Rotas de ingestao HTTP de leituras (gateways e pipeline de visao)."""
+
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from sqlalchemy.orm import Session
+
+from app.core.deps import ApiKeySensor
+from app.database import get_db
+from app.schemas.ingest import IngestResult
+from app.services.ingest_service import IngestService, parse_payload
+
+router = APIRouter()
+
+NDJSON_CONTENT_TYPES = ("application/x-ndjson", "application/ndjson", "application/jsonl")
+
+
+@router.post("", response_model=IngestResult)
+async def ingest_readings(
+    request: Request,
+    sensor: ApiKeySensor,
+    db: Session = Depends(get_db),
+):
+    """Recebe um lote de leituras do sensor dono da chave (cabecalho X-API-Key).
+
+    O corpo pode ser JSON (lista de leituras ou {"readings": [...]}) ou NDJSON
+    (Content-Type application/x-ndjson). Cada leitura tem:
+        type: soil, vision ou weather (padrao: categoria do tipo de sensor)
+        time: ISO 8601 ou epoch em segundos (padrao: agora)
+        demais campos: colunas de valores do conjunto (moisture, ndvi, rainfall...)
+
+    Leituras invalidas sao rejeitadas individualmente; reenvios (mesmo time)
+    sao contados como duplicados.
+    """
+    content_type = request.headers.get("content-type", "").split(";")[0].strip()
+    try:
+        readings = parse_payload(await request.body(), content_type in NDJSON_CONTENT_TYPES)
+        return IngestService(db).ingest(sensor, readings)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e),
+        ) from e
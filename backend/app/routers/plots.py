@@ -3,15 +3,27 @@
 from datetime import datetime, timezone
 from uuid import UUID
 
-from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from sqlalchemy import func, select
 from sqlalchemy.orm import Session
 
+from app.config import settings
 from app.core.deps import CurrentUser
+from app.core.downsampling import DOWNSAMPLE_METHODS, downsample_rows
+from app.core.etag import compute_etag, conditional_response, fetch_markers
+from app.core.fields import parse_fields
+from app.core.pagination import Keyset, Page, paginate
+from app.core.pubsub import publish_farm_event
+from app.core.responses import serialize_response
+from app.core.scoring import latest_by_plot, score_plots
+from app.core.spatial import bbox_filter
+from app.core.tenant import tenant_scopes
 from app.database import get_db
 from app.models.farm import Farm, Plot
 from app.models.sensor import Sensor
 from app.models.timeseries import SoilReading, VisionData
 from app.schemas.plot import PlotCreate, PlotResponse, PlotUpdate
+from app.schemas.serializers import soil_readings_adapter, vision_data_adapter
 from app.schemas.timeseries import (
     PlotWithReadingsResponse,
     SoilReadingResponse,
@@ -20,34 +32,47 @@ from app.schemas.timeseries import (
 
 router = APIRouter()
 
+PLOT_KEYSET = Keyset("plots", (Plot.created_at, Plot.id))
+
 
 def get_user_plots_query(db: Session, current_user):
     """Retorna query base para plots do usuário."""
     query = db.query(Plot).filter(Plot.deleted_at.is_(None))
 
-    if not current_user.is_superuser:
-        # Filtra por fazendas da organização do usuário
-        query = query.join(Farm).filter(Farm.organization_id == current_user.organization_id)
-
-    return query
+    # Filtra pelos talhões das fazendas da organização do usuário
+    scope = tenant_scopes.resolve(db, current_user)
+    return scope.restrict(query, Plot.id, scope.plot_ids)
 
 
 @router.get("/", response_model=list[PlotResponse])
 async def list_plots(
+    request: Request,
+    response: Response,
     current_user: CurrentUser,
+    page: Page,
     db: Session = Depends(get_db),
     farm_id: UUID | None = None,
+    bbox: str | None = None,
+    fields: str | None = None,
 ):
     """Lista talhões.
 
-    Opcionalmente filtra por fazenda.
+    Opcionalmente filtra por fazenda. Paginada por cursor (cursor, limit,
+    include_total; ver app.core.pagination). fields limita os campos da
+    resposta (ex: id,name,farm_id). bbox (min_lng,min_lat,max_lng,max_lat,
+    com farm_id) retorna apenas os talhões visíveis no mapa.
     """
+    fieldset = parse_fields(fields, PlotResponse)
     query = get_user_plots_query(db, current_user)
 
     if farm_id:
         query = query.filter(Plot.farm_id == farm_id)
+    query = bbox_filter(db, query, Plot.id, "plots", farm_id, bbox)
+    if fieldset:
+        query = fieldset.apply(query, Plot, *PLOT_KEYSET.columns)
 
-    return query.all()
+    plots = paginate(query, PLOT_KEYSET, page, request, response)
+    return fieldset.serialize(plots, response) if fieldset else plots
 
 
 @router.get("/{plot_id}", response_model=PlotResponse)
@@ -100,7 +125,10 @@ async def create_plot(
         created_by=current_user.id,
     )
     db.add(plot)
+    db.flush()  # Para obter o ID
+    publish_farm_event(db, "plot", farm.id, farm.organization_id, plot_id=plot.id)
     db.commit()
+    tenant_scopes.invalidate(farm.organization_id)
     db.refresh(plot)
     return plot
 
@@ -123,6 +151,7 @@ async def update_plot(
     for field, value in update_data.items():
         setattr(plot, field, value)
 
+    publish_farm_event(db, "plot", plot.farm_id, plot.farm.organization_id, plot_id=plot.id)
     db.commit()
     db.refresh(plot)
     return plot
@@ -142,7 +171,40 @@ async def delete_plot(
         raise HTTPException(status_code=404, detail="Talhao nao encontrado")
 
     plot.deleted_at = datetime.now(timezone.utc)
+    organization_id = plot.farm.organization_id
+    publish_farm_event(db, "plot", plot.farm_id, organization_id, plot_id=plot.id)
     db.commit()
+    tenant_scopes.invalidate(organization_id)
+
+
+SOIL_METRICS = ("moisture", "temperature", "ec", "ph", "nitrogen", "phosphorus", "potassium")
+VISION_METRICS = (
+    "water_stress_level",
+    "fruit_count",
+    "avg_fruit_size",
+    "flowering_percentage",
+    "chlorophyll_level",
+    "ndvi",
+    "vegetative_stress",
+    "maturity_index",
+)
+
+
+def validate_downsampling(metric: str, metrics: tuple[str, ...], method: str) -> None:
+    """Valida metrica e metodo de reducao de pontos."""
+    if metric not in metrics:
+        raise HTTPException(status_code=400, detail="Metrica invalida para reducao de pontos")
+    if method not in DOWNSAMPLE_METHODS:
+        raise HTTPException(status_code=400, detail="Metodo de reducao invalido")
+
+
+def fetch_downsampling_source(readings_query, model) -> list:
+    """Carrega as leituras do periodo como linhas simples (sem objetos ORM)."""
+    return (
+        readings_query.with_entities(*model.__table__.columns)
+        .limit(settings.downsample_source_limit)
+        .all()
+    )
 
 
 @router.get("/{plot_id}/soil-readings", response_model=list[SoilReadingResponse])
@@ -153,6 +215,10 @@ async def get_plot_soil_readings(
     start_time: datetime | None = None,
     end_time: datetime | None = None,
     limit: int = Query(default=100, le=1000),
+    max_points: int | None = Query(default=None, ge=3, le=5000),
+    metric: str = "moisture",
+    downsample: str = "lttb",
+    fields: str | None = None,
 ):
     """Obtem leituras de solo de um talhao.
 
@@ -160,7 +226,16 @@ async def get_plot_soil_readings(
         start_time: Filtrar leituras a partir desta data
         end_time: Filtrar leituras ate esta data
         limit: Numero maximo de leituras (padrao: 100, max: 1000)
+        max_points: Reduz todo o periodo a no maximo N pontos (ignora limit)
+        metric: Metrica usada na reducao (moisture, temperature, ec, ph, nitrogen, phosphorus, potassium)
+        downsample: Metodo de reducao (lttb, minmax)
+        fields: Campos da resposta separados por virgula (ex: time,moisture)
     """
+    if max_points:
+        validate_downsampling(metric, SOIL_METRICS, downsample)
+    fieldset = parse_fields(fields, SoilReadingResponse)
+    adapter = fieldset.adapter if fieldset else soil_readings_adapter
+
     query = get_user_plots_query(db, current_user)
     plot = query.filter(Plot.id == plot_id).first()
 
@@ -178,7 +253,18 @@ async def get_plot_soil_readings(
     if end_time:
         readings_query = readings_query.filter(SoilReading.time <= end_time)
 
-    return readings_query.limit(limit).all()
+    if max_points:
+        readings = downsample_rows(
+            fetch_downsampling_source(readings_query, SoilReading),
+            metric,
+            max_points,
+            downsample,
+        )
+        return serialize_response(adapter, readings)
+
+    if fieldset:
+        readings_query = fieldset.apply(readings_query, SoilReading)
+    return serialize_response(adapter, readings_query.limit(limit).all())
 
 
 @router.get("/{plot_id}/vision-data", response_model=list[VisionDataResponse])
@@ -189,6 +275,10 @@ async def get_plot_vision_data(
     start_time: datetime | None = None,
     end_time: datetime | None = None,
     limit: int = Query(default=100, le=1000),
+    max_points: int | None = Query(default=None, ge=3, le=5000),
+    metric: str = "ndvi",
+    downsample: str = "lttb",
+    fields: str | None = None,
 ):
     """Obtem dados de visao computacional de um talhao.
 
@@ -196,7 +286,17 @@ async def get_plot_vision_data(
         start_time: Filtrar dados a partir desta data
         end_time: Filtrar dados ate esta data
         limit: Numero maximo de registros (padrao: 100, max: 1000)
+        max_points: Reduz todo o periodo a no maximo N pontos (ignora limit)
+        metric: Metrica usada na reducao (ndvi, water_stress_level, fruit_count, etc)
+        downsample: Metodo de reducao (lttb, minmax)
+        fields: Campos da resposta separados por virgula (ex: time,ndvi); sem
+            image_urls e extra_data as colunas JSONB nao sao lidas
     """
+    if max_points:
+        validate_downsampling(metric, VISION_METRICS, downsample)
+    fieldset = parse_fields(fields, VisionDataResponse)
+    adapter = fieldset.adapter if fieldset else vision_data_adapter
+
     query = get_user_plots_query(db, current_user)
     plot = query.filter(Plot.id == plot_id).first()
 
@@ -214,97 +314,24 @@ async def get_plot_vision_data(
     if end_time:
         vision_query = vision_query.filter(VisionData.time <= end_time)
 
-    return vision_query.limit(limit).all()
-
-
-def calculate_plot_status(soil: SoilReading | None, vision: VisionData | None) -> str:
-    """Calcula status do talhao baseado nas leituras."""
-    if not soil:
-        return "offline"
-
-    moisture = float(soil.moisture) if soil.moisture else None
-    ph = float(soil.ph) if soil.ph else None
-    temp = float(soil.temperature) if soil.temperature else None
-
-    if moisture is not None and (moisture < 10 or moisture > 35):
-        return "critical"
-    if ph is not None and (ph < 5.5 or ph > 8.0):
-        return "critical"
-    if temp is not None and temp > 40:
-        return "critical"
-
-    if moisture is not None and (moisture < 15 or moisture > 30):
-        return "warning"
-    if ph is not None and (ph < 6.0 or ph > 7.5):
-        return "warning"
-    if temp is not None and (temp < 15 or temp > 35):
-        return "warning"
-
-    if vision:
-        if vision.pests_detected:
-            return "warning"
-        if vision.irrigation_failures > 0:
-            return "warning"
-        stress = float(vision.water_stress_level) if vision.water_stress_level else 0
-        if stress > 70:
-            return "critical"
-
-    return "ok"
-
-
-def calculate_health_score(soil: SoilReading | None, vision: VisionData | None) -> int:
-    """Calcula score de saude do talhao (0-100)."""
-    if not soil:
-        return 50
-
-    score = 100
-
-    moisture = float(soil.moisture) if soil.moisture else None
-    ph = float(soil.ph) if soil.ph else None
-    temp = float(soil.temperature) if soil.temperature else None
-
-    if moisture is not None:
-        if 18 <= moisture <= 28:
-            pass
-        elif 14 <= moisture <= 32:
-            score -= 10
-        else:
-            score -= 25
-
-    if ph is not None:
-        if 6.0 <= ph <= 7.5:
-            pass
-        elif 5.5 <= ph <= 8.0:
-            score -= 10
-        else:
-            score -= 25
-
-    if temp is not None:
-        if 18 <= temp <= 32:
-            pass
-        elif 15 <= temp <= 38:
-            score -= 10
-        else:
-            score -= 20
-
-    if vision:
-        ndvi = float(vision.ndvi) if vision.ndvi else None
-        if ndvi is not None:
-            if ndvi >= 0.6:
-                score += 10
-            elif ndvi < 0.4:
-                score -= 15
-
-        if vision.pests_detected:
-            score -= 15
-        if vision.irrigation_failures > 0:
-            score -= 10
-
-    return max(0, min(100, score))
+    if max_points:
+        vision_data = downsample_rows(
+            fetch_downsampling_source(vision_query, VisionData),
+            metric,
+            max_points,
+            downsample,
+        )
+        return serialize_response(adapter, vision_data)
+
+    if fieldset:
+        vision_query = fieldset.apply(vision_query, VisionData)
+    return serialize_response(adapter, vision_query.limit(limit).all())
 
 
 @router.get("/with-readings/", response_model=list[PlotWithReadingsResponse])
 async def list_plots_with_readings(
+    request: Request,
+    response: Response,
     current_user: CurrentUser,
     db: Session = Depends(get_db),
     farm_id: UUID | None = None,
@@ -314,52 +341,77 @@ async def list_plots_with_readings(
 
     Retorna os talhoes com a ultima leitura de solo e dados de visao,
     alem de status calculado e score de saude.
+
+    Suporta GET condicional: responde 304 se If-None-Match corresponder ao
+    ETag atual (derivado da ultima alteracao dos talhoes, sensores e leituras).
     """
     query = get_user_plots_query(db, current_user)
 
     if farm_id:
         query = query.filter(Plot.farm_id == farm_id)
 
-    plots = query.all()
-    result = []
-
-    for plot in plots:
-        soil_reading = None
-        vision_data = None
-        sensors_count = 0
-
-        if include_readings:
-            soil_reading = (
-                db.query(SoilReading)
-                .filter(SoilReading.plot_id == plot.id)
-                .order_by(SoilReading.time.desc())
-                .first()
-            )
+    plot_ids = query.with_entities(Plot.id).scalar_subquery()
+    markers = fetch_markers(
+        db,
+        query.with_entities(func.count(Plot.id)).scalar_subquery(),
+        query.with_entities(func.max(Plot.updated_at)).scalar_subquery(),
+        select(func.max(SoilReading.time))
+        .where(SoilReading.plot_id.in_(plot_ids))
+        .scalar_subquery(),
+        select(func.max(VisionData.time))
+        .where(VisionData.plot_id.in_(plot_ids))
+        .scalar_subquery(),
+        select(func.count(Sensor.id))
+        .where(Sensor.plot_id.in_(plot_ids), Sensor.deleted_at.is_(None))
+        .scalar_subquery(),
+        select(func.max(Sensor.updated_at))
+        .where(Sensor.plot_id.in_(plot_ids), Sensor.deleted_at.is_(None))
+        .scalar_subquery(),
+    )
+    etag = compute_etag(
+        "plots_with_readings",
+        current_user,
+        {"farm_id": farm_id, "include_readings": include_readings},
+        markers,
+    )
+    not_modified = conditional_response(request, response, etag)
+    if not_modified:
+        return not_modified
 
-            vision_data = (
-                db.query(VisionData)
-                .filter(VisionData.plot_id == plot.id)
-                .order_by(VisionData.time.desc())
-                .first()
+    plots = query.all()
+    plot_ids = [plot.id for plot in plots]
+    soil_readings: dict = {}
+    vision_readings: dict = {}
+    sensor_counts: dict = {}
+
+    if include_readings:
+        soil_readings = latest_by_plot(db, SoilReading, plot_ids)
+        vision_readings = latest_by_plot(db, VisionData, plot_ids)
+        sensor_counts = dict(
+            db.query(Sensor.plot_id, func.count(Sensor.id))
+            .filter(
+                Sensor.plot_id.in_(plot_ids),
+                Sensor.deleted_at.is_(None),
+                Sensor.is_active == True,
             )
+            .group_by(Sensor.plot_id)
+            .all()
+        )
 
-            sensors_count = (
-                db.query(Sensor)
-                .filter(
-                    Sensor.plot_id == plot.id,
-                    Sensor.deleted_at.is_(None),
-                    Sensor.is_active == True,
-                )
-                .count()
-            )
+    scores = score_plots(
+        [plot.crop_type for plot in plots],
+        [soil_readings.get(plot.id) for plot in plots],
+        [vision_readings.get(plot.id) for plot in plots],
+    )
+    result = []
 
-        status = calculate_plot_status(soil_reading, vision_data)
-        health_score = calculate_health_score(soil_reading, vision_data)
+    for i, plot in enumerate(plots):
+        soil_reading = soil_readings.get(plot.id)
+        vision_data = vision_readings.get(plot.id)
 
         estimated_yield = None
         if vision_data and vision_data.fruit_count and plot.tree_count:
-            avg_fruit_weight = 0.35
-            estimated_yield = vision_data.fruit_count * avg_fruit_weight
+            estimated_yield = vision_data.fruit_count * float(scores.fruit_weight_kg[i])
 
         result.append(
             PlotWithReadingsResponse(
@@ -380,11 +432,11 @@ async def list_plots_with_readings(
                 is_active=plot.is_active,
                 created_at=plot.created_at,
                 updated_at=plot.updated_at,
-                status=status,
-                health_score=health_score,
+                status=str(scores.status[i]),
+                health_score=int(scores.health_score[i]),
                 current_soil_reading=soil_reading,
                 current_vision_data=vision_data,
-                sensors_count=sensors_count,
+                sensors_count=sensor_counts.get(plot.id, 0),
                 estimated_yield=estimated_yield,
             )
         )
@@ -0,0 +1,78 @@
+"""Rotas de busca textual."""
+
+from datetime import datetime
+from uuid import UUID
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from sqlalchemy.orm import Session
+
+from app.core.deps import CurrentUser
+from app.core.pagination import Page, decode_cursor, set_next_cursor
+from app.database import get_db
+from app.schemas.search import SearchResult
+from app.services.search_service import SEARCH_TYPES, SearchService, search_keyset
+
+router = APIRouter()
+
+
+@router.get("/", response_model=list[SearchResult])
+async def search(
+    request: Request,
+    response: Response,
+    current_user: CurrentUser,
+    page: Page,
+    db: Session = Depends(get_db),
+    q: str = Query(min_length=2, max_length=200),
+    types: str | None = None,
+    farm_id: UUID | None = None,
+    plot_id: UUID | None = None,
+    start_date: datetime | None = None,
+    end_date: datetime | None = None,
+):
+    """Busca textual em eventos, alertas e anotacoes da organizacao.
+
+    Parametros:
+        q: Termos da busca ("frase exata", OR e -termo sao aceitos)
+        types: Tipos separados por virgula (event, alert, note; padrao: todos)
+        farm_id: Filtrar por fazenda
+        plot_id: Filtrar por talhao
+        start_date: Itens a partir desta data
+        end_date: Itens ate esta data
+        cursor / limit / include_total: Paginacao, do mais ao menos relevante
+            (padrao: 20 por pagina; ver app.core.pagination)
+
+    O snippet e HTML seguro: o texto encontrado vem escapado (html.escape) e
+    so os termos da busca ficam entre <mark></mark>.
+    """
+    if types:
+        kinds = tuple(dict.fromkeys(kind.strip() for kind in types.split(",") if kind.strip()))
+        if not kinds or any(kind not in SEARCH_TYPES for kind in kinds):
+            raise HTTPException(
+                status_code=400,
+                detail=f"Tipo invalido. Use: {', '.join(SEARCH_TYPES)}",
+            )
+    else:
+        kinds = SEARCH_TYPES
+
+    filters = {
+        "types": kinds,
+        "organization_id": None if current_user.is_superuser else current_user.organization_id,
+        "farm_id": farm_id,
+        "plot_id": plot_id,
+        "start_date": start_date,
+        "end_date": end_date,
+    }
+    service = SearchService(db)
+    keyset = search_keyset(kinds[0], None)
+
+    if page.include_total:
+        response.headers["X-Total-Count"] = str(service.count(q, **filters))
+
+    limit = page.limit or 20
+    after = decode_cursor(keyset, page.cursor) if page.cursor else None
+    results = service.search(q, limit=limit + 1, after=after, **filters)
+    if len(results) > limit:
+        results = results[:limit]
+        last = results[-1]
+        set_next_cursor(keyset, [last["rank"], last["timestamp"], last["id"]], request, response)
+    return results
@@ -3,19 +3,38 @@
 from datetime import datetime, timedelta, timezone
 from uuid import UUID
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from sqlalchemy import func, select
 from sqlalchemy.orm import Session
 
-from app.core.deps import CurrentUser
+from app.config import settings
+from app.core.api_keys import api_key_cache, generate_api_key, hash_api_key
+from app.core.cache import response_cache
+from app.core.deps import CurrentOrgOwner, CurrentUser
+from app.core.etag import compute_etag, conditional_response, fetch_markers
+from app.core.fields import parse_fields
+from app.core.pagination import Keyset, Page, paginate
+from app.core.pubsub import publish_farm_event
+from app.core.spatial import bbox_filter
+from app.core.tenant import tenant_scopes
 from app.database import get_db
 from app.models.farm import Farm, Plot
 from app.models.sensor import Sensor, SensorType
 from app.models.timeseries import SoilReading
-from app.schemas.sensor import SensorHealthIssueResponse, SensorHeatmapData, SensorResponse
+from app.schemas.ingest import SensorApiKeyResponse
+from app.schemas.sensor import (
+    HeatmapRasterResponse,
+    SensorHealthIssueResponse,
+    SensorHeatmapData,
+    SensorResponse,
+)
+from app.services.heatmap_service import HEATMAP_METRICS, HeatmapService
 from app.services.sensor_type_service import SensorTypeService
 
 router = APIRouter()
 
+SENSOR_KEYSET = Keyset("sensors", (Sensor.created_at, Sensor.id))
+
 
 def get_user_sensors_query(db: Session, current_user):
     """Retorna query base para sensores do usuario."""
@@ -29,11 +48,16 @@ def get_user_sensors_query(db: Session, current_user):
 
 @router.get("/", response_model=list[SensorResponse])
 async def list_sensors(
+    request: Request,
+    response: Response,
     current_user: CurrentUser,
+    page: Page,
     db: Session = Depends(get_db),
     farm_id: UUID | None = None,
     plot_id: UUID | None = None,
     is_online: bool | None = None,
+    bbox: str | None = None,
+    fields: str | None = None,
 ):
     """Lista sensores da organizacao.
 
@@ -41,7 +65,12 @@ async def list_sensors(
         farm_id: Filtrar por fazenda
         plot_id: Filtrar por talhao
         is_online: Filtrar por status online/offline
+        bbox: Apenas sensores visiveis no retangulo min_lng,min_lat,max_lng,max_lat
+            (exige farm_id)
+        cursor / limit / include_total: Paginacao (ver app.core.pagination)
+        fields: Campos da resposta separados por virgula (ex: id,name,is_online)
     """
+    fieldset = parse_fields(fields, SensorResponse)
     query = get_user_sensors_query(db, current_user)
 
     if farm_id:
@@ -50,8 +79,12 @@ async def list_sensors(
         query = query.filter(Sensor.plot_id == plot_id)
     if is_online is not None:
         query = query.filter(Sensor.is_online == is_online)
+    query = bbox_filter(db, query, Sensor.id, "sensors", farm_id, bbox)
+    if fieldset:
+        query = fieldset.apply(query, Sensor, *SENSOR_KEYSET.columns)
 
-    return query.all()
+    sensors = paginate(query, SENSOR_KEYSET, page, request, response)
+    return fieldset.serialize(sensors, response) if fieldset else sensors
 
 
 @router.get("/health-issues", response_model=list[SensorHealthIssueResponse])
@@ -133,6 +166,8 @@ async def get_sensor_health_issues(
 
 @router.get("/heatmap-data", response_model=list[SensorHeatmapData])
 async def get_heatmap_data(
+    request: Request,
+    response: Response,
     current_user: CurrentUser,
     db: Session = Depends(get_db),
     farm_id: UUID | None = None,
@@ -143,13 +178,39 @@ async def get_heatmap_data(
 
     Parametros:
         farm_id: Filtrar por fazenda
+
+    Suporta GET condicional via ETag/If-None-Match.
     """
     query = get_user_sensors_query(db, current_user)
 
     if farm_id:
         query = query.filter(Sensor.farm_id == farm_id)
 
-    sensors = query.filter(Sensor.is_active == True).all()
+    query = query.filter(Sensor.is_active == True)
+
+    sensor_ids = query.with_entities(Sensor.id).scalar_subquery()
+    markers = fetch_markers(
+        db,
+        query.with_entities(func.count(Sensor.id)).scalar_subquery(),
+        query.with_entities(func.max(Sensor.updated_at)).scalar_subquery(),
+        select(func.max(SoilReading.time))
+        .where(SoilReading.sensor_id.in_(sensor_ids))
+        .scalar_subquery(),
+        select(func.max(Plot.updated_at))
+        .where(Plot.id.in_(query.with_entities(Sensor.plot_id).scalar_subquery()))
+        .scalar_subquery(),
+    )
+    etag = compute_etag("heatmap", current_user, {"farm_id": farm_id}, markers)
+    not_modified = conditional_response(request, response, etag)
+    if not_modified:
+        return not_modified
+
+    cache_key = response_cache.build_key("heatmap", current_user, farm_id=farm_id)
+    cached = response_cache.get(cache_key)
+    if cached is not None:
+        return cached
+
+    sensors = query.all()
     result = []
 
     for sensor in sensors:
@@ -205,7 +266,59 @@ async def get_heatmap_data(
             )
         )
 
-    return result
+    # Superuser consulta todas as organizacoes: entrada no escopo global
+    return response_cache.set(
+        cache_key,
+        result,
+        farm_id=farm_id,
+        organization_id=None if current_user.is_superuser else current_user.organization_id,
+    )
+
+
+@router.get("/heatmap-raster", response_model=HeatmapRasterResponse)
+async def get_heatmap_raster(
+    farm_id: UUID,
+    current_user: CurrentUser,
+    db: Session = Depends(get_db),
+    metric: str = "soilMoisture",
+    resolution: int = Query(default=settings.heatmap_grid_size, ge=8),
+):
+    """Retorna o heatmap da fazenda ja interpolado (IDW) sobre os talhoes.
+
+    Parametros:
+        farm_id: Fazenda
+        metric: soilMoisture, temperature, electricalConductivity, ph,
+            nitrogen, phosphorus ou potassium
+        resolution: Celulas no maior lado da grade (ate HEATMAP_MAX_GRID_SIZE)
+
+    O raster fica em cache ate chegarem novas leituras da fazenda.
+    """
+    if metric not in HEATMAP_METRICS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Metrica invalida. Use: {', '.join(HEATMAP_METRICS)}",
+        )
+    resolution = min(resolution, settings.heatmap_max_grid_size)
+
+    scope = tenant_scopes.resolve(db, current_user)
+    if scope.unrestricted:
+        found = db.query(Farm.id).filter(Farm.id == farm_id, Farm.deleted_at.is_(None)).first()
+    else:
+        found = scope.has_farm(farm_id)
+    if not found:
+        raise HTTPException(status_code=404, detail="Fazenda nao encontrada")
+
+    cache_key = response_cache.build_key(
+        "heatmap_raster", current_user, farm_id=farm_id, metric=metric, resolution=resolution
+    )
+    cached = response_cache.get(cache_key)
+    if cached is not None:
+        return cached
+
+    result = HeatmapService(db).raster(farm_id, metric, resolution)
+    return response_cache.set(
+        cache_key, result, farm_id=farm_id, ttl=settings.heatmap_cache_ttl_seconds
+    )
 
 
 @router.get("/types")
@@ -241,6 +354,32 @@ async def get_sensor(
     return sensor
 
 
+@router.post("/{sensor_id}/api-key", response_model=SensorApiKeyResponse)
+async def rotate_sensor_api_key(
+    sensor_id: UUID,
+    current_user: CurrentOrgOwner,
+    db: Session = Depends(get_db),
+):
+    """Gera uma nova chave de API para o sensor (a anterior deixa de valer).
+
+    A chave e exibida apenas nesta resposta; o banco guarda so o hash.
+    Apenas owners da organizacao podem gerar chaves.
+    """
+    query = get_user_sensors_query(db, current_user)
+    sensor = query.filter(Sensor.id == sensor_id).first()
+
+    if not sensor:
+        raise HTTPException(status_code=404, detail="Sensor não encontrado")
+
+    api_key = generate_api_key()
+    sensor.api_key = hash_api_key(api_key)
+    publish_farm_event(db, "sensor", sensor.farm_id, sensor.organization_id, sensor_id=sensor.id)
+    db.commit()
+    api_key_cache.invalidate_sensor(sensor.id)
+
+    return SensorApiKeyResponse(sensor_id=sensor.id, api_key=api_key)
+
+
 @router.delete("/{sensor_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_sensor(
     sensor_id: UUID,
@@ -255,4 +394,7 @@ async def delete_sensor(
         raise HTTPException(status_code=404, detail="Sensor não encontrado")
 
     sensor.deleted_at = datetime.now(timezone.utc)
+    publish_farm_event(db, "sensor", sensor.farm_id, sensor.organization_id, sensor_id=sensor.id)
     db.commit()
+    tenant_scopes.invalidate(sensor.organization_id)
+    api_key_cache.invalidate_sensor(sensor.id)
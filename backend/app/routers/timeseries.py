@@ -0,0 +1,48 @@
+"""Rotas de consulta de series temporais."""
+
+from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy.orm import Session
+
+from app.core.deps import CurrentUser
+from app.database import get_db
+from app.schemas.timeseries import TimeseriesQueryRequest, TimeseriesQueryResponse
+from app.services.timeseries_service import SCOPES, TimeseriesService
+
+router = APIRouter()
+
+
+@router.post("/query", response_model=TimeseriesQueryResponse)
+async def query_timeseries(
+    query_data: TimeseriesQueryRequest,
+    current_user: CurrentUser,
+    db: Session = Depends(get_db),
+):
+    """Consulta metricas agregadas por intervalo de tempo.
+
+    Corpo:
+        metrics: Metricas no formato fonte.metrica (ex: soil.moisture, weather.temperature)
+        scope: Tipo das entidades consultadas (sensor, plot, farm)
+        entity_ids: Ids das entidades do escopo
+        start_time / end_time: Periodo (end_time padrao: agora)
+        bucket: Largura do intervalo (ex: 15m, 1h, 1d)
+        aggregates: avg, min, max, first, last, count ou percentis (p50, p95...)
+        group_by: Separar series por sensor, plot e/ou farm
+    """
+    if query_data.scope not in SCOPES:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Escopo invalido (use sensor, plot ou farm)",
+        )
+
+    service = TimeseriesService(db)
+    allowed = service.accessible_entity_ids(query_data.scope, query_data.entity_ids, current_user)
+    if set(query_data.entity_ids) - allowed:
+        raise HTTPException(status_code=404, detail="Entidade nao encontrada")
+
+    try:
+        return service.query(query_data)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e),
+        ) from e
@@ -2,26 +2,34 @@
 
 from uuid import UUID
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
 from sqlalchemy.orm import Session
 
 from app.core.deps import CurrentOrgOwner, CurrentUser
+from app.core.pagination import Keyset, Page, paginate
 from app.database import get_db
+from app.models.organization import User
 from app.schemas.auth import PasswordReset
 from app.schemas.user import UserCreate, UserResponse, UserUpdate
 from app.services.user_service import UserService
 
 router = APIRouter()
 
+USER_KEYSET = Keyset("users", (User.created_at, User.id))
+
 
 @router.get("/", response_model=list[UserResponse])
 async def list_users(
+    request: Request,
+    response: Response,
     current_user: CurrentOrgOwner,
+    page: Page,
     db: Session = Depends(get_db),
 ):
     """Lista usuários da organização.
 
     Apenas owners da organização podem listar todos os usuários.
+    Paginada por cursor (cursor, limit, include_total; ver app.core.pagination).
     """
     if not current_user.organization_id:
         raise HTTPException(
@@ -30,7 +38,8 @@ async def list_users(
         )
 
     user_service = UserService(db)
-    users = user_service.get_users_by_organization(current_user.organization_id)
+    query = user_service.users_by_organization_query(current_user.organization_id)
+    users = paginate(query, USER_KEYSET, page, request, response)
     return [UserResponse.from_user(u) for u in users]
 
 
@@ -60,7 +69,7 @@ async def create_user(
             detail="Email já está em uso nesta organização",
         )
 
-    user = user_service.create_user(
+    user = await user_service.create_user(
         user_data,
         organization_id=current_user.organization_id,
         created_by=current_user.id,
@@ -242,6 +251,6 @@ async def reset_user_password(
             detail="A senha deve ter no mínimo 8 caracteres",
         )
 
-    user_service.change_password(user, password_data.new_password)
+    await user_service.change_password(user, password_data.new_password)
 
     return {"message": "Senha redefinida com sucesso"}
@@ -8,6 +8,7 @@ from app.schemas.alert import (
     AlertUpdate,
 )
 from app.schemas.analytics import (
+    ForecastPoint,
     ForecastResponse,
     HistoricalDataPoint,
     HistoricalDataResponse,
@@ -25,6 +26,8 @@ from app.schemas.event import (
     ProductData,
 )
 from app.schemas.farm import FarmBase, FarmCreate, FarmResponse, FarmUpdate
+from app.schemas.ingest import IngestError, IngestResult, SensorApiKeyResponse
+from app.schemas.job import JobResponse
 from app.schemas.organization import (
     OrganizationBase,
     OrganizationCreate,
@@ -33,9 +36,12 @@ from app.schemas.organization import (
     OrganizationWithOwner,
 )
 from app.schemas.plot import PlotBase, PlotCreate, PlotResponse, PlotUpdate
+from app.schemas.search import SearchResult
 from app.schemas.sensor import (
     SensorCreate,
     SensorHealthIssueResponse,
+    SensorProvisioningError,
+    SensorProvisioningResult,
     SensorResponse,
     SensorUpdate,
 )
@@ -48,8 +54,13 @@ from app.schemas.sensor_type import (
 from app.schemas.timeseries import (
     PlotWithReadingsResponse,
     SoilReadingResponse,
+    TimeseriesPoint,
+    TimeseriesQueryRequest,
+    TimeseriesQueryResponse,
+    TimeseriesSeries,
     VisionDataResponse,
 )
+from app.schemas.tree import TreeResponse
 from app.schemas.user import (
     SuperUserCreate,
     UserBase,
@@ -57,6 +68,7 @@ from app.schemas.user import (
     UserResponse,
     UserUpdate,
 )
+from app.schemas.weather import WeatherPoint, WeatherResponse
 
 __all__ = [
     # Alert
@@ -69,6 +81,7 @@ __all__ = [
     "SnapshotCreate",
     "SnapshotResponse",
     "ProductionAnalyticsResponse",
+    "ForecastPoint",
     "ForecastResponse",
     "HistoricalDataPoint",
     "HistoricalDataResponse",
@@ -101,16 +114,26 @@ __all__ = [
     "FarmCreate",
     "FarmUpdate",
     "FarmResponse",
+    # Ingest
+    "IngestError",
+    "IngestResult",
+    # Job
+    "JobResponse",
     # Plot
     "PlotBase",
     "PlotCreate",
     "PlotUpdate",
     "PlotResponse",
+    # Search
+    "SearchResult",
     # Sensor
     "SensorCreate",
     "SensorUpdate",
     "SensorResponse",
     "SensorHealthIssueResponse",
+    "SensorProvisioningError",
+    "SensorProvisioningResult",
+    "SensorApiKeyResponse",
     # SensorType
     "SensorTypeBase",
     "SensorTypeCreate",
@@ -120,4 +143,13 @@ __all__ = [
     "SoilReadingResponse",
     "VisionDataResponse",
     "PlotWithReadingsResponse",
+    "TimeseriesQueryRequest",
+    "TimeseriesQueryResponse",
+    "TimeseriesSeries",
+    "TimeseriesPoint",
+    # Tree
+    "TreeResponse",
+    # Weather
+    "WeatherPoint",
+    "WeatherResponse",
 ]
@@ -72,3 +72,13 @@ class AlertResponse(AlertBase):
     recurrence_count: int = 0
     created_at: datetime
     updated_at: datetime
+
+
+class AlertCountsResponse(BaseModel):
+    """Schema de resposta dos contadores de alertas abertos."""
+
+    open: int
+    unacknowledged: int
+    by_severity: dict[str, int]
+    unacknowledged_by_severity: dict[str, int]
+    by_category: dict[str, int]
@@ -64,6 +64,15 @@ class ProductionAnalyticsResponse(BaseModel):
     snapshots: list[dict]
 
 
+class ForecastPoint(BaseModel):
+    """Ponto da curva de previsao (producao estimada e intervalo de confianca)."""
+
+    date: date
+    yield_kg: float
+    lower_kg: float
+    upper_kg: float
+
+
 class ForecastResponse(BaseModel):
     """Schema de resposta de previsao de producao."""
 
@@ -73,6 +82,10 @@ class ForecastResponse(BaseModel):
     harvest_end: date | None = None
     plots_ready: int
     plots_in_progress: int
+    plots_forecasted: int = 0
+    confidence_level: float = 0.95
+    fitted_at: datetime | None = None
+    forecast: list[ForecastPoint] = []
 
 
 class HistoricalDataPoint(BaseModel):
@@ -10,6 +10,13 @@ class Token(BaseModel):
     token_type: str = "bearer"
 
 
+class StreamToken(BaseModel):
+    """Token curto para abrir um stream (EventSource)."""
+
+    token: str
+    expires_in: int
+
+
 class TokenPayload(BaseModel):
     """Payload do token JWT."""
 
@@ -0,0 +1,30 @@
+"""Schemas da ingestao HTTP de leituras."""
+
+from uuid import UUID
+
+from pydantic import BaseModel
+
+
+class IngestError(BaseModel):
+    """Leitura rejeitada (indice na requisicao, a partir de 0)."""
+
+    index: int
+    message: str
+
+
+class IngestResult(BaseModel):
+    """Contagens de um lote de leituras."""
+
+    sensor_id: UUID
+    received: int
+    accepted: dict[str, int] = {}
+    duplicates: int = 0
+    rejected: int = 0
+    errors: list[IngestError] = []
+
+
+class SensorApiKeyResponse(BaseModel):
+    """Nova chave de API do sensor (exibida uma unica vez)."""
+
+    sensor_id: UUID
+    api_key: str
@@ -0,0 +1,19 @@
+"""Schemas da busca textual."""
+
+from datetime import datetime
+from uuid import UUID
+
+from pydantic import BaseModel
+
+
+class SearchResult(BaseModel):
+    """Item encontrado pela busca (evento, alerta ou anotacao)."""
+
+    type: str
+    id: UUID
+    farm_id: UUID | None = None
+    plot_id: UUID | None = None
+    title: str
+    snippet: str
+    timestamp: datetime
+    rank: float
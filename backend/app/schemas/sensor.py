@@ -20,7 +20,6 @@ class SensorResponse(BaseModel):
     dev_eui: str | None = None
     serial_number: str | None = None
     mac_address: str | None = None
-    api_key: str | None = None
     location: dict | None = None
     installation_date: datetime | None = None
     last_signal_at: datetime | None = None
@@ -68,6 +67,25 @@ class SensorUpdate(BaseModel):
     is_active: bool | None = None
 
 
+class SensorProvisioningError(BaseModel):
+    """Erro de validacao de uma linha do provisionamento em massa."""
+
+    row: int
+    field: str | None = None
+    message: str
+
+
+class SensorProvisioningResult(BaseModel):
+    """Resultado do provisionamento em massa de sensores."""
+
+    total_rows: int
+    valid_rows: int
+    created: int
+    dry_run: bool = False
+    sensor_ids: list[UUID] = []
+    errors: list[SensorProvisioningError] = []
+
+
 class SensorHealthIssueResponse(BaseModel):
     """Schema de resposta para sensor com problema de saude."""
 
@@ -97,3 +115,18 @@ class SensorHeatmapData(BaseModel):
     last_signal_at: datetime | None = None
     metrics: dict = {}
     is_critical: bool = False
+
+
+class HeatmapRasterResponse(BaseModel):
+    """Schema do raster interpolado de uma metrica sobre os talhoes."""
+
+    farm_id: UUID
+    metric: str
+    bounds: dict | None = None
+    width: int
+    height: int
+    values: list[list[float | None]]
+    min_value: float | None = None
+    max_value: float | None = None
+    sensors: int
+    generated_at: datetime
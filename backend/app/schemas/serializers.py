@@ -0,0 +1,17 @@
+"""Serializadores pre-construidos para os schemas de resposta mais usados.
+
+Construir um TypeAdapter compila o validador/serializador do pydantic-core;
+fazer isso uma unica vez na importacao evita o custo por requisicao.
+Usar com app.core.responses.serialize_response.
+"""
+
+from pydantic import TypeAdapter
+
+from app.schemas.alert import AlertResponse
+from app.schemas.event import EventResponse
+from app.schemas.timeseries import SoilReadingResponse, VisionDataResponse
+
+soil_readings_adapter = TypeAdapter(list[SoilReadingResponse])
+vision_data_adapter = TypeAdapter(list[VisionDataResponse])
+events_adapter = TypeAdapter(list[EventResponse])
+alerts_adapter = TypeAdapter(list[AlertResponse])
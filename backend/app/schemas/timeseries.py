@@ -4,7 +4,7 @@ from datetime import datetime
 from decimal import Decimal
 from uuid import UUID
 
-from pydantic import BaseModel, ConfigDict
+from pydantic import BaseModel, ConfigDict, Field
 
 
 class SoilReadingResponse(BaseModel):
@@ -79,3 +79,41 @@ class PlotWithReadingsResponse(BaseModel):
     current_vision_data: VisionDataResponse | None = None
     sensors_count: int = 0
     estimated_yield: Decimal | None = None
+
+
+class TimeseriesQueryRequest(BaseModel):
+    """Consulta generica de series temporais agregadas por intervalo."""
+
+    metrics: list[str] = Field(..., min_length=1, max_length=20)
+    scope: str
+    entity_ids: list[UUID] = Field(..., min_length=1, max_length=500)
+    start_time: datetime
+    end_time: datetime | None = None
+    bucket: str = "1h"
+    aggregates: list[str] = Field(default=["avg"], min_length=1, max_length=10)
+    group_by: list[str] = []
+
+
+class TimeseriesPoint(BaseModel):
+    """Valor agregado de um intervalo."""
+
+    time: datetime
+    value: float | None = None
+
+
+class TimeseriesSeries(BaseModel):
+    """Serie de uma metrica/agregacao para um grupo."""
+
+    metric: str
+    aggregate: str
+    group: dict[str, UUID] = {}
+    points: list[TimeseriesPoint] = []
+
+
+class TimeseriesQueryResponse(BaseModel):
+    """Resposta da consulta de series temporais."""
+
+    bucket: str
+    start_time: datetime
+    end_time: datetime
+    series: list[TimeseriesSeries] = []
@@ -0,0 +1,27 @@
+"""Schemas de árvore."""
+
+from datetime import date, datetime
+from decimal import Decimal
+from uuid import UUID
+
+from pydantic import BaseModel, ConfigDict
+
+
+class TreeResponse(BaseModel):
+    """Schema de resposta de árvore."""
+
+    model_config = ConfigDict(from_attributes=True)
+
+    id: UUID
+    plot_id: UUID
+    row_id: UUID
+    tree_number: int
+    variety: str | None = None
+    planting_date: date | None = None
+    health_score: Decimal | None = None
+    fruit_count: int | None = None
+    last_inspection: date | None = None
+    coordinates: dict | None = None
+    extra_data: dict = {}
+    created_at: datetime
+    updated_at: datetime
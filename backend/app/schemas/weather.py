@@ -0,0 +1,37 @@
+"""Schemas de dados meteorologicos da fazenda."""
+
+from datetime import datetime
+from uuid import UUID
+
+from pydantic import BaseModel
+
+
+class WeatherPoint(BaseModel):
+    """Valores de um intervalo (media das estacoes da fazenda)."""
+
+    time: datetime
+    temperature_avg: float | None = None
+    temperature_min: float | None = None
+    temperature_max: float | None = None
+    humidity_avg: float | None = None
+    pressure_avg: float | None = None
+    wind_speed_avg: float | None = None
+    wind_speed_max: float | None = None
+    rainfall: float | None = None
+    solar_radiation_avg: float | None = None
+    gdd: float | None = None  # Apenas no intervalo diario
+    readings: int = 0
+
+
+class WeatherResponse(BaseModel):
+    """Schema de resposta dos dados meteorologicos da fazenda."""
+
+    farm_id: UUID
+    interval: str
+    start_time: datetime
+    end_time: datetime
+    stations: int
+    rainfall_total: float | None = None
+    gdd_total: float | None = None
+    gdd_base_temperature: float
+    points: list[WeatherPoint] = []
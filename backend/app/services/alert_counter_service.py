@@ -0,0 +1,74 @@
+"""Servico de leitura dos contadores de alertas abertos.
+
+Os contadores (tabela alert_counters) sao mantidos pelo trigger
+trg_alerts_counters em alerts, na mesma transacao que cria, reconhece,
+resolve ou remove o alerta, inclusive nas escritas em lote do avaliador de
+regras. Contar alertas vira a soma de poucas linhas por fazenda em vez de
+carregar todos os alertas abertos.
+"""
+
+from typing import Any
+from uuid import UUID
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from app.models.alert import AlertCounter
+
+ALERT_SEVERITIES = ("critical", "warning", "info")
+
+
+class AlertCounterService:
+    """Servico para consulta dos contadores de alertas."""
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def counts(
+        self,
+        organization_id: UUID | None = None,
+        farm_id: UUID | None = None,
+        plot_id: UUID | None = None,
+    ) -> dict[str, Any]:
+        """Totais de alertas abertos (nao resolvidos) e nao reconhecidos.
+
+        Parametros:
+            organization_id: Restringe a uma organizacao (None: todas)
+            farm_id: Restringe a uma fazenda
+            plot_id: Restringe a um talhao
+        """
+        query = select(
+            AlertCounter.category,
+            AlertCounter.severity,
+            func.sum(AlertCounter.open_count).label("open"),
+            func.sum(AlertCounter.unacknowledged_count).label("unacknowledged"),
+        ).group_by(AlertCounter.category, AlertCounter.severity)
+        if organization_id is not None:
+            query = query.where(AlertCounter.organization_id == organization_id)
+        if farm_id is not None:
+            query = query.where(AlertCounter.farm_id == farm_id)
+        if plot_id is not None:
+            query = query.where(AlertCounter.plot_id == plot_id)
+
+        result: dict[str, Any] = {
+            "open": 0,
+            "unacknowledged": 0,
+            "by_severity": dict.fromkeys(ALERT_SEVERITIES, 0),
+            "unacknowledged_by_severity": dict.fromkeys(ALERT_SEVERITIES, 0),
+            "by_category": {},
+        }
+        for row in self.db.execute(query):
+            if not row.open:
+                continue
+            result["open"] += row.open
+            result["unacknowledged"] += row.unacknowledged
+            result["by_severity"][row.severity] = (
+                result["by_severity"].get(row.severity, 0) + row.open
+            )
+            result["unacknowledged_by_severity"][row.severity] = (
+                result["unacknowledged_by_severity"].get(row.severity, 0) + row.unacknowledged
+            )
+            result["by_category"][row.category] = (
+                result["by_category"].get(row.category, 0) + row.open
+            )
+        return result
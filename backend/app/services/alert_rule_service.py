@@ -0,0 +1,439 @@
+"""Avaliacao periodica das regras de alerta (AlertRule.conditions).
+
+Cada regra tem uma condicao sobre uma janela de tempo, avaliada por
+talhao em todos os talhoes da organizacao (ou nos farm_ids/plot_ids da
+condicao):
+
+    {"source": "soil", "metric": "moisture", "aggregate": "avg",
+     "window": "6h", "operator": "<", "threshold": 15}
+    {"type": "no_data", "source": "soil", "window": "2h"}
+
+As regras ativas de todas as organizacoes sao compiladas em uma consulta
+agrupada por talhao para cada (fonte, janela), com todas as agregacoes da
+janela na mesma consulta. Janelas de horas inteiras leem o continuous
+aggregate horario da fonte (a janela comeca no inicio da hora). A
+comparacao com os limites e feita em lote com numpy; alertas novos sao
+inseridos e alertas de condicoes normalizadas (ou de regras desativadas)
+sao resolvidos em lote. Roda como job em background (ver app.core.jobs).
+"""
+
+import logging
+import operator
+from collections import defaultdict
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Any
+from uuid import UUID, uuid4
+
+import numpy as np
+from sqlalchemy import column, select, table, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.core.pubsub import publish_farm_event
+from app.models.alert import Alert, AlertRule
+from app.models.farm import Farm, Plot
+from app.models.job import BackgroundJob
+from app.models.sensor import Sensor
+from app.services.timeseries_service import SOURCES, TimeseriesService, parse_bucket
+
+logger = logging.getLogger(__name__)
+
+ALERT_RULE_JOB = "alert_rules"
+
+# Valor de Alert.source dos alertas abertos pelas regras
+RULE_ALERT_SOURCE = "alert_rule"
+
+CONDITION_TYPES = ("threshold", "no_data")
+RULE_SOURCES = ("soil", "vision")
+RULE_AGGREGATES = ("avg", "min", "max", "last", "count")
+
+OPERATORS = {
+    "<": operator.lt,
+    "<=": operator.le,
+    ">": operator.gt,
+    ">=": operator.ge,
+    "==": operator.eq,
+    "!=": operator.ne,
+}
+
+_AGGREGATE_LABELS = {
+    "avg": "Media",
+    "min": "Minimo",
+    "max": "Maximo",
+    "last": "Ultimo valor",
+    "count": "Leituras",
+}
+
+# Linhas por INSERT/UPDATE em lote
+_BATCH = 2000
+
+
+@dataclass(frozen=True)
+class RuleCondition:
+    """Condicao de uma regra ja validada."""
+
+    type: str
+    source: str
+    window: timedelta
+    window_label: str
+    metric: str | None = None
+    aggregate: str | None = None
+    operator: str | None = None
+    threshold: float | None = None
+    farm_ids: frozenset[UUID] = frozenset()
+    plot_ids: frozenset[UUID] = frozenset()
+
+    @property
+    def column_key(self) -> tuple[str, str] | None:
+        if self.type != "threshold":
+            return None
+        return self.metric, self.aggregate
+
+
+def parse_condition(conditions: Any) -> RuleCondition:
+    """Valida o JSON de AlertRule.conditions.
+
+    Levanta ValueError com a descricao do problema.
+    """
+    if not isinstance(conditions, dict):
+        raise ValueError("conditions deve ser um objeto")
+
+    condition_type = conditions.get("type", "threshold")
+    if condition_type not in CONDITION_TYPES:
+        raise ValueError(f"Tipo de condicao invalido: {condition_type}")
+
+    source = conditions.get("source", "soil")
+    if source not in RULE_SOURCES:
+        raise ValueError(f"Fonte invalida: {source}")
+
+    window_label = str(conditions.get("window", ""))
+    window = parse_bucket(window_label)
+    if window > timedelta(hours=settings.alert_rule_max_window_hours):
+        raise ValueError(f"Janela maior que {settings.alert_rule_max_window_hours}h")
+
+    try:
+        farm_ids = frozenset(UUID(str(value)) for value in conditions.get("farm_ids") or ())
+        plot_ids = frozenset(UUID(str(value)) for value in conditions.get("plot_ids") or ())
+    except ValueError:
+        raise ValueError("farm_ids/plot_ids invalidos") from None
+
+    if condition_type == "no_data":
+        return RuleCondition(
+            type=condition_type,
+            source=source,
+            window=window,
+            window_label=window_label,
+            farm_ids=farm_ids,
+            plot_ids=plot_ids,
+        )
+
+    metric = conditions.get("metric")
+    if metric not in SOURCES[source].metrics:
+        raise ValueError(f"Metrica invalida: {source}.{metric}")
+    aggregate = conditions.get("aggregate", "avg")
+    if aggregate not in RULE_AGGREGATES:
+        raise ValueError(f"Agregacao invalida: {aggregate}")
+    comparison = conditions.get("operator")
+    if comparison not in OPERATORS:
+        raise ValueError(f"Operador invalido: {comparison}")
+    try:
+        threshold = float(conditions["threshold"])
+    except (KeyError, TypeError, ValueError):
+        raise ValueError("threshold deve ser numerico") from None
+
+    return RuleCondition(
+        type=condition_type,
+        source=source,
+        window=window,
+        window_label=window_label,
+        metric=metric,
+        aggregate=aggregate,
+        operator=comparison,
+        threshold=threshold,
+        farm_ids=farm_ids,
+        plot_ids=plot_ids,
+    )
+
+
+class AlertRuleService:
+    """Servico para avaliacao em lote das regras de alerta."""
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def _window_values(
+        self,
+        source_name: str,
+        window: timedelta,
+        keys: set[tuple[str, str]],
+        plots,
+        now: datetime,
+    ) -> dict[UUID, dict]:
+        """Agregacoes da janela por talhao em uma unica consulta agrupada.
+
+        Talhoes sem leitura na janela nao aparecem no resultado.
+        """
+        source = SOURCES[source_name]
+        rollup = source.rollup
+        metrics = sorted({metric for metric, _ in keys})
+        use_rollup = (
+            rollup is not None
+            and window % rollup.bucket == timedelta(0)
+            and all(metric in rollup.metrics for metric in metrics)
+        )
+
+        if use_rollup:
+            relation = table(
+                rollup.name,
+                column("bucket"),
+                column("plot_id"),
+                *(
+                    column(f"{metric}_{suffix}")
+                    for metric in metrics
+                    for suffix in ("sum", "count", "min", "max", "last")
+                ),
+            )
+            time_col = relation.c.bucket
+            start = (now - window).replace(minute=0, second=0, microsecond=0)
+        else:
+            relation = source.table
+            time_col = relation.c.time
+            start = now - window
+
+        value_cols = []
+        for metric, aggregate in sorted(keys):
+            if use_rollup:
+                expr = TimeseriesService._rollup_aggregate(relation, metric, aggregate)
+            else:
+                expr = TimeseriesService._raw_aggregate(
+                    relation.c[metric], time_col, aggregate, None
+                )
+            value_cols.append(expr.label(f"{metric}__{aggregate}"))
+
+        statement = (
+            select(relation.c.plot_id, *value_cols)
+            .where(time_col >= start, time_col <= now, relation.c.plot_id.in_(plots))
+            .group_by(relation.c.plot_id)
+        )
+        return {row.plot_id: row._mapping for row in self.db.execute(statement)}
+
+    def evaluate(self) -> dict[str, Any]:
+        """Avalia todas as regras ativas e abre/resolve os alertas."""
+        now = datetime.now(timezone.utc)
+
+        rules = []
+        invalid = 0
+        for rule in self.db.query(AlertRule).filter(AlertRule.is_active == True):
+            try:
+                rules.append((rule, parse_condition(rule.conditions)))
+            except ValueError as e:
+                invalid += 1
+                logger.warning("Regra de alerta %s ignorada: %s", rule.id, e)
+
+        organizations = {rule.organization_id for rule, _ in rules}
+        plot_query = (
+            select(Plot.id, Plot.farm_id, Farm.organization_id)
+            .join(Farm, Farm.id == Plot.farm_id)
+            .where(
+                Plot.deleted_at.is_(None),
+                Farm.deleted_at.is_(None),
+                Farm.organization_id.in_(organizations),
+            )
+        )
+        plots = self.db.execute(plot_query).all() if organizations else []
+        index = {plot.id: i for i, plot in enumerate(plots)}
+        plot_ids = np.array([plot.id for plot in plots], dtype=object)
+        plot_farms = np.array([plot.farm_id for plot in plots], dtype=object)
+        by_organization: dict[UUID, list[int]] = defaultdict(list)
+        for i, plot in enumerate(plots):
+            by_organization[plot.organization_id].append(i)
+
+        # Uma consulta por (fonte, janela) com todas as agregacoes necessarias
+        windows: dict[tuple[str, timedelta], set[tuple[str, str]]] = defaultdict(set)
+        for _, condition in rules:
+            keys = windows[(condition.source, condition.window)]
+            if condition.column_key:
+                keys.add(condition.column_key)
+
+        plot_subquery = plot_query.with_only_columns(Plot.id).scalar_subquery()
+        has_data: dict[tuple[str, timedelta], np.ndarray] = {}
+        values: dict[tuple[str, timedelta, str, str], np.ndarray] = {}
+        for (source_name, window), keys in windows.items():
+            rows = self._window_values(source_name, window, keys, plot_subquery, now)
+            present = np.zeros(len(plots), dtype=bool)
+            columns = {key: np.full(len(plots), np.nan) for key in keys}
+            for plot_id, row in rows.items():
+                i = index.get(plot_id)
+                if i is None:
+                    continue
+                present[i] = True
+                for metric, aggregate in keys:
+                    value = row[f"{metric}__{aggregate}"]
+                    if value is not None:
+                        columns[(metric, aggregate)][i] = float(value)
+            has_data[(source_name, window)] = present
+            for (metric, aggregate), array in columns.items():
+                values[(source_name, window, metric, aggregate)] = array
+
+        # Sem leitura so conta em talhoes com sensor ativo
+        monitored = np.zeros(len(plots), dtype=bool)
+        if any(condition.type == "no_data" for _, condition in rules):
+            for (plot_id,) in self.db.execute(
+                select(Sensor.plot_id)
+                .where(
+                    Sensor.plot_id.in_(plot_subquery),
+                    Sensor.is_active == True,
+                    Sensor.deleted_at.is_(None),
+                )
+                .distinct()
+            ):
+                if plot_id in index:
+                    monitored[index[plot_id]] = True
+
+        # Alertas abertos pelas regras, por regra
+        open_alerts: dict[UUID, list] = defaultdict(list)
+        for row in self.db.execute(
+            select(
+                Alert.id, Alert.source_id, Alert.plot_id, Alert.farm_id, Alert.organization_id
+            ).where(Alert.source == RULE_ALERT_SOURCE, Alert.resolved_at.is_(None))
+        ):
+            open_alerts[row.source_id].append(row)
+
+        new_alerts = []
+        resolved = []
+        affected: set[tuple[UUID | None, UUID]] = set()
+        for rule, condition in rules:
+            candidates = np.array(by_organization.get(rule.organization_id, []), dtype=np.int64)
+            if condition.farm_ids:
+                candidates = candidates[
+                    np.array([plot_farms[i] in condition.farm_ids for i in candidates], dtype=bool)
+                ]
+            if condition.plot_ids:
+                candidates = candidates[
+                    np.array([plot_ids[i] in condition.plot_ids for i in candidates], dtype=bool)
+                ]
+
+            observed = np.full(len(plots), np.nan)
+            triggered = np.zeros(len(plots), dtype=bool)
+            evaluable = np.zeros(len(plots), dtype=bool)
+            if condition.type == "no_data":
+                evaluable[candidates] = monitored[candidates]
+                triggered[candidates] = evaluable[candidates] & ~has_data[
+                    (condition.source, condition.window)
+                ][candidates]
+            else:
+                key = (condition.source, condition.window, condition.metric, condition.aggregate)
+                observed[candidates] = values[key][candidates]
+                evaluable[candidates] = ~np.isnan(observed[candidates])
+                with np.errstate(invalid="ignore"):
+                    triggered[candidates] = evaluable[candidates] & OPERATORS[condition.operator](
+                        observed[candidates], condition.threshold
+                    )
+            in_scope = np.zeros(len(plots), dtype=bool)
+            in_scope[candidates] = True
+
+            already_open = set()
+            for existing in open_alerts.pop(rule.id, ()):
+                i = index.get(existing.plot_id)
+                if i is not None and triggered[i]:
+                    already_open.add(i)
+                elif i is None or not in_scope[i] or evaluable[i]:
+                    # Condicao normalizada ou talhao fora do escopo da regra
+                    resolved.append(existing.id)
+                    affected.add((existing.farm_id, existing.organization_id))
+
+            for i in np.flatnonzero(triggered):
+                if i in already_open:
+                    continue
+                value = None if condition.type == "no_data" else float(observed[i])
+                new_alerts.append(self._alert_row(rule, condition, plots[i], value, now))
+                affected.add((plots[i].farm_id, rule.organization_id))
+
+        # Alertas de regras desativadas, removidas ou invalidas
+        for rows in open_alerts.values():
+            for existing in rows:
+                resolved.append(existing.id)
+                affected.add((existing.farm_id, existing.organization_id))
+
+        table_ = Alert.__table__
+        opened = 0
+        for start in range(0, len(new_alerts), _BATCH):
+            result = self.db.execute(
+                insert(table_)
+                .values(new_alerts[start:start + _BATCH])
+                .on_conflict_do_nothing(
+                    index_elements=["source_id", "plot_id"],
+                    index_where=(table_.c.source == RULE_ALERT_SOURCE)
+                    & table_.c.resolved_at.is_(None),
+                )
+            )
+            opened += result.rowcount
+        for start in range(0, len(resolved), _BATCH):
+            self.db.execute(
+                update(table_)
+                .where(table_.c.id.in_(resolved[start:start + _BATCH]))
+                .values(
+                    resolved_at=now,
+                    resolution_notes="Resolvido automaticamente: condicao normalizada",
+                    updated_at=now,
+                )
+            )
+
+        for farm_id, organization_id in affected:
+            publish_farm_event(self.db, "alert", farm_id, organization_id, action="evaluated")
+        self.db.commit()
+
+        return {
+            "rules": len(rules),
+            "invalid_rules": invalid,
+            "plots": len(plots),
+            "queries": len(windows),
+            "opened": opened,
+            "resolved": len(resolved),
+        }
+
+    @staticmethod
+    def _alert_row(
+        rule: AlertRule,
+        condition: RuleCondition,
+        plot,
+        value: float | None,
+        now: datetime,
+    ) -> dict[str, Any]:
+        if condition.type == "no_data":
+            alert_type = "rule_no_data"
+            message = f"Sem leituras de {condition.source} ha mais de {condition.window_label}"
+        else:
+            alert_type = f"rule_{condition.metric}"
+            message = (
+                f"{_AGGREGATE_LABELS[condition.aggregate]} de {condition.metric} "
+                f"({condition.source}) em {condition.window_label}: {value:.2f} "
+                f"(limite {condition.operator} {condition.threshold:g})"
+            )
+        return {
+            "id": uuid4(),
+            "organization_id": rule.organization_id,
+            "farm_id": plot.farm_id,
+            "plot_id": plot.id,
+            "category": rule.category,
+            "severity": rule.severity,
+            "type": alert_type,
+            "title": rule.name,
+            "message": message,
+            "source": RULE_ALERT_SOURCE,
+            "source_id": rule.id,
+            "timestamp": now,
+            "recurrence_count": 1,
+            "extra_data": {
+                "rule_id": str(rule.id),
+                "conditions": rule.conditions,
+                "value": value,
+            },
+        }
+
+
+def run_alert_rule_job(db: Session, job: BackgroundJob) -> dict[str, Any]:
+    """Handler do job de avaliacao das regras de alerta."""
+    return AlertRuleService(db).evaluate()
@@ -0,0 +1,289 @@
+"""Servico de exportacao de leituras das hypertables."""
+
+import csv
+import io
+import json
+import os
+import tempfile
+import threading
+from collections.abc import Iterator
+from datetime import datetime
+from uuid import UUID
+
+import orjson
+from sqlalchemy import Boolean, DateTime, Integer, Numeric, Select, SmallInteger, select
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.core.responses import json_default
+from app.database import SessionLocal
+from app.models.farm import Plot
+from app.models.sensor import Sensor
+from app.models.timeseries import SoilReading, UplinkTelemetry, VisionData, WeatherData
+
+# Conjuntos exportaveis: nome -> modelo da hypertable
+DATASETS = {
+    "soil": SoilReading,
+    "vision": VisionData,
+    "weather": WeatherData,
+    "uplink": UplinkTelemetry,
+}
+
+EXPORT_FORMATS = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+}
+
+# Formatos colunares (requerem o extra opcional pyarrow)
+COLUMNAR_FORMATS = {
+    "parquet": "application/vnd.apache.parquet",
+    "arrow": "application/vnd.apache.arrow.stream",
+}
+
+
+def _csv_value(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, dict | list):
+        return json.dumps(value)
+    return value
+
+
+class ExportService:
+    """Servico para exportacao de leituras em lotes com cursor no servidor."""
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    @staticmethod
+    def build_query(
+        dataset: str,
+        farm_id: UUID,
+        plot_id: UUID | None = None,
+        sensor_id: UUID | None = None,
+        start_time: datetime | None = None,
+        end_time: datetime | None = None,
+    ) -> Select:
+        """Monta a consulta do conjunto limitada a uma fazenda, em ordem de tempo.
+
+        O filtro por talhao so se aplica a soil e vision.
+        """
+        model = DATASETS[dataset]
+        stmt = select(*model.__table__.columns)
+
+        if model is WeatherData:
+            stmt = stmt.where(WeatherData.farm_id == farm_id)
+        elif model is UplinkTelemetry:
+            farm_sensors = select(Sensor.id).where(Sensor.farm_id == farm_id)
+            stmt = stmt.where(UplinkTelemetry.sensor_id.in_(farm_sensors))
+        else:
+            farm_plots = select(Plot.id).where(Plot.farm_id == farm_id)
+            stmt = stmt.where(model.plot_id.in_(farm_plots))
+            if plot_id:
+                stmt = stmt.where(model.plot_id == plot_id)
+
+        if sensor_id:
+            stmt = stmt.where(model.sensor_id == sensor_id)
+        if start_time:
+            stmt = stmt.where(model.time >= start_time)
+        if end_time:
+            stmt = stmt.where(model.time <= end_time)
+
+        return stmt.order_by(model.time)
+
+    def iter_batches(self, stmt: Select) -> Iterator[tuple[list[str], list]]:
+        """Percorre o resultado em lotes de EXPORT_BATCH_SIZE linhas.
+
+        Com yield_per o psycopg2 usa um cursor nomeado (server-side), entao
+        apenas um lote fica em memoria por vez.
+        """
+        result = self.db.execute(stmt.execution_options(yield_per=settings.export_batch_size))
+        columns = list(result.keys())
+        for rows in result.partitions():
+            yield columns, rows
+
+    def iter_ndjson(self, stmt: Select) -> Iterator[bytes]:
+        """Gera uma linha JSON por leitura."""
+        for columns, rows in self.iter_batches(stmt):
+            yield b"".join(
+                orjson.dumps(dict(zip(columns, row, strict=True)), default=json_default) + b"\n"
+                for row in rows
+            )
+
+    def iter_csv(self, stmt: Select) -> Iterator[str]:
+        """Gera CSV com cabecalho; colunas JSONB sao serializadas como JSON."""
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        header_written = False
+
+        for columns, rows in self.iter_batches(stmt):
+            if not header_written:
+                writer.writerow(columns)
+                header_written = True
+            for row in rows:
+                writer.writerow(_csv_value(value) for value in row)
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+
+        if not header_written:
+            yield ",".join(column.name for column in stmt.selected_columns) + "\r\n"
+
+    def _arrow_schema(self, stmt: Select):
+        """Mapeia as colunas da consulta para tipos Arrow.
+
+        Numeric vira float64 e colunas UUID/JSONB viram texto.
+        """
+        import pyarrow as pa
+
+        fields = []
+        for column in stmt.selected_columns:
+            if isinstance(column.type, DateTime):
+                arrow_type = pa.timestamp("us", tz="UTC")
+            elif isinstance(column.type, Boolean):
+                arrow_type = pa.bool_()
+            elif isinstance(column.type, SmallInteger):
+                arrow_type = pa.int16()
+            elif isinstance(column.type, Integer):
+                arrow_type = pa.int32()
+            elif isinstance(column.type, Numeric):
+                arrow_type = pa.float64()
+            else:
+                arrow_type = pa.string()
+            fields.append(pa.field(column.name, arrow_type))
+        return pa.schema(fields)
+
+    def _copy_to(self, stmt: Select, target) -> None:
+        """Executa COPY ... TO STDOUT (CSV) da consulta para um arquivo."""
+        compiled = stmt.compile(dialect=self.db.get_bind().dialect)
+        params = {
+            key: str(value) if isinstance(value, UUID) else value
+            for key, value in compiled.params.items()
+        }
+        raw_connection = self.db.connection().connection
+        with raw_connection.cursor() as cursor:
+            cursor.execute("SET LOCAL TIME ZONE 'UTC'")
+            query = cursor.mogrify(str(compiled), params).decode()
+            cursor.copy_expert(f"COPY ({query}) TO STDOUT WITH (FORMAT csv, HEADER true)", target)
+
+    def iter_record_batches(self, stmt: Select) -> Iterator:
+        """Gera RecordBatches do Arrow a partir do COPY da consulta.
+
+        O COPY roda em uma thread escrevendo em um pipe, lido pelo leitor CSV
+        do pyarrow em blocos enquanto o banco ainda envia linhas, sem criar
+        objetos Python por linha. Se o consumidor para antes do fim, o pipe
+        e fechado e o COPY e interrompido.
+        """
+        import pyarrow.csv as pa_csv
+
+        schema = self._arrow_schema(stmt)
+        read_fd, write_fd = os.pipe()
+        failure: list[BaseException] = []
+
+        def copy() -> None:
+            try:
+                with open(write_fd, "wb") as target:
+                    self._copy_to(stmt, target)
+            except BaseException as e:
+                failure.append(e)
+
+        thread = threading.Thread(target=copy, name="export-copy", daemon=True)
+        thread.start()
+        try:
+            with open(read_fd, "rb") as source:
+                reader = pa_csv.open_csv(
+                    source,
+                    read_options=pa_csv.ReadOptions(block_size=settings.export_arrow_block_size),
+                    convert_options=pa_csv.ConvertOptions(
+                        column_types=schema,
+                        strings_can_be_null=True,
+                        quoted_strings_can_be_null=False,
+                        true_values=["t"],
+                        false_values=["f"],
+                    ),
+                )
+                yield from reader
+        finally:
+            thread.join()
+            # BrokenPipeError: o leitor foi fechado antes do fim (cliente saiu)
+            if failure and not isinstance(failure[0], BrokenPipeError):
+                raise failure[0]
+
+    def write_columnar(self, stmt: Select, export_format: str, sink) -> int:
+        """Escreve a consulta em Parquet ou Arrow IPC (stream). Retorna o total de linhas."""
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        schema = self._arrow_schema(stmt)
+        if export_format == "parquet":
+            writer = pq.ParquetWriter(sink, schema, compression="zstd")
+        else:
+            writer = pa.ipc.new_stream(sink, schema)
+
+        rows = 0
+        with writer:
+            for batch in self.iter_record_batches(stmt):
+                writer.write_batch(batch)
+                rows += batch.num_rows
+        return rows
+
+    def iter_arrow_stream(self, stmt: Select) -> Iterator[bytes]:
+        """Gera o Arrow IPC (stream) lote a lote, sem arquivo intermediario."""
+        import pyarrow as pa
+
+        buffer = io.BytesIO()
+
+        def drain() -> bytes:
+            data = buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+            return data
+
+        with pa.ipc.new_stream(buffer, self._arrow_schema(stmt)) as writer:
+            for batch in self.iter_record_batches(stmt):
+                writer.write_batch(batch)
+                if chunk := drain():
+                    yield chunk
+        # Esquema (se nao houve lotes) e marcador de fim do stream
+        yield drain()
+
+
+def stream_export(stmt: Select, export_format: str) -> Iterator[bytes | str]:
+    """Gera o arquivo de exportacao usando uma sessao propria.
+
+    A sessao da requisicao e encerrada antes do fim do streaming, por isso
+    o gerador abre e fecha a sua.
+    """
+    db = SessionLocal()
+    try:
+        service = ExportService(db)
+        if export_format == "csv":
+            yield from service.iter_csv(stmt)
+        else:
+            yield from service.iter_ndjson(stmt)
+    finally:
+        db.close()
+
+
+def stream_columnar_export(stmt: Select, export_format: str) -> Iterator[bytes]:
+    """Gera o arquivo Parquet/Arrow usando uma sessao propria.
+
+    Arrow IPC (stream) e enviado lote a lote conforme o COPY avanca. O
+    Parquet so e valido com o rodape escrito no fim, entao e gerado em
+    disco e enviado em blocos depois de completo.
+    """
+    db = SessionLocal()
+    try:
+        service = ExportService(db)
+        if export_format == "arrow":
+            yield from service.iter_arrow_stream(stmt)
+            db.rollback()
+            return
+        with tempfile.TemporaryFile() as output:
+            service.write_columnar(stmt, export_format, output)
+            db.rollback()
+            output.seek(0)
+            while chunk := output.read(1024 * 1024):
+                yield chunk
+    finally:
+        db.close()
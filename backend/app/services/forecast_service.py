@@ -0,0 +1,273 @@
+"""Servico de previsao de producao por talhao.
+
+O job noturno monta, para todos os talhoes, uma serie diaria da producao
+estimada (kg) nos ultimos forecast_lookback_days: o estimated_yield_kg dos
+snapshots e, nos dias sem snapshot, a media diaria de frutos do
+vision_data vezes o peso de fruto do perfil da cultura. Uma tendencia
+linear e ajustada por minimos quadrados em todos os talhoes de uma vez
+(matriz talhoes x dias com numpy) e a curva prevista, com intervalo de
+predicao de 95%, e gravada em plot_yield_forecasts. A rota de previsao
+apenas soma as curvas gravadas dos talhoes da fazenda.
+"""
+
+from datetime import date, datetime, timedelta, timezone
+from typing import Any
+from uuid import UUID, uuid4
+
+import numpy as np
+from sqlalchemy import Date, cast, delete, func, select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.core.pubsub import publish_farm_event
+from app.core.scoring import compiled_profiles
+from app.models.analytics import PlotProductionSnapshot, PlotYieldForecast
+from app.models.farm import Farm, Plot
+from app.models.job import BackgroundJob
+from app.models.timeseries import VisionData
+
+FORECAST_JOB = "forecasts"
+
+CONFIDENCE_LEVEL = 0.95
+
+# Quantil 97,5% da t de Student por graus de liberdade (1 a 30); acima, normal
+_T_975 = np.array([
+    np.nan, 12.706, 4.303, 3.182, 2.776, 2.571, 2.447, 2.365, 2.306, 2.262, 2.228,
+    2.201, 2.179, 2.160, 2.145, 2.131, 2.120, 2.110, 2.101, 2.093, 2.086,
+    2.080, 2.074, 2.069, 2.064, 2.060, 2.056, 2.052, 2.048, 2.045, 2.042,
+])
+_Z_975 = 1.96
+
+# Pontos da curva (dias a partir do ajuste)
+CURVE_STEP_DAYS = 7
+
+# Linhas por INSERT (limite de parametros do Postgres)
+_UPSERT_BATCH = 2000
+
+
+def fit_trends(series: np.ndarray, offsets: np.ndarray, min_points: int) -> dict[str, np.ndarray]:
+    """Ajusta y = a + b*x em cada linha da matriz (NaN = dia sem dado).
+
+    Parametros:
+        series: Matriz talhoes x dias (x = indice do dia)
+        offsets: Dias apos o ultimo dia da matriz em que a curva e avaliada
+        min_points: Minimo de dias com dado para o ajuste ser valido
+
+    Retorna arrays por talhao (valid, n, slope, intercept, residual_std) e
+    matrizes talhoes x offsets (prediction, lower, upper).
+    """
+    _, days = series.shape
+    x = np.arange(days, dtype=np.float64)
+    observed = ~np.isnan(series)
+    n = observed.sum(axis=1)
+    safe_n = np.maximum(n, 1)
+
+    xs = np.where(observed, x, 0.0)
+    ys = np.where(observed, series, 0.0)
+    x_mean = xs.sum(axis=1) / safe_n
+    y_mean = ys.sum(axis=1) / safe_n
+    sxx = (xs * xs).sum(axis=1) - n * x_mean**2
+    sxy = (xs * ys).sum(axis=1) - n * x_mean * y_mean
+    flat = sxx <= 0
+    slope = np.where(flat, 0.0, sxy / np.where(flat, 1.0, sxx))
+    intercept = y_mean - slope * x_mean
+
+    residuals = np.where(observed, series - (intercept[:, None] + slope[:, None] * x), 0.0)
+    dof = np.maximum(n - 2, 1)
+    residual_std = np.sqrt((residuals**2).sum(axis=1) / dof)
+    t = np.where(n - 2 <= 30, _T_975[np.clip(n - 2, 1, 30)], _Z_975)
+
+    future = (days - 1) + offsets[None, :].astype(np.float64)
+    prediction = intercept[:, None] + slope[:, None] * future
+    leverage = np.where(
+        flat[:, None], 0.0, (future - x_mean[:, None]) ** 2 / np.where(flat, 1.0, sxx)[:, None]
+    )
+    std_error = residual_std[:, None] * np.sqrt(1 + 1 / safe_n[:, None] + leverage)
+    margin = t[:, None] * std_error
+
+    return {
+        "valid": n >= max(min_points, 3),
+        "n": n,
+        "slope": slope,
+        "intercept": intercept,
+        "residual_std": residual_std,
+        "prediction": np.maximum(prediction, 0.0),
+        "lower": np.maximum(prediction - margin, 0.0),
+        "upper": np.maximum(prediction + margin, 0.0),
+    }
+
+
+class ForecastService:
+    """Servico para ajuste e consulta das previsoes de producao."""
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def _yield_series(self, plots: list, start: date, days: int) -> np.ndarray:
+        """Matriz talhoes x dias da producao estimada (kg), NaN sem dado."""
+        index = {plot.id: i for i, plot in enumerate(plots)}
+        plot_ids = list(index)
+        series = np.full((len(plots), days), np.nan)
+
+        # Frutos detectados (media diaria) convertidos pelo perfil da cultura
+        fruit_weight = compiled_profiles().for_plots(
+            [plot.crop_type for plot in plots]
+        )["fruit_weight_kg"]
+        day = cast(func.date_trunc("day", VisionData.time), Date).label("day")
+        vision = self.db.execute(
+            select(VisionData.plot_id, day, func.avg(VisionData.fruit_count).label("fruits"))
+            .where(
+                VisionData.plot_id.in_(plot_ids),
+                VisionData.time >= datetime.combine(start, datetime.min.time(), timezone.utc),
+                VisionData.fruit_count.is_not(None),
+            )
+            .group_by(VisionData.plot_id, day)
+        )
+        for row in vision:
+            offset = (row.day - start).days
+            if 0 <= offset < days:
+                i = index[row.plot_id]
+                series[i, offset] = float(row.fruits) * fruit_weight[i]
+
+        # Snapshots tem prioridade sobre a estimativa do dia
+        snapshots = self.db.execute(
+            select(
+                PlotProductionSnapshot.plot_id,
+                PlotProductionSnapshot.snapshot_date,
+                PlotProductionSnapshot.estimated_yield_kg,
+            ).where(
+                PlotProductionSnapshot.plot_id.in_(plot_ids),
+                PlotProductionSnapshot.snapshot_date >= start,
+                PlotProductionSnapshot.estimated_yield_kg.is_not(None),
+            )
+        )
+        for row in snapshots:
+            offset = (row.snapshot_date - start).days
+            if 0 <= offset < days:
+                series[index[row.plot_id], offset] = float(row.estimated_yield_kg)
+        return series
+
+    def fit(self, organization_id: UUID | None = None) -> dict[str, Any]:
+        """Ajusta e grava os modelos dos talhoes (todas as organizacoes se None)."""
+        today = date.today()
+        days = settings.forecast_lookback_days
+        start = today - timedelta(days=days - 1)
+
+        query = (
+            select(Plot.id, Plot.farm_id, Plot.crop_type, Farm.organization_id)
+            .join(Farm, Farm.id == Plot.farm_id)
+            .where(Plot.deleted_at.is_(None), Farm.deleted_at.is_(None))
+        )
+        if organization_id:
+            query = query.where(Farm.organization_id == organization_id)
+        plots = self.db.execute(query).all()
+        if not plots:
+            return {"plots": 0, "fitted": 0}
+
+        offsets = np.arange(0, settings.forecast_horizon_days + 1, CURVE_STEP_DAYS)
+        curve_dates = [(today + timedelta(days=int(offset))).isoformat() for offset in offsets]
+        series = self._yield_series(plots, start, days)
+        fit = fit_trends(series, offsets, settings.forecast_min_points)
+
+        fitted_at = datetime.now(timezone.utc)
+        rows = []
+        for i in np.flatnonzero(fit["valid"]):
+            curve = [
+                {
+                    "date": curve_dates[j],
+                    "yield_kg": round(float(fit["prediction"][i, j]), 2),
+                    "lower_kg": round(float(fit["lower"][i, j]), 2),
+                    "upper_kg": round(float(fit["upper"][i, j]), 2),
+                }
+                for j in range(len(offsets))
+            ]
+            rows.append({
+                "id": uuid4(),
+                "plot_id": plots[i].id,
+                "model": "linear",
+                "fitted_at": fitted_at,
+                "base_date": start,
+                "observations": int(fit["n"][i]),
+                "slope_kg_per_day": round(float(fit["slope"][i]), 4),
+                "intercept_kg": round(float(fit["intercept"][i]), 2),
+                "residual_std_kg": round(float(fit["residual_std"][i]), 4),
+                "curve": curve,
+            })
+
+        table = PlotYieldForecast.__table__
+        for batch in range(0, len(rows), _UPSERT_BATCH):
+            statement = insert(table).values(rows[batch:batch + _UPSERT_BATCH])
+            self.db.execute(
+                statement.on_conflict_do_update(
+                    index_elements=["plot_id"],
+                    set_={
+                        name: statement.excluded[name]
+                        for name in (
+                            "model",
+                            "fitted_at",
+                            "base_date",
+                            "observations",
+                            "slope_kg_per_day",
+                            "intercept_kg",
+                            "residual_std_kg",
+                            "curve",
+                        )
+                    },
+                )
+            )
+
+        # Talhoes sem dados suficientes deixam de ter previsao
+        stale = [plot.id for plot, valid in zip(plots, fit["valid"], strict=True) if not valid]
+        if stale:
+            self.db.execute(delete(table).where(table.c.plot_id.in_(stale)))
+
+        farms = {(plot.farm_id, plot.organization_id) for plot in plots}
+        for farm, organization in farms:
+            publish_farm_event(self.db, "forecast", farm, organization)
+        self.db.commit()
+
+        return {"plots": len(plots), "fitted": len(rows)}
+
+    def farm_curve(self, plot_ids: list[UUID]) -> dict[str, Any]:
+        """Soma as curvas gravadas dos talhoes.
+
+        O intervalo da fazenda combina as margens dos talhoes em quadratura
+        (erros independentes entre talhoes).
+        """
+        forecasts = (
+            self.db.query(PlotYieldForecast.fitted_at, PlotYieldForecast.curve)
+            .filter(PlotYieldForecast.plot_id.in_(plot_ids))
+            .all()
+            if plot_ids
+            else []
+        )
+
+        # Chave por data (e nao pelo texto gravado no JSON) para somar e ordenar
+        totals: dict[date, list[float]] = {}
+        for forecast in forecasts:
+            for point in forecast.curve:
+                total = totals.setdefault(date.fromisoformat(point["date"]), [0.0, 0.0, 0.0])
+                total[0] += point["yield_kg"]
+                total[1] += (point["yield_kg"] - point["lower_kg"]) ** 2
+                total[2] += (point["upper_kg"] - point["yield_kg"]) ** 2
+
+        points = [
+            {
+                "date": day,
+                "yield_kg": round(value, 2),
+                "lower_kg": round(max(value - low**0.5, 0.0), 2),
+                "upper_kg": round(value + high**0.5, 2),
+            }
+            for day, (value, low, high) in sorted(totals.items())
+        ]
+        return {
+            "points": points,
+            "plots_forecasted": len(forecasts),
+            "fitted_at": max((forecast.fitted_at for forecast in forecasts), default=None),
+        }
+
+
+def run_forecast_job(db: Session, job: BackgroundJob) -> dict[str, Any]:
+    """Handler do job de ajuste das previsoes."""
+    return ForecastService(db).fit(organization_id=job.organization_id)
@@ -0,0 +1,237 @@
+"""Servico de rasters interpolados para o heatmap de solo.
+
+Em vez de enviar os pontos dos sensores para o navegador interpolar, a API
+monta uma grade sobre os talhoes da fazenda e calcula cada celula por IDW
+(inverse distance weighting) a partir da ultima leitura de cada sensor. A
+interpolacao e vetorizada com numpy (celulas x sensores, em blocos) e so e
+feita nas celulas que caem dentro de algum poligono de talhao; as demais
+ficam nulas. O resultado fica no cache de respostas ate a proxima leitura
+(ou alteracao de cadastro) da fazenda.
+"""
+
+import math
+from datetime import datetime, timezone
+from typing import Any
+from uuid import UUID
+
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.core.spatial import geometry_bounds
+from app.models.farm import Plot
+from app.models.sensor import Sensor
+from app.models.timeseries import SoilReading
+
+# Metricas do heatmap (mesmos nomes de /api/sensors/heatmap-data)
+HEATMAP_METRICS = {
+    "soilMoisture": SoilReading.moisture,
+    "temperature": SoilReading.temperature,
+    "electricalConductivity": SoilReading.ec,
+    "ph": SoilReading.ph,
+    "nitrogen": SoilReading.nitrogen,
+    "phosphorus": SoilReading.phosphorus,
+    "potassium": SoilReading.potassium,
+}
+
+IDW_POWER = 2.0
+
+# Elementos da matriz celulas x sensores calculados por bloco
+_IDW_BLOCK = 1 << 20
+
+
+def idw_interpolate(
+    points: np.ndarray,
+    values: np.ndarray,
+    targets: np.ndarray,
+    power: float = IDW_POWER,
+) -> np.ndarray:
+    """Interpola os valores dos pontos nas posicoes alvo por IDW.
+
+    Parametros:
+        points: Matriz n x 2 com as posicoes dos sensores
+        values: Valor medido em cada sensor
+        targets: Matriz m x 2 com as posicoes a interpolar
+
+    Alvos sobre um sensor recebem exatamente o valor dele.
+    """
+    result = np.empty(len(targets))
+    if not len(points):
+        result.fill(np.nan)
+        return result
+
+    block = max(_IDW_BLOCK // len(points), 1)
+    for start in range(0, len(targets), block):
+        chunk = targets[start:start + block]
+        dx = chunk[:, 0, None] - points[None, :, 0]
+        dy = chunk[:, 1, None] - points[None, :, 1]
+        squared = dx * dx + dy * dy
+        exact = squared == 0
+        squared[exact] = 1.0
+        weights = 1.0 / (squared if power == 2 else squared ** (power / 2))
+        weights[exact.any(axis=1)] = 0.0
+        weights[exact] = 1.0
+        result[start:start + block] = (weights @ values) / weights.sum(axis=1)
+    return result
+
+
+def polygon_mask(xs: np.ndarray, ys: np.ndarray, polygon: np.ndarray) -> np.ndarray:
+    """Pontos (xs, ys) dentro do poligono (regra par-impar).
+
+    Parametros:
+        polygon: Matriz k x 2 com os vertices (x, y)
+    """
+    inside = np.zeros(xs.shape, dtype=bool)
+    x0, y0 = polygon[-1]
+    for x1, y1 in polygon:
+        crosses = (y1 > ys) != (y0 > ys)
+        if crosses.any():
+            at = x1 + (ys - y1) * (x0 - x1) / ((y0 - y1) or 1e-300)
+            inside ^= crosses & (xs < at)
+        x0, y0 = x1, y1
+    return inside
+
+
+def polygon_labels(xs: np.ndarray, ys: np.ndarray, polygons: list[np.ndarray]) -> np.ndarray:
+    """Indice do poligono que contem cada celula da grade (-1 fora de todos).
+
+    Parametros:
+        xs: Centros das colunas (crescente)
+        ys: Centros das linhas (decrescente, norte -> sul)
+        polygons: Vertices (x, y) de cada poligono
+
+    Cada poligono so testa as celulas do seu retangulo envolvente.
+    """
+    labels = np.full((len(ys), len(xs)), -1, dtype=np.int64)
+    for index, polygon in enumerate(polygons):
+        (left, bottom), (right, top) = polygon.min(axis=0), polygon.max(axis=0)
+        cols = slice(
+            np.searchsorted(xs, left, side="left"), np.searchsorted(xs, right, side="right")
+        )
+        rows = slice(
+            np.searchsorted(-ys, -top, side="left"), np.searchsorted(-ys, -bottom, side="right")
+        )
+        if cols.start >= cols.stop or rows.start >= rows.stop:
+            continue
+        grid_x, grid_y = np.meshgrid(xs[cols], ys[rows])
+        labels[rows, cols][polygon_mask(grid_x, grid_y, polygon)] = index
+    return labels
+
+
+def plot_polygon(coordinates: dict | None) -> np.ndarray | None:
+    """Vertices (lng, lat) do poligono de um talhao ([[lat, lng], ...])."""
+    if not isinstance(coordinates, dict):
+        return None
+    try:
+        polygon = np.array(coordinates.get("polygon") or [], dtype=np.float64)
+    except (TypeError, ValueError):
+        return None
+    if polygon.ndim != 2 or polygon.shape[0] < 3 or polygon.shape[1] < 2:
+        return None
+    return polygon[:, 1::-1]
+
+
+class HeatmapService:
+    """Servico para geracao dos rasters de heatmap."""
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def latest_values(self, farm_id: UUID, metric: str) -> tuple[np.ndarray, np.ndarray]:
+        """Posicoes (lng, lat) e ultimo valor da metrica de cada sensor ativo."""
+        column = HEATMAP_METRICS[metric]
+        rows = self.db.execute(
+            select(Sensor.location, column.label("value"))
+            .join(SoilReading, SoilReading.sensor_id == Sensor.id)
+            .where(
+                Sensor.farm_id == farm_id,
+                Sensor.deleted_at.is_(None),
+                Sensor.is_active == True,
+                column.is_not(None),
+            )
+            .order_by(Sensor.id, SoilReading.time.desc())
+            .distinct(Sensor.id)
+        )
+        points, values = [], []
+        for row in rows:
+            box = geometry_bounds(row.location)
+            if box is not None:
+                points.append(box[:2])
+                values.append(float(row.value))
+        return np.array(points, dtype=np.float64).reshape(-1, 2), np.array(values)
+
+    def raster(self, farm_id: UUID, metric: str, resolution: int) -> dict[str, Any]:
+        """Grade interpolada da metrica sobre os talhoes da fazenda.
+
+        Parametros:
+            metric: Chave de HEATMAP_METRICS
+            resolution: Celulas no maior lado da grade
+
+        values[linha][coluna] traz o valor no centro da celula (linha 0 ao
+        norte, coluna 0 a oeste) ou None fora dos talhoes.
+        """
+        polygons = [
+            polygon
+            for (coordinates,) in self.db.query(Plot.coordinates).filter(
+                Plot.farm_id == farm_id, Plot.deleted_at.is_(None)
+            )
+            if (polygon := plot_polygon(coordinates)) is not None
+        ]
+        points, values = self.latest_values(farm_id, metric)
+
+        result: dict[str, Any] = {
+            "farm_id": farm_id,
+            "metric": metric,
+            "bounds": None,
+            "width": 0,
+            "height": 0,
+            "values": [],
+            "min_value": None,
+            "max_value": None,
+            "sensors": len(values),
+            "generated_at": datetime.now(timezone.utc),
+        }
+        if not polygons:
+            return result
+
+        vertices = np.concatenate(polygons)
+        min_lng, min_lat = vertices.min(axis=0)
+        max_lng, max_lat = vertices.max(axis=0)
+        # Celulas quadradas em metros: longitude escalada pelo cosseno da latitude
+        scale = math.cos(math.radians((min_lat + max_lat) / 2))
+        cell = max((max_lng - min_lng) * scale, max_lat - min_lat, 1e-9) / resolution
+        width = max(math.ceil((max_lng - min_lng) * scale / cell), 1)
+        height = max(math.ceil((max_lat - min_lat) / cell), 1)
+        max_lng = min_lng + width * cell / scale
+        min_lat = max_lat - height * cell
+
+        xs = min_lng + (np.arange(width) + 0.5) * cell / scale
+        ys = max_lat - (np.arange(height) + 0.5) * cell
+        inside = polygon_labels(xs, ys, polygons) >= 0
+        grid_x, grid_y = np.meshgrid(xs, ys)
+
+        grid = np.full(grid_x.shape, np.nan)
+        if len(values) and inside.any():
+            targets = np.column_stack((grid_x[inside] * scale, grid_y[inside]))
+            sensors = np.column_stack((points[:, 0] * scale, points[:, 1]))
+            grid[inside] = idw_interpolate(sensors, values, targets)
+
+        rounded = np.round(grid, 2)
+        result.update({
+            "bounds": {
+                "min_lng": float(min_lng),
+                "min_lat": float(min_lat),
+                "max_lng": float(max_lng),
+                "max_lat": float(max_lat),
+            },
+            "width": width,
+            "height": height,
+            "values": [
+                [None if math.isnan(value) else value for value in row]
+                for row in rounded.tolist()
+            ],
+        })
+        if not np.isnan(grid).all():
+            result["min_value"] = float(np.nanmin(rounded))
+            result["max_value"] = float(np.nanmax(rounded))
+        return result
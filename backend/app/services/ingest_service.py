@@ -0,0 +1,257 @@
+"""Servico de ingestao HTTP de leituras.
+
+Recebe lotes de leituras (soil, vision, weather) de um sensor autenticado
+por chave de API, valida cada leitura contra as colunas da hypertable e
+grava cada conjunto com um unico COPY. Reenvios do mesmo lote (mesmo time
+e sensor) sao descartados e contados como duplicados.
+"""
+
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+from typing import Any
+
+import orjson
+from sqlalchemy import BigInteger, Boolean, Integer, Numeric, SmallInteger, String, text
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.core.api_keys import SensorIdentity
+from app.core.bulk import copy_rows_ignore_conflicts
+from app.core.pubsub import publish_farm_event
+from app.models.timeseries import SoilReading, VisionData, WeatherData
+from app.schemas.ingest import IngestError, IngestResult
+
+INGEST_DATASETS = {
+    "soil": SoilReading.__table__,
+    "vision": VisionData.__table__,
+    "weather": WeatherData.__table__,
+}
+
+# Colunas preenchidas a partir do sensor, nao da leitura
+_IDENTITY_COLUMNS = {"time", "sensor_id", "plot_id", "farm_id"}
+
+# Colunas de valores de cada conjunto
+VALUE_COLUMNS = {
+    name: [column for column in table.c if column.name not in _IDENTITY_COLUMNS]
+    for name, table in INGEST_DATASETS.items()
+}
+
+# Faixa de int2/int4/int8: um valor fora dela derrubaria o COPY do lote
+# (subtipos antes de Integer)
+_INTEGER_LIMITS = ((SmallInteger, 2**15), (BigInteger, 2**63), (Integer, 2**31))
+
+# Margem aceita para relogios adiantados dos gateways
+_MAX_CLOCK_SKEW = timedelta(minutes=5)
+
+
+def parse_payload(content: bytes, ndjson: bool) -> list[Any]:
+    """Converte o corpo (JSON ou NDJSON) na lista de leituras."""
+    try:
+        if ndjson:
+            return [orjson.loads(line) for line in content.splitlines() if line.strip()]
+        data = orjson.loads(content)
+    except orjson.JSONDecodeError as e:
+        raise ValueError(f"JSON invalido: {e}") from e
+
+    if isinstance(data, dict):
+        data = data.get("readings")
+    if not isinstance(data, list):
+        raise ValueError("Envie uma lista de leituras ou um objeto com 'readings'")
+    return data
+
+
+def _parse_time(value: Any, now: datetime) -> datetime:
+    if value is None:
+        return now
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        try:
+            parsed = datetime.fromtimestamp(value, tz=timezone.utc)
+        except (OverflowError, OSError):
+            # Epoch fora da faixa de datetime (ex: 1e20, inf, -1e18)
+            raise ValueError("time invalido") from None
+    elif isinstance(value, str):
+        parsed = datetime.fromisoformat(value)
+        if parsed.tzinfo is None:
+            parsed = parsed.replace(tzinfo=timezone.utc)
+    else:
+        raise ValueError("time invalido")
+    if parsed > now + _MAX_CLOCK_SKEW:
+        raise ValueError("time no futuro")
+    return parsed
+
+
+def _coerce(column, value: Any) -> Any:
+    """Valida o valor para o tipo da coluna (None e aceito)."""
+    if value is None:
+        return None
+    column_type = column.type
+    if isinstance(column_type, Boolean):
+        if not isinstance(value, bool):
+            raise ValueError(f"{column.name} deve ser booleano")
+        return value
+    if isinstance(column_type, (Integer, SmallInteger)):
+        if isinstance(value, bool) or not isinstance(value, (int, float)):
+            raise ValueError(f"{column.name} deve ser inteiro")
+        if isinstance(value, float) and not value.is_integer():
+            raise ValueError(f"{column.name} deve ser inteiro")
+        limit = next(bound for kind, bound in _INTEGER_LIMITS if isinstance(column_type, kind))
+        if abs(int(value)) >= limit:
+            raise ValueError(f"{column.name} fora da faixa")
+        return int(value)
+    if isinstance(column_type, Numeric):
+        if isinstance(value, bool) or not isinstance(value, (int, float)):
+            raise ValueError(f"{column.name} deve ser numerico")
+        limit = 10 ** ((column_type.precision or 38) - (column_type.scale or 0))
+        rounded = round(Decimal(str(value)), column_type.scale or 0)
+        if not rounded.is_finite() or abs(rounded) >= limit:
+            raise ValueError(f"{column.name} fora da faixa")
+        return value
+    if isinstance(column_type, String):
+        if not isinstance(value, str):
+            raise ValueError(f"{column.name} deve ser texto")
+        if column_type.length and len(value) > column_type.length:
+            raise ValueError(f"{column.name} excede {column_type.length} caracteres")
+        return value
+    if isinstance(column_type, JSONB):
+        if not isinstance(value, (dict, list)):
+            raise ValueError(f"{column.name} deve ser objeto ou lista")
+        return value
+    return value
+
+
+class IngestService:
+    """Servico para gravacao em massa de leituras de um sensor."""
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def default_dataset(self, sensor: SensorIdentity) -> str | None:
+        """Conjunto padrao pelas categorias do tipo de sensor."""
+        return sensor.category if sensor.category in INGEST_DATASETS else None
+
+    def ingest(self, sensor: SensorIdentity, readings: list[Any]) -> IngestResult:
+        """Valida e grava as leituras. Leituras invalidas sao rejeitadas individualmente."""
+        if len(readings) > settings.ingest_max_readings:
+            raise ValueError(
+                f"Lote com {len(readings)} leituras excede o limite de "
+                f"{settings.ingest_max_readings}"
+            )
+
+        now = datetime.now(timezone.utc)
+        default_dataset = self.default_dataset(sensor)
+        result = IngestResult(sensor_id=sensor.id, received=len(readings))
+
+        def reject(index: int, message: str) -> None:
+            result.rejected += 1
+            if len(result.errors) < settings.ingest_max_errors:
+                result.errors.append(IngestError(index=index, message=message))
+
+        rows: dict[str, dict[datetime, dict[str, Any]]] = {name: {} for name in INGEST_DATASETS}
+        latest: dict[str, tuple[datetime, dict[str, Any]]] = {}
+
+        for index, reading in enumerate(readings):
+            if not isinstance(reading, dict):
+                reject(index, "Leitura deve ser um objeto")
+                continue
+
+            dataset = reading.get("type", default_dataset)
+            table = INGEST_DATASETS.get(dataset)
+            if table is None:
+                reject(index, "type invalido (use soil, vision ou weather)")
+                continue
+            if dataset in ("soil", "vision") and sensor.plot_id is None:
+                reject(index, "Sensor sem talhao associado")
+                continue
+
+            try:
+                time = _parse_time(reading.get("time"), now)
+                columns = VALUE_COLUMNS[dataset]
+                unknown = set(reading) - {c.name for c in columns} - {"type", "time"}
+                if unknown:
+                    raise ValueError(f"Campos desconhecidos: {', '.join(sorted(unknown))}")
+                values = {
+                    column.name: _coerce(column, reading.get(column.name)) for column in columns
+                }
+            except ValueError as e:
+                reject(index, str(e))
+                continue
+
+            # COPY nao aplica os defaults do modelo
+            for column in columns:
+                if values[column.name] is None and column.default is not None:
+                    values[column.name] = column.default.arg
+
+            # Mesmo time no lote: vale a ultima leitura
+            if time in rows[dataset]:
+                result.duplicates += 1
+            rows[dataset][time] = values
+            if dataset not in latest or time >= latest[dataset][0]:
+                latest[dataset] = (time, values)
+
+        for dataset, by_time in rows.items():
+            if not by_time:
+                continue
+            table = INGEST_DATASETS[dataset]
+            owner_column = "farm_id" if "farm_id" in table.c else "plot_id"
+            owner_id = sensor.farm_id if owner_column == "farm_id" else sensor.plot_id
+            value_columns = [column.name for column in VALUE_COLUMNS[dataset]]
+            sent, inserted = copy_rows_ignore_conflicts(
+                self.db,
+                table.name,
+                ["time", "sensor_id", owner_column, *value_columns],
+                (
+                    (time, sensor.id, owner_id, *(values[name] for name in value_columns))
+                    for time, values in by_time.items()
+                ),
+            )
+            result.accepted[dataset] = inserted
+            result.duplicates += sent - inserted
+
+        if any(result.accepted.values()):
+            last_signal = max(time for time, _ in latest.values())
+            self._mark_online(sensor, min(last_signal, now))
+            for dataset, (time, values) in latest.items():
+                publish_farm_event(
+                    self.db,
+                    "reading",
+                    sensor.farm_id,
+                    sensor.organization_id,
+                    sensor_id=sensor.id,
+                    plot_id=sensor.plot_id,
+                    dataset=dataset,
+                    time=time.isoformat(),
+                    values={
+                        name: value
+                        for name, value in values.items()
+                        if value is not None and not isinstance(value, (dict, list))
+                    },
+                )
+        self.db.commit()
+        return result
+
+    def _mark_online(self, sensor: SensorIdentity, timestamp: datetime) -> None:
+        """Atualiza last_signal_at e publica a volta do sensor, se estava offline."""
+        row = self.db.execute(
+            text("""
+                UPDATE sensors AS s
+                SET last_signal_at = GREATEST(s.last_signal_at, :t),
+                    is_online = true,
+                    updated_at = now()
+                FROM (SELECT id, is_online FROM sensors WHERE id = :sid FOR UPDATE) AS previous
+                WHERE s.id = previous.id
+                RETURNING previous.is_online
+            """),
+            {"t": timestamp, "sid": sensor.id},
+        ).first()
+        if row is not None and not row.is_online:
+            publish_farm_event(
+                self.db,
+                "sensor_status",
+                sensor.farm_id,
+                sensor.organization_id,
+                sensor_id=sensor.id,
+                plot_id=sensor.plot_id,
+                is_online=True,
+                last_signal_at=timestamp.isoformat(),
+            )
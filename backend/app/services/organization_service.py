@@ -5,7 +5,9 @@ from uuid import UUID
 
 from sqlalchemy.orm import Session
 
-from app.core.security import get_password_hash
+from app.core.principal import invalidate_principal
+from app.core.pubsub import publish_farm_event
+from app.core.security import get_password_hash_async
 from app.models.organization import Organization, User
 from app.schemas.organization import OrganizationCreate, OrganizationUpdate
 
@@ -36,7 +38,7 @@ class OrganizationService:
             Organization.deleted_at.is_(None),
         ).offset(skip).limit(limit).all()
 
-    def create(self, org_data: OrganizationCreate) -> tuple[Organization, User]:
+    async def create(self, org_data: OrganizationCreate) -> tuple[Organization, User]:
         """Cria uma nova organização com seu owner."""
         # Criar organização
         organization = Organization(
@@ -54,7 +56,7 @@ class OrganizationService:
         owner = User(
             organization_id=organization.id,
             email=org_data.owner_email,
-            password_hash=get_password_hash(org_data.owner_password),
+            password_hash=await get_password_hash_async(org_data.owner_password),
             first_name=org_data.owner_first_name,
             last_name=org_data.owner_last_name,
             is_org_owner=True,
@@ -66,7 +68,7 @@ class OrganizationService:
 
         return organization, owner
 
-    def update(self, organization: Organization, org_data: OrganizationUpdate) -> Organization:
+    async def update(self, organization: Organization, org_data: OrganizationUpdate) -> Organization:
         """Atualiza dados da organização e owner."""
         from app.services.user_service import UserService
         
@@ -98,7 +100,10 @@ class OrganizationService:
                 if 'owner_last_name' in owner_updates:
                     owner.last_name = owner_updates['owner_last_name']
                 if 'owner_password' in owner_updates and owner_updates['owner_password']:
-                    owner.password_hash = get_password_hash(owner_updates['owner_password'])
+                    owner.password_hash = await get_password_hash_async(
+                        owner_updates['owner_password']
+                    )
+                invalidate_principal(self.db, user_id=owner.id)
         
         self.db.commit()
         self.db.refresh(organization)
@@ -107,6 +112,8 @@ class OrganizationService:
     def delete(self, organization: Organization) -> None:
         """Soft delete de organização."""
         organization.deleted_at = datetime.now(timezone.utc)
+        invalidate_principal(self.db, organization_id=organization.id)
+        publish_farm_event(self.db, "organization", None, organization.id)
         self.db.commit()
 
     def get_owner(self, organization: Organization) -> User | None:
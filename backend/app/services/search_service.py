@@ -0,0 +1,227 @@
+"""Servico de busca textual em eventos, alertas e anotacoes.
+
+Cada tabela tem uma coluna gerada search_vector (tsvector com pesos por
+campo, recalculada pelo Postgres a cada escrita) e um indice GIN sobre
+ela. A consulta do usuario vira um tsquery (websearch_to_tsquery: aceita
+"frase exata", OR e -termo), cada tabela devolve seus melhores itens pelo
+indice e os resultados sao intercalados por relevancia (ts_rank), data e
+id. A pagina seguinte e buscada por keyset sobre essa mesma chave, e o
+trecho destacado (ts_headline) so e calculado para os itens da pagina.
+"""
+
+import html
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any
+from uuid import UUID
+
+from sqlalchemy import Text, cast, func, literal, literal_column, select, union_all
+from sqlalchemy.dialects.postgresql import DOUBLE_PRECISION
+from sqlalchemy.orm import Session
+
+from app.core.pagination import Keyset
+from app.models.alert import Alert
+from app.models.event import Event
+from app.models.note import Note
+
+SEARCH_TYPES = ("event", "alert", "note")
+
+SEARCH_CONFIG = literal_column("'portuguese'::regconfig")
+
+# O trecho vem do texto do usuario: o ts_headline marca os termos com
+# sentinelas, o texto e escapado e so entao as sentinelas viram <mark>
+_MARK_START = "\x02"
+_MARK_STOP = "\x03"
+HEADLINE_OPTIONS = (
+    f"StartSel={_MARK_START}, StopSel={_MARK_STOP}, MaxWords=30, MinWords=10, MaxFragments=2"
+)
+
+
+def highlight(headline: str) -> str:
+    """HTML seguro do trecho: texto escapado com os termos entre <mark></mark>."""
+    return (
+        html.escape(headline)
+        .replace(_MARK_START, "<mark>")
+        .replace(_MARK_STOP, "</mark>")
+    )
+
+
+@dataclass(frozen=True)
+class SearchSource:
+    """Tabela pesquisavel e as expressoes usadas no resultado."""
+
+    model: Any
+    timestamp: Any
+    title: Any
+    body: Any
+    live: tuple = ()
+
+
+SEARCH_SOURCES = {
+    "event": SearchSource(
+        model=Event,
+        timestamp=Event.timestamp,
+        title=Event.title,
+        body=func.concat_ws(
+            " ", Event.notes, Event.scope_name, cast(Event.product_data, Text)
+        ),
+        live=(Event.deleted_at.is_(None),),
+    ),
+    "alert": SearchSource(
+        model=Alert,
+        timestamp=Alert.timestamp,
+        title=Alert.title,
+        body=func.concat_ws(
+            " ", Alert.message, Alert.impact, Alert.suggested_action, Alert.resolution_notes
+        ),
+    ),
+    "note": SearchSource(
+        model=Note,
+        timestamp=Note.created_at,
+        title=func.left(Note.text, 120),
+        body=Note.text,
+        live=(Note.deleted_at.is_(None),),
+    ),
+}
+
+
+def _rank(source: SearchSource, query):
+    # ts_rank e real; em double o valor volta exato do cursor para a comparacao
+    return cast(func.ts_rank(source.model.search_vector, query), DOUBLE_PRECISION)
+
+
+def search_keyset(kind: str, query) -> Keyset:
+    """Ordenacao dos resultados de um tipo: relevancia, data e id (decrescentes)."""
+    source = SEARCH_SOURCES[kind]
+    return Keyset(
+        "search",
+        (_rank(source, query), source.timestamp, source.model.id),
+        descending=True,
+    )
+
+
+class SearchService:
+    """Servico para busca textual."""
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def _filtered(
+        self,
+        kind: str,
+        statement,
+        query,
+        organization_id: UUID | None,
+        farm_id: UUID | None,
+        plot_id: UUID | None,
+        start_date: datetime | None,
+        end_date: datetime | None,
+    ):
+        source = SEARCH_SOURCES[kind]
+        model = source.model
+        statement = statement.where(model.search_vector.op("@@")(query), *source.live)
+        if organization_id is not None:
+            statement = statement.where(model.organization_id == organization_id)
+        if farm_id is not None:
+            statement = statement.where(model.farm_id == farm_id)
+        if plot_id is not None:
+            statement = statement.where(model.plot_id == plot_id)
+        if start_date is not None:
+            statement = statement.where(source.timestamp >= start_date)
+        if end_date is not None:
+            statement = statement.where(source.timestamp <= end_date)
+        return statement
+
+    def search(
+        self,
+        text: str,
+        types: tuple[str, ...] = SEARCH_TYPES,
+        organization_id: UUID | None = None,
+        farm_id: UUID | None = None,
+        plot_id: UUID | None = None,
+        start_date: datetime | None = None,
+        end_date: datetime | None = None,
+        limit: int = 20,
+        after: list[Any] | None = None,
+    ) -> list[dict[str, Any]]:
+        """Resultados mais relevantes, a partir do cursor.
+
+        Parametros:
+            text: Consulta no formato de websearch_to_tsquery
+            types: Tipos pesquisados (SEARCH_TYPES)
+            organization_id: Restringe a uma organizacao (None: todas)
+            limit: Itens retornados (o chamador pede limit + 1 para saber se ha
+                proxima pagina)
+            after: Valores (rank, timestamp, id) do ultimo item da pagina anterior
+        """
+        query = func.websearch_to_tsquery(SEARCH_CONFIG, text)
+        branches = []
+        for kind in types:
+            source = SEARCH_SOURCES[kind]
+            keyset = search_keyset(kind, query)
+            statement = select(
+                literal(kind).label("type"),
+                source.model.id.label("id"),
+                source.model.farm_id.label("farm_id"),
+                source.model.plot_id.label("plot_id"),
+                source.title.label("title"),
+                source.body.label("body"),
+                source.timestamp.label("timestamp"),
+                keyset.columns[0].label("rank"),
+            )
+            statement = self._filtered(
+                kind, statement, query, organization_id, farm_id, plot_id, start_date, end_date
+            )
+            if after is not None:
+                statement = statement.where(keyset.after(after))
+            # Cada tipo contribui no maximo com uma pagina (top-N pelo indice)
+            branches.append(statement.order_by(*keyset.order_by()).limit(limit))
+
+        merged = union_all(*branches).subquery()
+        order = (merged.c.rank.desc(), merged.c.timestamp.desc(), merged.c.id.desc())
+        page = select(merged).order_by(*order).limit(limit).subquery()
+        rows = self.db.execute(
+            select(
+                page.c.type,
+                page.c.id,
+                page.c.farm_id,
+                page.c.plot_id,
+                page.c.title,
+                func.ts_headline(SEARCH_CONFIG, page.c.body, query, HEADLINE_OPTIONS).label(
+                    "snippet"
+                ),
+                page.c.timestamp,
+                page.c.rank,
+            ).order_by(page.c.rank.desc(), page.c.timestamp.desc(), page.c.id.desc())
+        )
+        return [
+            {**row._mapping, "snippet": highlight(row.snippet)}
+            for row in rows
+        ]
+
+    def count(
+        self,
+        text: str,
+        types: tuple[str, ...] = SEARCH_TYPES,
+        organization_id: UUID | None = None,
+        farm_id: UUID | None = None,
+        plot_id: UUID | None = None,
+        start_date: datetime | None = None,
+        end_date: datetime | None = None,
+    ) -> int:
+        """Total de itens encontrados (todas as paginas)."""
+        query = func.websearch_to_tsquery(SEARCH_CONFIG, text)
+        total = 0
+        for kind in types:
+            statement = self._filtered(
+                kind,
+                select(func.count()).select_from(SEARCH_SOURCES[kind].model),
+                query,
+                organization_id,
+                farm_id,
+                plot_id,
+                start_date,
+                end_date,
+            )
+            total += self.db.execute(statement).scalar_one()
+        return total
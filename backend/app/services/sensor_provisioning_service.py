@@ -0,0 +1,292 @@
+"""Servico de provisionamento de sensores em massa.
+
+Recebe um lote de sensores (CSV ou JSON), valida todas as linhas com
+algumas consultas por conjunto (fazendas, talhoes, tipos e identificadores
+ja cadastrados) e insere as linhas validas com um unico COPY na mesma
+transacao. O resultado traz os erros de cada linha.
+"""
+
+import csv
+import io
+from collections import defaultdict
+from typing import Any
+from uuid import UUID, uuid4
+
+import orjson
+from pydantic import ValidationError
+from sqlalchemy import or_
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.core.bulk import copy_rows
+from app.core.pubsub import publish_farm_event
+from app.models.farm import Farm, Plot
+from app.models.sensor import Sensor, SensorType
+from app.schemas.sensor import (
+    SensorCreate,
+    SensorProvisioningError,
+    SensorProvisioningResult,
+)
+
+PROVISIONING_FORMATS = ("csv", "json")
+
+# Identificadores com restricao UNIQUE na tabela sensors
+UNIQUE_FIELDS = ("dev_eui", "serial_number", "mac_address")
+
+# Campos JSON aceitos como texto nas colunas do CSV
+JSON_FIELDS = ("location", "configuration")
+
+COPY_COLUMNS = (
+    "id",
+    "organization_id",
+    "farm_id",
+    "plot_id",
+    "sensor_type_id",
+    "name",
+    "dev_eui",
+    "serial_number",
+    "mac_address",
+    "location",
+    "installation_date",
+    "firmware_version",
+    "configuration",
+    "extra_data",
+    "is_online",
+    "is_active",
+    "created_by",
+)
+
+
+def _string_lengths() -> dict[str, int]:
+    """Tamanho maximo das colunas texto de sensors."""
+    return {
+        column.name: column.type.length
+        for column in Sensor.__table__.columns
+        if getattr(column.type, "length", None)
+    }
+
+
+def parse_rows(content: bytes, file_format: str) -> list[dict[str, Any]]:
+    """Converte o conteudo CSV ou JSON (lista de objetos) em linhas."""
+    if file_format not in PROVISIONING_FORMATS:
+        raise ValueError("Formato invalido (use csv ou json)")
+
+    if file_format == "json":
+        try:
+            data = orjson.loads(content)
+        except orjson.JSONDecodeError as e:
+            raise ValueError(f"JSON invalido: {e}") from e
+        if isinstance(data, dict):
+            data = data.get("sensors")
+        if not isinstance(data, list):
+            raise ValueError("O JSON deve ser uma lista de sensores")
+        return [row if isinstance(row, dict) else {} for row in data]
+
+    try:
+        text = content.decode("utf-8-sig")
+    except UnicodeDecodeError as e:
+        raise ValueError("O CSV deve estar em UTF-8") from e
+
+    rows = []
+    for record in csv.DictReader(io.StringIO(text)):
+        row: dict[str, Any] = {
+            key.strip(): value.strip() if isinstance(value, str) else value
+            for key, value in record.items()
+            if key
+        }
+        # Celulas vazias equivalem a campos nao informados
+        row = {key: value for key, value in row.items() if value not in ("", None)}
+        for field in JSON_FIELDS:
+            if isinstance(row.get(field), str):
+                try:
+                    row[field] = orjson.loads(row[field])
+                except orjson.JSONDecodeError:
+                    pass  # O schema reporta o tipo invalido
+        rows.append(row)
+    return rows
+
+
+class SensorProvisioningService:
+    """Servico para provisionamento de sensores em lote."""
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def provision(
+        self,
+        organization_id: UUID,
+        rows: list[dict[str, Any]],
+        created_by: UUID | None = None,
+        partial: bool = False,
+        dry_run: bool = False,
+    ) -> SensorProvisioningResult:
+        """Valida e insere os sensores do lote.
+
+        Parametros:
+            organization_id: Organizacao dona dos sensores
+            rows: Linhas ja convertidas (ver parse_rows); numeradas a partir de 1
+            partial: Insere as linhas validas mesmo que outras tenham erro
+            dry_run: Apenas valida, sem inserir
+        """
+        if len(rows) > settings.provisioning_max_rows:
+            raise ValueError(
+                f"Lote com {len(rows)} sensores excede o limite de "
+                f"{settings.provisioning_max_rows}"
+            )
+
+        errors: list[SensorProvisioningError] = []
+        failed: set[int] = set()
+
+        def reject(row_number: int, message: str, field: str | None = None) -> None:
+            errors.append(SensorProvisioningError(row=row_number, field=field, message=message))
+            failed.add(row_number)
+
+        # 1. Validacao de cada linha pelo schema
+        sensors: dict[int, SensorCreate] = {}
+        lengths = _string_lengths()
+        for row_number, row in enumerate(rows, start=1):
+            try:
+                sensor = SensorCreate.model_validate(row)
+            except ValidationError as e:
+                for error in e.errors():
+                    field = ".".join(str(part) for part in error["loc"]) or None
+                    reject(row_number, error["msg"], field)
+                continue
+            for field, max_length in lengths.items():
+                value = getattr(sensor, field, None)
+                if isinstance(value, str) and len(value) > max_length:
+                    reject(row_number, f"Maximo de {max_length} caracteres", field)
+            sensors[row_number] = sensor
+
+        # 2. Referencias, com uma consulta por conjunto
+        farm_ids = {sensor.farm_id for sensor in sensors.values()}
+        plot_ids = {sensor.plot_id for sensor in sensors.values()}
+        type_ids = {sensor.sensor_type_id for sensor in sensors.values()}
+
+        valid_farms = {
+            row.id
+            for row in self.db.query(Farm.id).filter(
+                Farm.id.in_(farm_ids),
+                Farm.organization_id == organization_id,
+                Farm.deleted_at.is_(None),
+            )
+        } if farm_ids else set()
+        plot_farms = {
+            row.id: row.farm_id
+            for row in self.db.query(Plot.id, Plot.farm_id).filter(
+                Plot.id.in_(plot_ids),
+                Plot.deleted_at.is_(None),
+            )
+        } if plot_ids else {}
+        valid_types = {
+            row.id
+            for row in self.db.query(SensorType.id).filter(
+                SensorType.id.in_(type_ids),
+                or_(
+                    SensorType.organization_id.is_(None),
+                    SensorType.organization_id == organization_id,
+                ),
+            )
+        } if type_ids else set()
+
+        # 3. Identificadores unicos: duplicados no lote e ja cadastrados
+        # (inclusive sensores removidos, pois a restricao UNIQUE continua valendo)
+        batch_values: dict[str, dict[str, list[int]]] = {
+            field: defaultdict(list) for field in UNIQUE_FIELDS
+        }
+        for row_number, sensor in sensors.items():
+            for field in UNIQUE_FIELDS:
+                value = getattr(sensor, field)
+                if value:
+                    batch_values[field][value].append(row_number)
+
+        conditions = [
+            getattr(Sensor, field).in_(list(values))
+            for field, values in batch_values.items()
+            if values
+        ]
+        taken: dict[str, set[str]] = {field: set() for field in UNIQUE_FIELDS}
+        if conditions:
+            for row in self.db.query(
+                Sensor.dev_eui, Sensor.serial_number, Sensor.mac_address
+            ).filter(or_(*conditions)):
+                for field in UNIQUE_FIELDS:
+                    if getattr(row, field):
+                        taken[field].add(getattr(row, field))
+
+        for field, values in batch_values.items():
+            for value, row_numbers in values.items():
+                if value in taken[field]:
+                    for row_number in row_numbers:
+                        reject(row_number, f"Ja existe um sensor com {field} {value}", field)
+                elif len(row_numbers) > 1:
+                    for row_number in row_numbers[1:]:
+                        reject(
+                            row_number,
+                            f"{field} {value} repetido no lote (linha {row_numbers[0]})",
+                            field,
+                        )
+
+        for row_number, sensor in sensors.items():
+            if sensor.farm_id not in valid_farms:
+                reject(row_number, "Fazenda nao encontrada ou nao pertence a organizacao", "farm_id")
+            if sensor.plot_id not in plot_farms:
+                reject(row_number, "Talhao nao encontrado", "plot_id")
+            elif plot_farms[sensor.plot_id] != sensor.farm_id:
+                reject(row_number, "Talhao nao pertence a fazenda informada", "plot_id")
+            if sensor.sensor_type_id not in valid_types:
+                reject(row_number, "Tipo de sensor nao encontrado", "sensor_type_id")
+
+        valid = {
+            row_number: sensor
+            for row_number, sensor in sensors.items()
+            if row_number not in failed
+        }
+        errors.sort(key=lambda error: error.row)
+
+        result = SensorProvisioningResult(
+            total_rows=len(rows),
+            valid_rows=len(valid),
+            created=0,
+            dry_run=dry_run,
+            errors=errors,
+        )
+        if dry_run or not valid or (errors and not partial):
+            return result
+
+        # 4. Insercao das linhas validas com COPY, em uma unica transacao
+        sensor_ids = [uuid4() for _ in valid]
+        copy_rows(
+            self.db,
+            Sensor.__tablename__,
+            COPY_COLUMNS,
+            (
+                (
+                    sensor_id,
+                    organization_id,
+                    sensor.farm_id,
+                    sensor.plot_id,
+                    sensor.sensor_type_id,
+                    sensor.name,
+                    sensor.dev_eui,
+                    sensor.serial_number,
+                    sensor.mac_address,
+                    sensor.location,
+                    sensor.installation_date.date() if sensor.installation_date else None,
+                    sensor.firmware_version,
+                    sensor.configuration,
+                    {},
+                    False,
+                    True,
+                    created_by,
+                )
+                for sensor_id, sensor in zip(sensor_ids, valid.values(), strict=True)
+            ),
+        )
+        for farm_id in {sensor.farm_id for sensor in valid.values()}:
+            publish_farm_event(self.db, "sensor", farm_id, organization_id)
+        self.db.commit()
+
+        result.created = len(sensor_ids)
+        result.sensor_ids = sensor_ids
+        return result
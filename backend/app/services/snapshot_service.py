@@ -0,0 +1,192 @@
+"""Servico de geracao de snapshots de producao.
+
+Gera o snapshot do dia de todos os talhoes de uma vez: a ultima leitura de
+solo e de visao de cada talhao vem de uma consulta DISTINCT ON por tabela
+(SkipScan no indice plot_id, time DESC), status, score e riscos vem do
+motor de app.core.scoring, calculados em lote com numpy, e os snapshots
+sao gravados com INSERT ... ON CONFLICT na restricao (plot_id,
+snapshot_date). Roda como job em background (ver app.core.jobs).
+"""
+
+from datetime import date
+from typing import Any
+from uuid import UUID, uuid4
+
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from app.core.pubsub import publish_farm_event
+from app.core.scoring import PlotScores, latest_by_plot, score_plots
+from app.models.analytics import PlotProductionSnapshot
+from app.models.farm import Farm, Plot
+from app.models.job import BackgroundJob
+from app.models.timeseries import SoilReading, VisionData
+
+SNAPSHOT_JOB = "snapshots"
+
+# Linhas por INSERT (limite de parametros do Postgres)
+_UPSERT_BATCH = 2000
+
+_UPDATE_COLUMNS = (
+    "status",
+    "health_score",
+    "production_stage",
+    "fruits_per_tree",
+    "total_fruits",
+    "avg_fruit_size",
+    "estimated_yield_kg",
+    "estimated_yield_tons",
+    "flowering_percentage",
+    "risk_level",
+    "risk_factors",
+)
+
+
+def production_fields(
+    scores: PlotScores,
+    vision: list,
+    tree_counts: list[int | None],
+) -> list[dict[str, Any]]:
+    """Campos do snapshot de cada talhao (score do motor e estimativa de producao).
+
+    Parametros:
+        scores: Resultado de score_plots para os talhoes
+        vision: Ultima leitura de visao de cada talhao (None se nao houver)
+        tree_counts: Numero de arvores de cada talhao
+    """
+    total_fruits = np.array(
+        [int(row.fruit_count or 0) if row is not None else 0 for row in vision], dtype=np.int64
+    )
+    flowering = np.array(
+        [float(row.flowering_percentage or 0) if row is not None else 0.0 for row in vision],
+        dtype=np.float64,
+    )
+    trees = np.array([count or 100 for count in tree_counts], dtype=np.float64)
+    fruits_per_tree = total_fruits / trees
+    estimated_yield_kg = total_fruits * scores.fruit_weight_kg
+    stage = np.select(
+        [flowering > 50, total_fruits > trees * 5, total_fruits > trees * 20],
+        ["floracao", "frutificacao", "maturacao"],
+        default="vegetativo",
+    )
+
+    results = []
+    for i, last_vision in enumerate(vision):
+        results.append({
+            "status": str(scores.status[i]),
+            "health_score": int(scores.health_score[i]),
+            "production_stage": str(stage[i]),
+            "fruits_per_tree": float(fruits_per_tree[i]) or None,
+            "total_fruits": int(total_fruits[i]),
+            "avg_fruit_size": last_vision.avg_fruit_size if last_vision is not None else None,
+            "estimated_yield_kg": round(float(estimated_yield_kg[i]), 2),
+            "estimated_yield_tons": round(float(estimated_yield_kg[i]) / 1000, 3),
+            "flowering_percentage": (
+                last_vision.flowering_percentage if last_vision is not None else None
+            ),
+            "risk_level": str(scores.risk_level[i]),
+            "risk_factors": scores.risk_factors[i],
+        })
+    return results
+
+
+class SnapshotService:
+    """Servico para geracao de snapshots de producao em lote."""
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def generate(
+        self,
+        organization_id: UUID | None = None,
+        farm_id: UUID | None = None,
+        snapshot_date: date | None = None,
+    ) -> dict[str, Any]:
+        """Gera (ou atualiza) o snapshot do dia dos talhoes.
+
+        Parametros:
+            organization_id: Restringe a uma organizacao (None: todas)
+            farm_id: Restringe a uma fazenda
+        """
+        snapshot_date = snapshot_date or date.today()
+
+        query = (
+            select(
+                Plot.id, Plot.farm_id, Plot.tree_count, Plot.crop_type, Farm.organization_id
+            )
+            .join(Farm, Farm.id == Plot.farm_id)
+            .where(Plot.deleted_at.is_(None), Farm.deleted_at.is_(None))
+        )
+        if organization_id:
+            query = query.where(Farm.organization_id == organization_id)
+        if farm_id:
+            query = query.where(Plot.farm_id == farm_id)
+        plots = self.db.execute(query).all()
+        if not plots:
+            return {"snapshot_date": snapshot_date.isoformat(), "plots": 0, "farms": 0}
+
+        plot_ids = [plot.id for plot in plots]
+        soil = latest_by_plot(
+            self.db,
+            SoilReading,
+            plot_ids,
+            SoilReading.moisture,
+            SoilReading.ph,
+            SoilReading.temperature,
+        )
+        vision = latest_by_plot(
+            self.db,
+            VisionData,
+            plot_ids,
+            VisionData.fruit_count,
+            VisionData.avg_fruit_size,
+            VisionData.flowering_percentage,
+            VisionData.water_stress_level,
+            VisionData.ndvi,
+            VisionData.pests_detected,
+            VisionData.irrigation_failures,
+        )
+
+        plot_vision = [vision.get(plot.id) for plot in plots]
+        scores = score_plots(
+            [plot.crop_type for plot in plots],
+            [soil.get(plot.id) for plot in plots],
+            plot_vision,
+        )
+        fields = production_fields(scores, plot_vision, [plot.tree_count for plot in plots])
+        rows = [
+            {"id": uuid4(), "plot_id": plot.id, "snapshot_date": snapshot_date, **values}
+            for plot, values in zip(plots, fields, strict=True)
+        ]
+
+        table = PlotProductionSnapshot.__table__
+        for start in range(0, len(rows), _UPSERT_BATCH):
+            statement = insert(table).values(rows[start:start + _UPSERT_BATCH])
+            self.db.execute(
+                statement.on_conflict_do_update(
+                    constraint="unique_plot_snapshot_date",
+                    set_={name: statement.excluded[name] for name in _UPDATE_COLUMNS},
+                )
+            )
+
+        farms = {(plot.farm_id, plot.organization_id) for plot in plots}
+        for farm, organization in farms:
+            publish_farm_event(self.db, "snapshot", farm, organization)
+        self.db.commit()
+
+        return {
+            "snapshot_date": snapshot_date.isoformat(),
+            "plots": len(rows),
+            "farms": len(farms),
+        }
+
+
+def run_snapshot_job(db: Session, job: BackgroundJob) -> dict[str, Any]:
+    """Handler do job de snapshots (params: farm_id opcional)."""
+    farm_id = job.params.get("farm_id")
+    return SnapshotService(db).generate(
+        organization_id=job.organization_id,
+        farm_id=UUID(farm_id) if farm_id else None,
+    )
@@ -0,0 +1,189 @@
+"""Servico de renderizacao dos tiles do mapa da fazenda.
+
+Camadas:
+    plot-status: poligonos dos talhoes pintados pelo status do motor de
+        scoring (ok, warning, critical, offline)
+    heatmap: metrica de solo interpolada por IDW dentro dos talhoes, com as
+        mesmas escalas de cor da legenda do frontend
+
+Os dados de origem de cada camada (poligonos, status, ultimas leituras) sao
+carregados uma vez por versao de dados da fazenda e ficam no cache de tiles
+junto com os PNGs (ver app.core.tiles).
+"""
+
+import math
+from typing import Any
+from uuid import UUID
+
+import numpy as np
+from sqlalchemy.orm import Session
+
+from app.core.scoring import latest_by_plot, score_plots
+from app.core.tiles import EMPTY_TILE, TILE_SIZE, encode_png, pixel_centers, tile_cache
+from app.models.farm import Plot
+from app.models.timeseries import SoilReading, VisionData
+from app.services.heatmap_service import (
+    HeatmapService,
+    idw_interpolate,
+    plot_polygon,
+    polygon_labels,
+)
+
+TILE_LAYERS = ("plot-status", "heatmap")
+
+# Cores (RGBA) do status dos talhoes, as mesmas do StatusBadge
+STATUS_COLORS = {
+    "ok": (36, 168, 104, 170),
+    "warning": (242, 160, 13, 170),
+    "critical": (226, 54, 54, 190),
+    "offline": (123, 133, 157, 150),
+}
+
+HEATMAP_ALPHA = 200
+
+# Escalas de cor do heatmap (valor, cor), as mesmas de data/heatmapData.ts
+HEATMAP_COLOR_SCALES = {
+    "soilMoisture": [
+        (0, "#FBBF24"), (10, "#FB923C"), (18, "#93C5FD"),
+        (23, "#C4B5FD"), (28, "#A78BFA"), (40, "#7C3AED"),
+    ],
+    "temperature": [
+        (15, "#3B82F6"), (22, "#22C55E"), (27, "#84CC16"), (32, "#F59E0B"), (40, "#EF4444"),
+    ],
+    "electricalConductivity": [
+        (0, "#FDE68A"), (0.8, "#84CC16"), (1.4, "#22C55E"), (2.0, "#F59E0B"), (3.5, "#EF4444"),
+    ],
+    "ph": [
+        (4, "#EF4444"), (5.5, "#F59E0B"), (6.0, "#84CC16"),
+        (6.8, "#22C55E"), (7.5, "#84CC16"), (8.5, "#EF4444"),
+    ],
+    "nitrogen": [
+        (0, "#FDE68A"), (15, "#FBBF24"), (20, "#84CC16"),
+        (35, "#22C55E"), (50, "#10B981"), (70, "#7C3AED"),
+    ],
+    "potassium": [
+        (0, "#FDE68A"), (80, "#FBBF24"), (100, "#84CC16"),
+        (150, "#22C55E"), (200, "#10B981"), (260, "#7C3AED"),
+    ],
+    "phosphorus": [
+        (0, "#FDE68A"), (10, "#FBBF24"), (15, "#84CC16"),
+        (27, "#22C55E"), (40, "#10B981"), (60, "#7C3AED"),
+    ],
+}
+
+
+def colorize(values: np.ndarray, scale: list[tuple[float, str]]) -> np.ndarray:
+    """Converte valores em cores RGB interpolando linearmente entre as paradas."""
+    stops = np.array([value for value, _ in scale], dtype=np.float64)
+    colors = np.array(
+        [[int(color[i:i + 2], 16) for i in (1, 3, 5)] for _, color in scale], dtype=np.float64
+    )
+    channels = [np.interp(values, stops, colors[:, channel]) for channel in range(3)]
+    return np.rint(np.stack(channels, axis=-1)).astype(np.uint8)
+
+
+class TileService:
+    """Servico para renderizacao de tiles das camadas do mapa."""
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def _plots(self, farm_id: UUID) -> list[tuple[UUID, str | None, np.ndarray]]:
+        plots = []
+        for plot_id, crop_type, coordinates in self.db.query(
+            Plot.id, Plot.crop_type, Plot.coordinates
+        ).filter(Plot.farm_id == farm_id, Plot.deleted_at.is_(None)):
+            polygon = plot_polygon(coordinates)
+            if polygon is not None:
+                plots.append((plot_id, crop_type, polygon))
+        return plots
+
+    def _status_source(self, farm_id: UUID) -> dict[str, Any]:
+        """Poligonos dos talhoes e a cor do status de cada um."""
+        plots = self._plots(farm_id)
+        plot_ids = [plot_id for plot_id, _, _ in plots]
+        soil = latest_by_plot(
+            self.db,
+            SoilReading,
+            plot_ids,
+            SoilReading.moisture,
+            SoilReading.ph,
+            SoilReading.temperature,
+        )
+        vision = latest_by_plot(
+            self.db,
+            VisionData,
+            plot_ids,
+            VisionData.water_stress_level,
+            VisionData.ndvi,
+            VisionData.pests_detected,
+            VisionData.irrigation_failures,
+        )
+        scores = score_plots(
+            [crop_type for _, crop_type, _ in plots],
+            [soil.get(plot_id) for plot_id in plot_ids],
+            [vision.get(plot_id) for plot_id in plot_ids],
+        )
+        colors = np.array(
+            [STATUS_COLORS[str(status)] for status in scores.status], dtype=np.uint8
+        ).reshape(-1, 4)
+        return {"polygons": [polygon for _, _, polygon in plots], "colors": colors}
+
+    def _heatmap_source(self, farm_id: UUID, metric: str) -> dict[str, Any]:
+        """Poligonos dos talhoes e ultimas leituras dos sensores (coordenadas projetadas)."""
+        polygons = [polygon for _, _, polygon in self._plots(farm_id)]
+        points, values = HeatmapService(self.db).latest_values(farm_id, metric)
+        if polygons:
+            vertices = np.concatenate(polygons)
+            center = (vertices[:, 1].min() + vertices[:, 1].max()) / 2
+        else:
+            center = 0.0
+        # Mesma escala para todos os tiles (evita emendas entre tiles vizinhos)
+        scale = math.cos(math.radians(center))
+        return {
+            "polygons": polygons,
+            "scale": scale,
+            "sensors": np.column_stack((points[:, 0] * scale, points[:, 1])),
+            "values": values,
+        }
+
+    def _source(self, farm_id: UUID, layer: str, version: int) -> dict[str, Any]:
+        key = (str(farm_id), layer, "source", version)
+        source = tile_cache.get(key)
+        if source is None:
+            if layer == "plot-status":
+                source = self._status_source(farm_id)
+            else:
+                source = self._heatmap_source(farm_id, layer.split(":", 1)[1])
+            tile_cache.set(key, source)
+        return source
+
+    def render(self, farm_id: UUID, layer: str, z: int, x: int, y: int) -> bytes:
+        """PNG do tile (servido do cache quando a versao de dados nao mudou).
+
+        Parametros:
+            layer: plot-status ou heatmap:<metrica>
+        """
+        version = tile_cache.version(farm_id)
+        key = (str(farm_id), layer, z, x, y, version)
+        tile = tile_cache.get(key)
+        if tile is not None:
+            return tile
+
+        source = self._source(farm_id, layer, version)
+        lngs, lats = pixel_centers(z, x, y)
+        labels = polygon_labels(lngs, lats, source["polygons"])
+        inside = labels >= 0
+        if not inside.any():
+            return tile_cache.set(key, EMPTY_TILE)
+
+        image = np.zeros((TILE_SIZE, TILE_SIZE, 4), dtype=np.uint8)
+        if layer == "plot-status":
+            image[inside] = source["colors"][labels[inside]]
+        elif len(source["values"]):
+            grid_x, grid_y = np.meshgrid(lngs * source["scale"], lats)
+            targets = np.column_stack((grid_x[inside], grid_y[inside]))
+            values = idw_interpolate(source["sensors"], source["values"], targets)
+            image[inside, :3] = colorize(values, HEATMAP_COLOR_SCALES[layer.split(":", 1)[1]])
+            image[inside, 3] = HEATMAP_ALPHA
+        return tile_cache.set(key, encode_png(image))
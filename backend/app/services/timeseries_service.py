@@ -0,0 +1,340 @@
+"""Servico de consultas genericas de series temporais.
+
+Cada consulta e compilada em um unico SELECT com time_bucket por fonte de
+dados (soil, vision, weather). Quando o intervalo e as agregacoes permitem,
+a consulta usa o continuous aggregate horario da fonte em vez da hypertable.
+O rollup so e usado quando o inicio (e o fim, se ja passou) cai no limite
+de uma hora, para que os dois caminhos agreguem exatamente as mesmas
+leituras.
+"""
+
+import re
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from uuid import UUID
+
+from sqlalchemy import Numeric, Table, column, func, select, table
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.core.tenant import tenant_scopes
+from app.models.farm import Farm, Plot
+from app.models.sensor import Sensor
+from app.models.timeseries import SoilReading, VisionData, WeatherData
+from app.schemas.timeseries import (
+    TimeseriesPoint,
+    TimeseriesQueryRequest,
+    TimeseriesQueryResponse,
+    TimeseriesSeries,
+)
+
+SCOPES = ("sensor", "plot", "farm")
+BASIC_AGGREGATES = ("avg", "min", "max", "last", "first", "count")
+
+_BUCKET_PATTERN = re.compile(r"^(\d+)(m|h|d)$")
+_PERCENTILE_PATTERN = re.compile(r"^p(\d{1,2})$")
+_BUCKET_UNITS = {"m": "minutes", "h": "hours", "d": "days"}
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+
+def _aligned(value: datetime, step: timedelta) -> bool:
+    """Instante no limite de um intervalo de tamanho step (contado da epoca)."""
+    return (value - _EPOCH) % step == timedelta(0)
+
+
+@dataclass(frozen=True)
+class Rollup:
+    """Continuous aggregate de uma fonte.
+
+    Para cada metrica o rollup tem as colunas <metrica>_sum, _count, _min,
+    _max e _last; o intervalo fica na coluna bucket.
+    """
+
+    name: str
+    bucket: timedelta
+    metrics: tuple[str, ...]
+    aggregates: tuple[str, ...] = ("avg", "min", "max", "last", "count")
+
+
+@dataclass(frozen=True)
+class MetricSource:
+    """Hypertable consultavel e suas metricas numericas."""
+
+    name: str
+    table: Table
+    entities: dict[str, str]
+    metrics: tuple[str, ...] = field(default=())
+    rollup: Rollup | None = None
+
+
+def _numeric_columns(model, extra: tuple[str, ...] = ()) -> tuple[str, ...]:
+    names = [c.name for c in model.__table__.columns if isinstance(c.type, Numeric)]
+    return tuple(names) + extra
+
+
+SOIL_METRICS = _numeric_columns(SoilReading)
+WEATHER_METRICS = _numeric_columns(WeatherData, ("wind_direction",))
+
+SOURCES = {
+    "soil": MetricSource(
+        name="soil",
+        table=SoilReading.__table__,
+        entities={"sensor": "sensor_id", "plot": "plot_id"},
+        metrics=SOIL_METRICS,
+        rollup=Rollup("soil_readings_hourly", timedelta(hours=1), SOIL_METRICS),
+    ),
+    "vision": MetricSource(
+        name="vision",
+        table=VisionData.__table__,
+        entities={"sensor": "sensor_id", "plot": "plot_id"},
+        metrics=_numeric_columns(
+            VisionData, ("irrigation_failures", "blocked_lines", "fruit_count", "fallen_fruits")
+        ),
+    ),
+    "weather": MetricSource(
+        name="weather",
+        table=WeatherData.__table__,
+        entities={"sensor": "sensor_id", "farm": "farm_id"},
+        metrics=WEATHER_METRICS,
+        rollup=Rollup("weather_hourly", timedelta(hours=1), WEATHER_METRICS),
+    ),
+}
+
+
+def parse_bucket(bucket: str) -> timedelta:
+    """Converte '15m', '1h', '1d' em timedelta."""
+    match = _BUCKET_PATTERN.match(bucket)
+    if not match or int(match.group(1)) == 0:
+        raise ValueError("Intervalo invalido (use por exemplo 15m, 1h, 1d)")
+    return timedelta(**{_BUCKET_UNITS[match.group(2)]: int(match.group(1))})
+
+
+def parse_aggregate(aggregate: str) -> float | None:
+    """Valida a agregacao; retorna a fracao para percentis (p50, p95...)."""
+    match = _PERCENTILE_PATTERN.match(aggregate)
+    if match:
+        percentile = int(match.group(1))
+        if not 1 <= percentile <= 99:
+            raise ValueError(f"Percentil invalido: {aggregate}")
+        return percentile / 100
+    if aggregate not in BASIC_AGGREGATES:
+        raise ValueError(f"Agregacao invalida: {aggregate}")
+    return None
+
+
+class TimeseriesService:
+    """Servico para consultas agregadas por intervalo nas hypertables."""
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def accessible_entity_ids(self, scope: str, entity_ids: list[UUID], current_user) -> set[UUID]:
+        """Retorna os ids do escopo que pertencem ao tenant do usuario."""
+        tenant = tenant_scopes.resolve(self.db, current_user)
+        if not tenant.unrestricted:
+            allowed = {
+                "sensor": tenant.sensor_ids,
+                "plot": tenant.plot_ids,
+                "farm": tenant.farm_ids,
+            }[scope]
+            return set(entity_ids) & allowed
+
+        if scope == "sensor":
+            query = self.db.query(Sensor.id).filter(
+                Sensor.id.in_(entity_ids), Sensor.deleted_at.is_(None)
+            )
+        elif scope == "plot":
+            query = self.db.query(Plot.id).filter(
+                Plot.id.in_(entity_ids), Plot.deleted_at.is_(None)
+            )
+        else:
+            query = self.db.query(Farm.id).filter(
+                Farm.id.in_(entity_ids), Farm.deleted_at.is_(None)
+            )
+
+        return {row.id for row in query.all()}
+
+    def query(self, request: TimeseriesQueryRequest) -> TimeseriesQueryResponse:
+        """Executa a consulta (os ids ja devem ter sido validados para o tenant)."""
+        if request.scope not in SCOPES:
+            raise ValueError("Escopo invalido (use sensor, plot ou farm)")
+        for group in request.group_by:
+            if group not in SCOPES:
+                raise ValueError(f"Agrupamento invalido: {group}")
+
+        # Datas sem fuso sao interpretadas como UTC
+        if request.start_time.tzinfo is None:
+            request = request.model_copy(
+                update={"start_time": request.start_time.replace(tzinfo=timezone.utc)}
+            )
+        end_time = request.end_time or datetime.now(timezone.utc)
+        if end_time.tzinfo is None:
+            end_time = end_time.replace(tzinfo=timezone.utc)
+
+        bucket = parse_bucket(request.bucket)
+        if end_time <= request.start_time:
+            raise ValueError("end_time deve ser posterior a start_time")
+        if (end_time - request.start_time) / bucket > settings.timeseries_max_buckets:
+            raise ValueError("Intervalo muito pequeno para o periodo consultado")
+
+        percentiles = {aggregate: parse_aggregate(aggregate) for aggregate in request.aggregates}
+
+        # Agrupa as metricas ("fonte.metrica") por fonte
+        by_source: dict[str, list[str]] = {}
+        for metric in request.metrics:
+            source_name, _, metric_name = metric.partition(".")
+            source = SOURCES.get(source_name)
+            if not source or metric_name not in source.metrics:
+                raise ValueError(f"Metrica invalida: {metric}")
+            by_source.setdefault(source_name, []).append(metric_name)
+
+        series: list[TimeseriesSeries] = []
+        for source_name, metrics in by_source.items():
+            series.extend(
+                self._query_source(
+                    SOURCES[source_name],
+                    metrics,
+                    request,
+                    bucket,
+                    end_time,
+                    percentiles,
+                )
+            )
+
+        return TimeseriesQueryResponse(
+            bucket=request.bucket,
+            start_time=request.start_time,
+            end_time=end_time,
+            series=series,
+        )
+
+    def _query_source(
+        self,
+        source: MetricSource,
+        metrics: list[str],
+        request: TimeseriesQueryRequest,
+        bucket: timedelta,
+        end_time: datetime,
+        percentiles: dict[str, float | None],
+    ) -> list[TimeseriesSeries]:
+        rollup = source.rollup
+        use_rollup = (
+            rollup is not None
+            and bucket % rollup.bucket == timedelta(0)
+            and all(aggregate in rollup.aggregates for aggregate in request.aggregates)
+            and all(metric in rollup.metrics for metric in metrics)
+            # Buckets do rollup inteiros dentro do intervalo; um fim no futuro
+            # (ex: agora) nao corta leituras, pois ainda nao ha dados depois dele
+            and _aligned(request.start_time, rollup.bucket)
+            and (
+                request.end_time is None
+                or _aligned(end_time, rollup.bucket)
+                or end_time >= datetime.now(timezone.utc)
+            )
+        )
+
+        if use_rollup:
+            rollup_columns = ["bucket", *source.entities.values()] + [
+                f"{metric}_{suffix}"
+                for metric in metrics
+                for suffix in ("sum", "count", "min", "max", "last")
+            ]
+            relation = table(rollup.name, *(column(name) for name in rollup_columns))
+            time_col = relation.c.bucket
+        else:
+            relation = source.table
+            time_col = relation.c.time
+
+        # Colunas de entidade; farm em fontes por talhao vem da tabela plots
+        plots = Plot.__table__
+        needs_plot_join = "farm" not in source.entities and (
+            request.scope == "farm" or "farm" in request.group_by
+        )
+
+        def entity_column(scope: str):
+            if scope in source.entities:
+                return relation.c[source.entities[scope]]
+            if scope == "farm" and "plot" in source.entities:
+                return plots.c.farm_id
+            raise ValueError(f"Escopo {scope} nao disponivel para metricas {source.name}")
+
+        scope_col = entity_column(request.scope)
+        group_cols = [entity_column(group).label(f"{group}_id") for group in request.group_by]
+
+        bucket_col = func.time_bucket(bucket, time_col).label("bucket")
+        value_cols = []
+        for metric in metrics:
+            for aggregate in request.aggregates:
+                label = f"{metric}__{aggregate}"
+                if use_rollup:
+                    expr = self._rollup_aggregate(relation, metric, aggregate)
+                else:
+                    expr = self._raw_aggregate(
+                        relation.c[metric], time_col, aggregate, percentiles[aggregate]
+                    )
+                value_cols.append(expr.label(label))
+
+        from_clause = relation
+        if needs_plot_join:
+            from_clause = relation.join(plots, plots.c.id == relation.c.plot_id)
+
+        stmt = (
+            select(bucket_col, *group_cols, *value_cols)
+            .select_from(from_clause)
+            .where(
+                scope_col.in_(request.entity_ids),
+                time_col >= request.start_time,
+                time_col < end_time,
+            )
+            .group_by(bucket_col, *group_cols)
+            .order_by(bucket_col)
+        )
+
+        grouped: dict[tuple, dict[str, TimeseriesSeries]] = {}
+        group_names = [f"{group}_id" for group in request.group_by]
+        for row in self.db.execute(stmt).mappings():
+            group_key = tuple(row[name] for name in group_names)
+            group_series = grouped.get(group_key)
+            if group_series is None:
+                group = dict(zip(group_names, group_key, strict=True))
+                group_series = grouped[group_key] = {
+                    f"{metric}__{aggregate}": TimeseriesSeries(
+                        metric=f"{source.name}.{metric}",
+                        aggregate=aggregate,
+                        group=group,
+                    )
+                    for metric in metrics
+                    for aggregate in request.aggregates
+                }
+            for label, item in group_series.items():
+                value = row[label]
+                item.points.append(
+                    TimeseriesPoint(
+                        time=row["bucket"],
+                        value=float(value) if value is not None else None,
+                    )
+                )
+
+        return [item for group_series in grouped.values() for item in group_series.values()]
+
+    @staticmethod
+    def _raw_aggregate(value_col, time_col, aggregate: str, percentile: float | None):
+        if percentile is not None:
+            return func.percentile_cont(percentile).within_group(value_col)
+        if aggregate == "last":
+            return func.last(value_col, time_col)
+        if aggregate == "first":
+            return func.first(value_col, time_col)
+        return getattr(func, aggregate)(value_col)
+
+    @staticmethod
+    def _rollup_aggregate(relation, metric: str, aggregate: str):
+        c = relation.c
+        if aggregate == "avg":
+            return func.sum(c[f"{metric}_sum"]) / func.nullif(func.sum(c[f"{metric}_count"]), 0)
+        if aggregate == "count":
+            return func.sum(c[f"{metric}_count"])
+        if aggregate == "last":
+            return func.last(c[f"{metric}_last"], c.bucket)
+        return getattr(func, aggregate)(c[f"{metric}_{aggregate}"])
@@ -5,7 +5,12 @@ from uuid import UUID
 
 from sqlalchemy.orm import Session, joinedload
 
-from app.core.security import get_password_hash, verify_password
+from app.core.principal import invalidate_principal
+from app.core.security import (
+    get_password_hash_async,
+    password_needs_rehash,
+    verify_password_async,
+)
 from app.models.organization import User, UserRole, Role
 from app.schemas.user import UserCreate, UserUpdate, SuperUserCreate
 
@@ -52,30 +57,39 @@ class UserService:
             User.deleted_at.is_(None),
         ).first()
 
-    def get_users_by_organization(self, organization_id: UUID) -> list[User]:
-        """Lista usuários de uma organização com seus roles."""
+    def users_by_organization_query(self, organization_id: UUID):
+        """Query dos usuários de uma organização com seus roles."""
         return self.db.query(User).options(
             joinedload(User.roles).joinedload(UserRole.role)
         ).filter(
             User.organization_id == organization_id,
             User.deleted_at.is_(None),
-        ).all()
-
-    def authenticate(self, email: str, password: str) -> User | None:
-        """Autentica usuário por email e senha."""
-        # Primeiro tenta como superuser
-        user = self.get_by_email(email, organization_id=None)
-        if user and verify_password(password, user.password_hash):
-            return user
+        )
 
-        # Depois busca em qualquer organização
-        user = self.get_by_email_any_org(email)
-        if user and verify_password(password, user.password_hash):
-            return user
+    def get_users_by_organization(self, organization_id: UUID) -> list[User]:
+        """Lista usuários de uma organização com seus roles."""
+        return self.users_by_organization_query(organization_id).all()
+
+    async def authenticate(self, email: str, password: str) -> User | None:
+        """Autentica usuário por email e senha.
+
+        Se o hash foi gerado com outro custo do bcrypt, é refeito com o
+        custo configurado.
+        """
+        # Primeiro tenta como superuser, depois busca em qualquer organização
+        for user in (
+            self.get_by_email(email, organization_id=None),
+            self.get_by_email_any_org(email),
+        ):
+            if user and await verify_password_async(password, user.password_hash):
+                if password_needs_rehash(user.password_hash):
+                    user.password_hash = await get_password_hash_async(password)
+                    self.db.commit()
+                return user
 
         return None
 
-    def create_user(
+    async def create_user(
         self,
         user_data: UserCreate,
         organization_id: UUID,
@@ -85,7 +99,7 @@ class UserService:
         user = User(
             organization_id=organization_id,
             email=user_data.email,
-            password_hash=get_password_hash(user_data.password),
+            password_hash=await get_password_hash_async(user_data.password),
             first_name=user_data.first_name,
             last_name=user_data.last_name,
             phone=user_data.phone,
@@ -107,12 +121,12 @@ class UserService:
         self.db.refresh(user)
         return user
 
-    def create_superuser(self, user_data: SuperUserCreate) -> User:
+    async def create_superuser(self, user_data: SuperUserCreate) -> User:
         """Cria um superusuário (admin do sistema)."""
         user = User(
             organization_id=None,
             email=user_data.email,
-            password_hash=get_password_hash(user_data.password),
+            password_hash=await get_password_hash_async(user_data.password),
             first_name=user_data.first_name,
             last_name=user_data.last_name,
             phone=user_data.phone,
@@ -147,6 +161,7 @@ class UserService:
                 )
                 self.db.add(user_role)
         
+        invalidate_principal(self.db, user_id=user.id)
         self.db.commit()
         self.db.refresh(user)
         return user
@@ -156,10 +171,10 @@ class UserService:
         user.last_login_at = datetime.now(timezone.utc)
         self.db.commit()
 
-    def change_password(self, user: User, new_password: str) -> User:
+    async def change_password(self, user: User, new_password: str) -> User:
         """Altera a senha do usuário."""
         # Gera o hash da nova senha
-        password_hash = get_password_hash(new_password)
+        password_hash = await get_password_hash_async(new_password)
         # Garante que é uma string (não bytes)
         if isinstance(password_hash, bytes):
             password_hash = password_hash.decode("utf-8")
@@ -174,6 +189,7 @@ class UserService:
         
         # Flush para garantir que a mudança é detectada pela sessão
         self.db.flush()
+        invalidate_principal(self.db, user_id=user.id)
         # Commit para persistir no banco de dados
         self.db.commit()
         # Expira o objeto da sessão e recarrega do banco para garantir sincronização
@@ -184,6 +200,7 @@ class UserService:
     def delete_user(self, user: User) -> None:
         """Soft delete de usuário."""
         user.deleted_at = datetime.now(timezone.utc)
+        invalidate_principal(self.db, user_id=user.id)
         self.db.commit()
 
     def count_superusers(self) -> int:
@@ -0,0 +1,183 @@
+"""Servico de dados meteorologicos da fazenda.
+
+As consultas leem os continuous aggregates weather_hourly e weather_daily
+(migration 008), em que extremos, chuva acumulada e graus-dia ja vem
+calculados por estacao. Aqui apenas se combinam as estacoes da fazenda
+em cada intervalo.
+"""
+
+from datetime import datetime, timedelta, timezone
+from uuid import UUID
+
+from sqlalchemy import column, func, select, table
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.schemas.weather import WeatherPoint, WeatherResponse
+
+WEATHER_INTERVALS = ("hour", "day")
+
+# Temperatura base dos graus-dia do rollup diario (ver migration 008)
+GDD_BASE_TEMPERATURE = 10.0
+
+# Periodo padrao de cada intervalo quando start_time nao e informado
+DEFAULT_PERIODS = {"hour": timedelta(days=2), "day": timedelta(days=30)}
+
+_HOURLY_METRICS = (
+    "temperature",
+    "humidity",
+    "pressure",
+    "wind_speed",
+    "rainfall",
+    "solar_radiation",
+)
+
+weather_hourly = table(
+    "weather_hourly",
+    column("bucket"),
+    column("sensor_id"),
+    column("farm_id"),
+    column("readings"),
+    *(
+        column(f"{metric}_{suffix}")
+        for metric in _HOURLY_METRICS
+        for suffix in ("sum", "count", "min", "max")
+    ),
+)
+
+weather_daily = table(
+    "weather_daily",
+    column("bucket"),
+    column("sensor_id"),
+    column("farm_id"),
+    column("temperature_avg"),
+    column("temperature_min"),
+    column("temperature_max"),
+    column("humidity_avg"),
+    column("pressure_avg"),
+    column("wind_speed_avg"),
+    column("wind_speed_max"),
+    column("rainfall_total"),
+    column("solar_radiation_avg"),
+    column("gdd"),
+    column("readings"),
+)
+
+
+def _hourly_average(c, metric: str):
+    return func.sum(c[f"{metric}_sum"]) / func.nullif(func.sum(c[f"{metric}_count"]), 0)
+
+
+def _float(value) -> float | None:
+    return float(value) if value is not None else None
+
+
+class WeatherService:
+    """Servico para consulta dos rollups meteorologicos por fazenda."""
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def farm_weather(
+        self,
+        farm_id: UUID,
+        interval: str = "day",
+        start_time: datetime | None = None,
+        end_time: datetime | None = None,
+    ) -> WeatherResponse:
+        """Serie meteorologica da fazenda por hora ou por dia."""
+        if interval not in WEATHER_INTERVALS:
+            raise ValueError("Intervalo invalido (use hour ou day)")
+
+        # Datas sem fuso sao interpretadas como UTC
+        end_time = end_time or datetime.now(timezone.utc)
+        if end_time.tzinfo is None:
+            end_time = end_time.replace(tzinfo=timezone.utc)
+        start_time = start_time or end_time - DEFAULT_PERIODS[interval]
+        if start_time.tzinfo is None:
+            start_time = start_time.replace(tzinfo=timezone.utc)
+        if end_time <= start_time:
+            raise ValueError("end_time deve ser posterior a start_time")
+        if interval == "hour" and (end_time - start_time) / timedelta(hours=1) > (
+            settings.timeseries_max_buckets
+        ):
+            raise ValueError("Periodo muito longo para o intervalo hour (use day)")
+
+        # Entre estacoes: media das medias, extremos e media da chuva/graus-dia
+        # de cada estacao (nao a soma, que dependeria do numero de estacoes)
+        relation = weather_hourly if interval == "hour" else weather_daily
+        c = relation.c
+        if interval == "hour":
+            values = [
+                _hourly_average(c, "temperature").label("temperature_avg"),
+                func.min(c.temperature_min).label("temperature_min"),
+                func.max(c.temperature_max).label("temperature_max"),
+                _hourly_average(c, "humidity").label("humidity_avg"),
+                _hourly_average(c, "pressure").label("pressure_avg"),
+                _hourly_average(c, "wind_speed").label("wind_speed_avg"),
+                func.max(c.wind_speed_max).label("wind_speed_max"),
+                func.avg(c.rainfall_sum).label("rainfall"),
+                _hourly_average(c, "solar_radiation").label("solar_radiation_avg"),
+                func.sum(c.readings).label("readings"),
+            ]
+        else:
+            values = [
+                func.avg(c.temperature_avg).label("temperature_avg"),
+                func.min(c.temperature_min).label("temperature_min"),
+                func.max(c.temperature_max).label("temperature_max"),
+                func.avg(c.humidity_avg).label("humidity_avg"),
+                func.avg(c.pressure_avg).label("pressure_avg"),
+                func.avg(c.wind_speed_avg).label("wind_speed_avg"),
+                func.max(c.wind_speed_max).label("wind_speed_max"),
+                func.avg(c.rainfall_total).label("rainfall"),
+                func.avg(c.solar_radiation_avg).label("solar_radiation_avg"),
+                func.avg(c.gdd).label("gdd"),
+                func.sum(c.readings).label("readings"),
+            ]
+
+        period = (
+            c.farm_id == farm_id,
+            c.bucket >= start_time,
+            c.bucket < end_time,
+        )
+        rows = self.db.execute(
+            select(c.bucket, *values)
+            .where(*period)
+            .group_by(c.bucket)
+            .order_by(c.bucket)
+        ).mappings()
+
+        points = [
+            WeatherPoint(
+                time=row["bucket"],
+                temperature_avg=_float(row["temperature_avg"]),
+                temperature_min=_float(row["temperature_min"]),
+                temperature_max=_float(row["temperature_max"]),
+                humidity_avg=_float(row["humidity_avg"]),
+                pressure_avg=_float(row["pressure_avg"]),
+                wind_speed_avg=_float(row["wind_speed_avg"]),
+                wind_speed_max=_float(row["wind_speed_max"]),
+                rainfall=_float(row["rainfall"]),
+                solar_radiation_avg=_float(row["solar_radiation_avg"]),
+                gdd=_float(row.get("gdd")),
+                readings=int(row["readings"] or 0),
+            )
+            for row in rows
+        ]
+        stations = self.db.execute(
+            select(func.count(func.distinct(c.sensor_id))).where(*period)
+        ).scalar()
+
+        rainfall = [point.rainfall for point in points if point.rainfall is not None]
+        gdd = [point.gdd for point in points if point.gdd is not None]
+        return WeatherResponse(
+            farm_id=farm_id,
+            interval=interval,
+            start_time=start_time,
+            end_time=end_time,
+            stations=stations or 0,
+            rainfall_total=round(sum(rainfall), 2) if rainfall else None,
+            gdd_total=round(sum(gdd), 2) if gdd else None,
+            gdd_base_temperature=GDD_BASE_TEMPERATURE,
+            points=points,
+        )
@@ -0,0 +1,84 @@
+"""Benchmark do custo de autenticacao por requisicao.
+
+Compara a consulta do usuario no banco a cada requisicao (comportamento
+anterior) com o principal em cache por subject do token, com o cache
+frio (sempre carrega do banco) e quente. Usa um usuario ativo existente
+no banco configurado em DATABASE_URL.
+
+Uso (a partir de backend/):
+    python -m benchmarks.auth --requests 2000
+"""
+
+import argparse
+import time
+from uuid import UUID
+
+from app.core.deps import authenticate_token
+from app.core.principal import principal_cache
+from app.core.security import create_access_token, verify_token
+from app.database import SessionLocal
+from app.models.organization import User
+
+
+def legacy_path(db, token: str) -> None:
+    payload = verify_token(token)
+    user = db.query(User).filter(
+        User.id == UUID(payload["sub"]),
+        User.deleted_at.is_(None),
+    ).first()
+    assert user is not None and user.is_active
+    # Cada requisicao usa uma sessao nova; nada fica no identity map
+    db.expunge_all()
+
+
+def cold_path(db, token: str) -> None:
+    principal_cache.clear()
+    authenticate_token(db, token)
+    db.expunge_all()
+
+
+def warm_path(db, token: str) -> None:
+    authenticate_token(db, token)
+
+
+def measure(func, db, token: str, requests: int) -> float:
+    func(db, token)
+    started = time.perf_counter()
+    for _ in range(requests):
+        func(db, token)
+    return (time.perf_counter() - started) / requests
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=2000)
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        user = db.query(User).filter(
+            User.is_active.is_(True),
+            User.deleted_at.is_(None),
+        ).first()
+        if user is None:
+            raise SystemExit("Nenhum usuario ativo no banco")
+        token = create_access_token(data={"sub": str(user.id)})
+
+        cases = [
+            ("consulta por requisicao (anterior)", legacy_path),
+            ("principal, cache frio", cold_path),
+            ("principal, cache quente", warm_path),
+        ]
+        baseline = None
+        print(f"{args.requests} requisicoes (us por requisicao)")
+        for name, func in cases:
+            elapsed = measure(func, db, token, args.requests) * 1_000_000
+            baseline = baseline or elapsed
+            print(f"  {name:<36} {elapsed:9.1f} us  {baseline / elapsed:6.1f}x")
+    finally:
+        principal_cache.clear()
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""Benchmark de serializacao de leituras de solo.
+
+Compara o caminho padrao do FastAPI (validacao por objeto + jsonable_encoder
++ json.dumps) com o TypeAdapter pre-construido + dump_json usado pelas rotas
+de listas grandes, e com o ORJSONResponse sobre dicionarios ja prontos.
+
+Uso (a partir de backend/):
+    python -m benchmarks.serialization --rows 10000 --repeat 5
+"""
+
+import argparse
+import json
+import statistics
+import time
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+from types import SimpleNamespace
+from uuid import uuid4
+
+from fastapi.encoders import jsonable_encoder
+from starlette.responses import JSONResponse
+
+from app.core.responses import ORJSONResponse
+from app.schemas.serializers import soil_readings_adapter
+from app.schemas.timeseries import SoilReadingResponse
+
+
+def build_rows(count: int) -> list[SimpleNamespace]:
+    """Gera objetos com os mesmos atributos de SoilReading."""
+    start = datetime.now(timezone.utc)
+    sensor_id, plot_id = uuid4(), uuid4()
+    return [
+        SimpleNamespace(
+            time=start - timedelta(minutes=i),
+            sensor_id=sensor_id,
+            plot_id=plot_id,
+            moisture=Decimal("32.45"),
+            temperature=Decimal("27.10"),
+            ec=Decimal("1.25"),
+            ph=Decimal("6.40"),
+            nitrogen=Decimal("42.00"),
+            phosphorus=Decimal("18.00"),
+            potassium=Decimal("120.00"),
+            extra_data={"battery": 87},
+        )
+        for i in range(count)
+    ]
+
+
+def default_path(rows) -> bytes:
+    models = [SoilReadingResponse.model_validate(row) for row in rows]
+    return JSONResponse(jsonable_encoder(models)).body
+
+
+def adapter_path(rows) -> bytes:
+    return soil_readings_adapter.dump_json(
+        soil_readings_adapter.validate_python(rows, from_attributes=True)
+    )
+
+
+def adapter_python_orjson_path(rows) -> bytes:
+    content = soil_readings_adapter.dump_python(
+        soil_readings_adapter.validate_python(rows, from_attributes=True), mode="json"
+    )
+    return ORJSONResponse(content).body
+
+
+def measure(func, rows, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func(rows)
+        timings.append(time.perf_counter() - started)
+    return statistics.median(timings)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=10_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    rows = build_rows(args.rows)
+    assert json.loads(default_path(rows)) == json.loads(adapter_path(rows))
+
+    cases = [
+        ("model_validate + jsonable_encoder + json", default_path),
+        ("TypeAdapter + dump_python + orjson", adapter_python_orjson_path),
+        ("TypeAdapter + dump_json", adapter_path),
+    ]
+    baseline = None
+    per_10k = 10_000 / args.rows
+    print(f"{args.rows} leituras, mediana de {args.repeat} execucoes (ms por 10k leituras)")
+    for name, func in cases:
+        elapsed = measure(func, rows, args.repeat) * 1000 * per_10k
+        baseline = baseline or elapsed
+        print(f"  {name:<42} {elapsed:9.1f} ms  {baseline / elapsed:5.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -84,9 +84,10 @@ export function useAnalytics(farmId: string | null): UseAnalyticsResult {
       // Gerar snapshots se estiver vazio ou se forceGenerate for true
       if (latestSnapshots.length === 0 || forceGenerate) {
         try {
-          const generated = await analyticsService.generateSnapshots(farmId);
-          if (generated.length > 0) {
-            // Se gerou novos, buscar todos os snapshots atualizados
+          const job = await analyticsService.generateSnapshots(farmId);
+          const finished = await analyticsService.waitForJob(job.id);
+          if (finished.status === 'completed') {
+            // Job concluido: buscar todos os snapshots atualizados
             latestSnapshots = await analyticsService.getLatestSnapshots(farmId);
           }
         } catch {
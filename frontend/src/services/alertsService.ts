@@ -4,6 +4,7 @@ import type {
   AlertCreate, 
   AlertAcknowledge, 
   AlertResolve,
+  AlertCounts,
   AlertFilters 
 } from '@/types/alert';
 
@@ -70,15 +71,25 @@ export const alertsService = {
     warning: number;
     info: number;
   }> {
-    const alerts = await this.getActiveAlerts(farmId);
+    const counts = await this.getAlertCounts(farmId);
     return {
-      total: alerts.length,
-      critical: alerts.filter(a => a.severity === 'critical').length,
-      warning: alerts.filter(a => a.severity === 'warning').length,
-      info: alerts.filter(a => a.severity === 'info').length,
+      total: counts.open,
+      critical: counts.by_severity.critical ?? 0,
+      warning: counts.by_severity.warning ?? 0,
+      info: counts.by_severity.info ?? 0,
     };
   },
 
+  /**
+   * Get open alert counters (maintained by the backend, no alert listing)
+   */
+  async getAlertCounts(farmId?: string, plotId?: string): Promise<AlertCounts> {
+    const response = await api.get<AlertCounts>('/alerts/counts', {
+      params: { farm_id: farmId, plot_id: plotId },
+    });
+    return response.data;
+  },
+
   /**
    * Get alerts grouped by category
    */
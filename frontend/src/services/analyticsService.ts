@@ -3,9 +3,17 @@ import type {
   PlotProductionSnapshot, 
   SnapshotCreate,
   AnalyticsFilters,
+  BackgroundJob,
   FarmSummary 
 } from '@/types/analytics';
 
+export interface ForecastPoint {
+  date: string;
+  yield_kg: number;
+  lower_kg: number;
+  upper_kg: number;
+}
+
 export interface ProductionForecast {
   total_estimated_kg: number;
   total_estimated_tons: number;
@@ -13,6 +21,10 @@ export interface ProductionForecast {
   harvest_end: string | null;
   plots_ready: number;
   plots_in_progress: number;
+  plots_forecasted: number;
+  confidence_level: number;
+  fitted_at: string | null;
+  forecast: ForecastPoint[];
 }
 
 export interface HistoricalDataPoint {
@@ -112,15 +124,36 @@ export const analyticsService = {
   },
 
   /**
-   * Generate snapshots from sensor data
+   * Enqueue snapshot generation from sensor data (background job)
    */
-  async generateSnapshots(farmId?: string): Promise<PlotProductionSnapshot[]> {
-    const response = await api.post<PlotProductionSnapshot[]>('/analytics/generate', null, {
+  async generateSnapshots(farmId?: string): Promise<BackgroundJob> {
+    const response = await api.post<BackgroundJob>('/analytics/generate', null, {
       params: farmId ? { farm_id: farmId } : undefined,
     });
     return response.data;
   },
 
+  /**
+   * Get background job status
+   */
+  async getJob(jobId: string): Promise<BackgroundJob> {
+    const response = await api.get<BackgroundJob>(`/analytics/jobs/${jobId}`);
+    return response.data;
+  },
+
+  /**
+   * Poll a background job until it completes or fails
+   */
+  async waitForJob(jobId: string, intervalMs = 1000, timeoutMs = 60000): Promise<BackgroundJob> {
+    const deadline = Date.now() + timeoutMs;
+    let job = await this.getJob(jobId);
+    while ((job.status === 'queued' || job.status === 'running') && Date.now() < deadline) {
+      await new Promise((resolve) => setTimeout(resolve, intervalMs));
+      job = await this.getJob(jobId);
+    }
+    return job;
+  },
+
   /**
    * Get production analytics overview
    */
@@ -1,6 +1,10 @@
 import api from './api';
+import { env } from '@/config/env';
 import type { Farm, FarmCreate, FarmUpdate, FarmWithStats } from '@/types/farm';
 import type { FarmSummary } from '@/types/analytics';
+import type { HeatmapMetric } from './sensorsService';
+
+export type FarmTileLayer = 'plot-status' | 'heatmap';
 
 /**
  * Farms service - CRUD operations for farms
@@ -62,6 +66,15 @@ export const farmsService = {
   async deleteFarm(id: string): Promise<void> {
     await api.delete(`/farms/${id}`);
   },
+
+  /**
+   * XYZ tile URL template ({z}/{x}/{y}) for a farm map layer.
+   * Requests must carry the Authorization header; tiles support ETag revalidation.
+   */
+  getTileUrl(farmId: string, layer: FarmTileLayer, metric?: HeatmapMetric): string {
+    const url = `${env.API_URL}/farms/${farmId}/tiles/${layer}/{z}/{x}/{y}.png`;
+    return layer === 'heatmap' && metric ? `${url}?metric=${metric}` : url;
+  },
 };
 
 export default farmsService;
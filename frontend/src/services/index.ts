@@ -12,3 +12,4 @@ export { default as alertsService } from './alertsService';
 export { default as eventsService } from './eventsService';
 export { default as analyticsService } from './analyticsService';
 export { default as usersService } from './usersService';
+export { default as searchService } from './searchService';
@@ -12,6 +12,7 @@ export interface PlotFilters {
   farm_id?: string;
   status?: string;
   search?: string;
+  bbox?: string; // min_lng,min_lat,max_lng,max_lat (requires farm_id)
 }
 
 /**
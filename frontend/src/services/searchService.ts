@@ -0,0 +1,50 @@
+import api from './api';
+
+export type SearchResultType = 'event' | 'alert' | 'note';
+
+export interface SearchResult {
+  type: SearchResultType;
+  id: string;
+  farm_id?: string | null;
+  plot_id?: string | null;
+  title: string;
+  snippet: string; // HTML-escaped text, matched terms wrapped in <mark></mark>
+  timestamp: string;
+  rank: number;
+}
+
+export interface SearchParams {
+  q: string;
+  types?: SearchResultType[];
+  farm_id?: string;
+  plot_id?: string;
+  start_date?: string;
+  end_date?: string;
+  cursor?: string;
+  limit?: number;
+}
+
+export interface SearchPage {
+  results: SearchResult[];
+  nextCursor: string | null;
+}
+
+/**
+ * Search service - full-text search over events, alerts and notes
+ */
+export const searchService = {
+  /**
+   * Search ranked by relevance; pass nextCursor back to get the next page
+   */
+  async search({ types, ...params }: SearchParams): Promise<SearchPage> {
+    const response = await api.get<SearchResult[]>('/search/', {
+      params: { ...params, types: types?.join(',') },
+    });
+    return {
+      results: response.data,
+      nextCursor: response.headers['x-next-cursor'] ?? null,
+    };
+  },
+};
+
+export default searchService;
@@ -6,6 +6,7 @@ export interface SensorFilters {
   plot_id?: string;
   sensor_type_id?: string;
   is_online?: boolean;
+  bbox?: string; // min_lng,min_lat,max_lng,max_lat (requires farm_id)
 }
 
 export interface SensorCreate {
@@ -87,6 +88,34 @@ export interface SensorHeatmapData {
   is_critical: boolean;
 }
 
+export type HeatmapMetric =
+  | 'soilMoisture'
+  | 'temperature'
+  | 'electricalConductivity'
+  | 'ph'
+  | 'nitrogen'
+  | 'phosphorus'
+  | 'potassium';
+
+export interface HeatmapRaster {
+  farm_id: string;
+  metric: HeatmapMetric;
+  bounds: {
+    min_lng: number;
+    min_lat: number;
+    max_lng: number;
+    max_lat: number;
+  } | null;
+  width: number;
+  height: number;
+  /** values[row][col], row 0 = north, null outside plots */
+  values: (number | null)[][];
+  min_value: number | null;
+  max_value: number | null;
+  sensors: number;
+  generated_at: string;
+}
+
 /**
  * Sensors service - CRUD operations for sensors
  */
@@ -157,6 +186,20 @@ export const sensorsService = {
     });
     return response.data;
   },
+
+  /**
+   * Get the server-side interpolated heatmap grid for a farm metric
+   */
+  async getHeatmapRaster(
+    farmId: string,
+    metric: HeatmapMetric = 'soilMoisture',
+    resolution?: number
+  ): Promise<HeatmapRaster> {
+    const response = await api.get<HeatmapRaster>('/sensors/heatmap-raster', {
+      params: { farm_id: farmId, metric, resolution },
+    });
+    return response.data;
+  },
 };
 
 export default sensorsService;
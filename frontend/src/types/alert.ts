@@ -62,6 +62,14 @@ export interface AlertResolve {
   resolution_notes?: string;
 }
 
+export interface AlertCounts {
+  open: number;
+  unacknowledged: number;
+  by_severity: Record<string, number>;
+  unacknowledged_by_severity: Record<string, number>;
+  by_category: Record<string, number>;
+}
+
 export interface AlertFilters {
   farm_id?: string;
   plot_id?: string;
@@ -75,6 +75,21 @@ export interface AnalyticsFilters {
   production_stage?: ProductionStage;
 }
 
+export type JobStatus = 'queued' | 'running' | 'completed' | 'failed';
+
+export interface BackgroundJob {
+  id: string;
+  type: string;
+  status: JobStatus;
+  organization_id: string | null;
+  params: Record<string, unknown>;
+  result: Record<string, unknown> | null;
+  error: string | null;
+  created_at: string;
+  started_at: string | null;
+  finished_at: string | null;
+}
+
 export interface FarmSummary {
   farm_id: string;
   farm_name: string;
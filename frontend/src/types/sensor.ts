@@ -56,7 +56,6 @@ export interface Sensor {
   dev_eui: string | null;
   serial_number: string | null;
   mac_address: string | null;
-  api_key: string | null;
   location: {
     lat?: number;
     lng?: number;
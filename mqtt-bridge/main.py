@@ -2,7 +2,9 @@ import os
 import json
 import logging
 import ssl
-from datetime import datetime
+import threading
+import time
+from datetime import datetime, timezone
 from sqlalchemy import create_engine, text
 from sqlalchemy.orm import sessionmaker
 import paho.mqtt.client as mqtt
@@ -13,6 +15,11 @@ DATABASE_URL = os.getenv("DATABASE_URL")
 MQTT_BROKER = os.getenv("MQTT_BROKER")
 MQTT_PORT = int(os.getenv("MQTT_PORT", 8883))
 MQTT_TOPIC = os.getenv("MQTT_TOPIC")
+# Canal LISTEN/NOTIFY usado pela API para invalidar caches e alimentar o stream ao vivo
+FARM_EVENTS_CHANNEL = os.getenv("FARM_EVENTS_CHANNEL", "farm_events")
+# Sans message depuis ce délai, le capteur passe hors ligne
+SENSOR_OFFLINE_MINUTES = int(os.getenv("SENSOR_OFFLINE_MINUTES", 120))
+LIVENESS_CHECK_SECONDS = int(os.getenv("LIVENESS_CHECK_SECONDS", 60))
 
 CA_CERT_PATH = os.getenv("CA_CERT_PATH", "/app/certs/ca.pem")
 CLIENT_CERT_PATH = os.getenv("CLIENT_CERT_PATH", "/app/certs/client-csr.pem")
@@ -39,16 +46,89 @@ if not MQTT_TOPIC:
 engine = create_engine(DATABASE_URL, pool_size=5, max_overflow=10)
 SessionLocal = sessionmaker(bind=engine)
 
+# Clés des mesures reconnues dans le payload décodé ('object')
+SOIL_KEYS = ['moisture', 'temperature', 'ph', 'ec', 'nitrogen', 'phosphorus', 'potassium']
+WEATHER_KEYS = [
+    'temperature', 'humidity', 'pressure', 'wind_speed', 'wind_direction',
+    'rainfall', 'solar_radiation',
+]
+SOIL_ONLY_KEYS = [k for k in SOIL_KEYS if k not in WEATHER_KEYS]
+WEATHER_ONLY_KEYS = [k for k in WEATHER_KEYS if k not in SOIL_KEYS]
+
 def get_sensor_metadata(session, dev_eui):
-    """Recupera ID, plot e organizacao via DevEUI."""
+    """Recupera ID, plot, organizacao, fazenda e categoria do tipo via DevEUI."""
     dev_eui_upper = dev_eui.upper()
     query = text("""
-        SELECT id, plot_id, organization_id FROM sensors 
-        WHERE (UPPER(dev_eui) = :dev_eui OR UPPER(serial_number) = :dev_eui OR UPPER(mac_address) = :dev_eui) 
-        AND is_active = true AND deleted_at IS NULL LIMIT 1
+        SELECT s.id, s.plot_id, s.organization_id, s.farm_id, s.is_online, st.category
+        FROM sensors s JOIN sensor_types st ON st.id = s.sensor_type_id
+        WHERE (UPPER(s.dev_eui) = :dev_eui OR UPPER(s.serial_number) = :dev_eui OR UPPER(s.mac_address) = :dev_eui) 
+        AND s.is_active = true AND s.deleted_at IS NULL LIMIT 1
     """)
     return session.execute(query, {"dev_eui": dev_eui_upper}).fetchone()
 
+def notify_farm_event(session, event_type, sensor_id, plot_id, org_id, farm_id, **data):
+    """Publie un évènement (livré au commit) : invalidation des caches et delta pour le live."""
+    payload = {
+        "type": event_type,
+        "farm_id": str(farm_id) if farm_id else None,
+        "organization_id": str(org_id) if org_id else None,
+        "plot_id": str(plot_id) if plot_id else None,
+        "sensor_id": str(sensor_id),
+        **data,
+    }
+    session.execute(
+        text("SELECT pg_notify(:channel, :payload)"),
+        {"channel": FARM_EVENTS_CHANNEL, "payload": json.dumps(payload, default=str)},
+    )
+
+def mark_sensor_online(session, sensor, timestamp):
+    """Met à jour last_signal_at et publie le passage en ligne si besoin."""
+    sensor_id, plot_id, org_id, farm_id, was_online, _ = sensor
+    session.execute(
+        text(
+            "UPDATE sensors SET last_signal_at = :t, is_online = true, updated_at = now() "
+            "WHERE id = :sid"
+        ),
+        {"t": timestamp, "sid": sensor_id},
+    )
+    if not was_online:
+        notify_farm_event(
+            session, "sensor_status", sensor_id, plot_id, org_id, farm_id,
+            is_online=True, last_signal_at=timestamp.isoformat(),
+        )
+
+def sweep_offline_sensors():
+    """Passe hors ligne les capteurs muets et publie les changements de statut."""
+    session = SessionLocal()
+    try:
+        rows = session.execute(
+            text("""
+                UPDATE sensors SET is_online = false, updated_at = now()
+                WHERE is_online = true AND deleted_at IS NULL
+                AND (last_signal_at IS NULL OR last_signal_at < now() - make_interval(mins => :mins))
+                RETURNING id, plot_id, organization_id, farm_id, last_signal_at
+            """),
+            {"mins": SENSOR_OFFLINE_MINUTES},
+        ).fetchall()
+        for sensor_id, plot_id, org_id, farm_id, last_signal_at in rows:
+            notify_farm_event(
+                session, "sensor_status", sensor_id, plot_id, org_id, farm_id,
+                is_online=False, last_signal_at=last_signal_at.isoformat() if last_signal_at else None,
+            )
+        session.commit()
+        if rows:
+            logger.info(f"{len(rows)} capteur(s) passé(s) hors ligne")
+    except Exception as e:
+        session.rollback()
+        logger.error(f"Erreur lors du contrôle de liveness : {e}")
+    finally:
+        session.close()
+
+def liveness_loop():
+    while True:
+        time.sleep(LIVENESS_CHECK_SECONDS)
+        sweep_offline_sensors()
+
 # --- CALLBACKS (Format API v2) ---
 def on_connect(client, userdata, flags, rc, properties=None):
     if rc == 0:
@@ -78,10 +158,11 @@ def process_message(client, userdata, msg):
             logger.warning(f"Capteur {dev_eui} ignoré : non présent en base.")
             return
 
-        sensor_id, plot_id, org_id = sensor
+        sensor_id, plot_id, org_id, farm_id, _, category = sensor
         # Utilisation du timestamp du message ou heure actuelle
         # TimescaleDB nécessite impérativement une colonne 'time' non nulle
-        timestamp = datetime.now() 
+        timestamp = datetime.now(timezone.utc)
+        mark_sensor_online(session, sensor, timestamp)
 
         # 3. Insertion dans 'uplink_telemetry' (Table Brute/Historique)
         session.execute(
@@ -98,10 +179,45 @@ def process_message(client, userdata, msg):
             }
         )
 
-        # 4. Insertion dans 'soil_readings' (Table Métier/Front)
+        # 4. Station météo : insertion dans 'weather_data' (agrégée par ferme)
+        # Catégorie du type de capteur ; pour les autres catégories (hors sol),
+        # présence de clés propres à la météo
+        if category == 'weather' or (
+            category != 'soil'
+            and any(k in object_payload for k in WEATHER_ONLY_KEYS)
+            and not any(k in object_payload for k in SOIL_ONLY_KEYS)
+        ):
+            session.execute(
+                text("""
+                    INSERT INTO weather_data (
+                        time, sensor_id, farm_id, temperature, humidity, pressure,
+                        wind_speed, wind_direction, rainfall, solar_radiation
+                    ) VALUES (
+                        :t, :sid, :fid, :temp, :hum, :pres, :ws, :wd, :rain, :sol
+                    )
+                    ON CONFLICT DO NOTHING
+                """),
+                {
+                    "t": timestamp, "sid": sensor_id, "fid": farm_id,
+                    "temp": object_payload.get('temperature'),
+                    "hum": object_payload.get('humidity'),
+                    "pres": object_payload.get('pressure'),
+                    "ws": object_payload.get('wind_speed'),
+                    "wd": object_payload.get('wind_direction'),
+                    "rain": object_payload.get('rainfall'),
+                    "sol": object_payload.get('solar_radiation')
+                }
+            )
+            logger.info(f"Mesure météo insérée pour {dev_eui} sur la ferme {farm_id}")
+            values = {k: object_payload[k] for k in WEATHER_KEYS if object_payload.get(k) is not None}
+            notify_farm_event(
+                session, "reading", sensor_id, plot_id, org_id, farm_id,
+                dataset="weather", time=timestamp.isoformat(), values=values,
+            )
+
+        # 5. Insertion dans 'soil_readings' (Table Métier/Front)
         # On vérifie la présence d'au moins une donnée sol avant d'insérer
-        soil_keys = ['moisture', 'temperature', 'ph', 'ec', 'nitrogen', 'phosphorus', 'potassium']
-        if any(k in object_payload for k in soil_keys):
+        elif any(k in object_payload for k in SOIL_KEYS):
             session.execute(
                 text("""
                     INSERT INTO soil_readings (
@@ -123,6 +239,12 @@ def process_message(client, userdata, msg):
                 }
             )
             logger.info(f"Lecture insérée pour {dev_eui} sur le plot {plot_id}")
+            # Delta pour le live : uniquement les valeurs reçues
+            values = {k: object_payload[k] for k in SOIL_KEYS if object_payload.get(k) is not None}
+            notify_farm_event(
+                session, "reading", sensor_id, plot_id, org_id, farm_id,
+                dataset="soil", time=timestamp.isoformat(), values=values,
+            )
 
         session.commit()
 
@@ -174,6 +296,7 @@ try:
     logger.info("Démarrage du Bridge...")
     logger.info(f"Cible : {MQTT_BROKER}:{MQTT_PORT}")
     client.connect(MQTT_BROKER, MQTT_PORT, 60)
+    threading.Thread(target=liveness_loop, name="liveness", daemon=True).start()
     client.loop_forever()
 except Exception as e:
     logger.critical(f"Impossible de démarrer le service : {e}")